@@ -6,6 +6,7 @@ from airport.models import (
     Route,
     AirplaneType,
     Flight,
+    FlightSchedule,
     Order,
     Ticket)
 
@@ -15,5 +16,6 @@ admin.site.register(Crew)
 admin.site.register(Route)
 admin.site.register(AirplaneType)
 admin.site.register(Flight)
+admin.site.register(FlightSchedule)
 admin.site.register(Order)
 admin.site.register(Ticket)
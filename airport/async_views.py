@@ -0,0 +1,112 @@
+from asgiref.sync import sync_to_async
+from django.views import View
+from rest_framework.exceptions import MethodNotAllowed, NotFound
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from airport.models import Flight
+from airport.renderers import FastJSONRenderer
+from airport.serializers import FlightDetailSerializer, AirportSerializer, RouteListSerializer, \
+    FlightListValuesSerializer
+from airport.views import FlightViewSet, FlightPagination, AirportViewSet, RouteViewSet
+
+# Large enough to fetch a whole page in one round trip, required for prefetch_related.
+CHUNK_SIZE = 2000
+
+
+class AsyncReadView(View):
+    """Read-only JSON view on the async ORM, under the same policy as the DRF API.
+
+    Each request goes through a plain APIView for authentication, the default
+    permissions and throttles, and exception handling, so errors look exactly
+    like the ones of the DRF endpoints. Handlers get the DRF ``Request`` and
+    return a DRF ``Response``.
+    """
+
+    http_method_names = ["get", "head", "options"]
+    renderer_classes = (FastJSONRenderer,)
+
+    async def dispatch(self, request, *args, **kwargs):
+        api_view = APIView(renderer_classes=self.renderer_classes)
+        api_view.args = args
+        api_view.kwargs = kwargs
+        request = api_view.initialize_request(request, *args, **kwargs)
+        api_view.request = request
+        api_view.headers = api_view.default_response_headers
+
+        try:
+            if request.method.lower() not in self.http_method_names:
+                raise MethodNotAllowed(request.method)
+            # Authentication looks the user up, so it runs off the event loop.
+            await sync_to_async(api_view.initial)(request, *args, **kwargs)
+            response = await getattr(self, request.method.lower())(request, *args, **kwargs)
+        except Exception as exc:
+            response = api_view.handle_exception(exc)
+
+        return api_view.finalize_response(request, response, *args, **kwargs)
+
+
+class AsyncFlightListView(AsyncReadView):
+    """Async twin of ``FlightViewSet.list``.
+
+    Shares its filters, FlightPagination and, for ``?date=``, the schedule
+    occurrences merged into the day. The count, page, crews and sold seat
+    queries all run on the async ORM.
+    """
+
+    async def get(self, request):
+        filters = FlightViewSet.validate_filters(request.query_params)
+        rows = FlightListValuesSerializer.project(FlightViewSet.filter_flights(FlightViewSet.queryset, filters))
+        if filters.get("date"):
+            # The day is merged and sorted in memory, as FlightViewSet.list does.
+            date = filters["date"]
+            schedules = FlightViewSet.unmaterialized_schedules(date, filters)
+            rows = FlightViewSet.with_schedule_occurrences(
+                [row async for row in rows.aiterator(chunk_size=CHUNK_SIZE)],
+                date,
+                filters,
+                schedules=[schedule async for schedule in schedules.aiterator(chunk_size=CHUNK_SIZE)],
+            )
+
+        paginator = FlightPagination()
+        page = await paginator.apaginate_queryset(rows, request, view=self)
+        data = await FlightListValuesSerializer(page, context={"request": request}).adata()
+        return paginator.get_paginated_response(data)
+
+
+class AsyncFlightDetailView(AsyncReadView):
+    """Async twin of ``FlightViewSet.retrieve``."""
+
+    async def get(self, request, pk):
+        try:
+            flight = await FlightViewSet.queryset.aget(pk=pk)
+        except Flight.DoesNotExist:
+            raise NotFound("No Flight matches the given query.")
+        return Response(FlightDetailSerializer(flight, context={"request": request}).data)
+
+
+class AsyncAirportSearchView(AsyncReadView):
+    """Async twin of ``AirportViewSet.list`` (``?name=``, ``?city=``)."""
+
+    async def get(self, request):
+        queryset = AirportViewSet.filter_airports(AirportViewSet.queryset, request.query_params)
+        airports = [airport async for airport in queryset.aiterator(chunk_size=CHUNK_SIZE)]
+        return Response(AirportSerializer(airports, many=True).data)
+
+
+class AsyncRouteSearchView(AsyncReadView):
+    """Routes filtered by ``?source=``/``?destination=`` city, shaped like ``RouteViewSet.list``."""
+
+    async def get(self, request):
+        queryset = RouteViewSet.queryset.all()
+        source = request.query_params.get("source")
+        destination = request.query_params.get("destination")
+
+        if source:
+            queryset = queryset.filter(source__closest_big_city__icontains=source)
+
+        if destination:
+            queryset = queryset.filter(destination__closest_big_city__icontains=destination)
+
+        routes = [route async for route in queryset.aiterator(chunk_size=CHUNK_SIZE)]
+        return Response(RouteListSerializer(routes, many=True).data)
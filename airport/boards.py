@@ -0,0 +1,179 @@
+from datetime import datetime, time, timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.utils import timezone
+from rest_framework import serializers
+
+from airport.cache import get_versions
+from airport.models import Airport, Airplane, Route, Flight, FlightSchedule
+
+DEPARTURES = "departures"
+ARRIVALS = "arrivals"
+
+# Board kind -> (airport lookup, time field the board is sorted and dated by).
+BOARDS = {
+    DEPARTURES: ("route__source_id", "departure_time"),
+    ARRIVALS: ("route__destination_id", "arrival_time"),
+}
+
+# Bumped by bulk flight writes that skip signals, see airport.imports.
+BOARDS_VERSION = "airport.boards"
+
+# Boards also show airport and airplane names and schedule occurrences, so their
+# keys carry those versions. Flight changes refresh the affected boards in place instead.
+BOARD_VERSIONS = (Route, Airport, Airplane, FlightSchedule, BOARDS_VERSION)
+
+# Columns of a board row, in the order of the board's values_list.
+BOARD_FIELDS = (
+    "id",
+    "departure_time",
+    "arrival_time",
+    "route__source_id",
+    "route__source__name",
+    "route__source__closest_big_city",
+    "route__destination_id",
+    "route__destination__name",
+    "route__destination__closest_big_city",
+    "airplane__name",
+)
+
+
+def board_key(kind, airport_id, date):
+    versions = "-".join(str(version) for version in get_versions(BOARD_VERSIONS))
+    return f"board:{kind}:{airport_id}:{date.isoformat()}:{versions}"
+
+
+def scheduled_rows(kind, airport_id, date, start, end):
+    """Board rows of the schedule occurrences with no Flight yet, timed within ``[start, end)``.
+
+    Their id is the occurrence id, as in the flight list.
+    """
+    airport_lookup, time_field = BOARDS[kind]
+    schedules = FlightSchedule.objects.filter(
+        **{airport_lookup: airport_id},
+        valid_from__lte=date,
+        # An arrival may belong to an occurrence that left the day before.
+        valid_until__gte=date - timedelta(days=1),
+    ).select_related("route__source", "route__destination", "airplane")
+
+    occurrences = []
+    for schedule in schedules:
+        for occurrence_date, departure_time, arrival_time in schedule.occurrences_between(start, end):
+            board_time = departure_time if time_field == "departure_time" else arrival_time
+            if start <= board_time < end:
+                occurrences.append((schedule, occurrence_date, departure_time, arrival_time))
+    if not occurrences:
+        return []
+
+    # A materialized occurrence is on the board as its Flight already.
+    materialized = FlightSchedule.materialized(
+        (schedule.pk, occurrence_date) for schedule, occurrence_date, _, _ in occurrences
+    )
+    return [
+        (
+            FlightSchedule.occurrence_id(schedule.pk, occurrence_date),
+            departure_time,
+            arrival_time,
+            schedule.route.source_id,
+            schedule.route.source.name,
+            schedule.route.source.closest_big_city,
+            schedule.route.destination_id,
+            schedule.route.destination.name,
+            schedule.route.destination.closest_big_city,
+            schedule.airplane.name,
+        )
+        for schedule, occurrence_date, departure_time, arrival_time in occurrences
+        if (schedule.pk, occurrence_date) not in materialized
+    ]
+
+
+def build_board(kind, airport_id, date):
+    """Flights and schedule occurrences with no Flight yet of a board, in time order."""
+    airport_lookup, time_field = BOARDS[kind]
+    start = timezone.make_aware(datetime.combine(date, time.min))
+    end = timezone.make_aware(datetime.combine(date + timedelta(days=1), time.min))
+    rows = list(
+        Flight.objects.filter(**{
+            airport_lookup: airport_id,
+            f"{time_field}__gte": start,
+            f"{time_field}__lt": end,
+        })
+        .order_by(time_field, "id")
+        .values_list(*BOARD_FIELDS)
+    )
+    occurrences = scheduled_rows(kind, airport_id, date, start, end)
+    if occurrences:
+        time_index = BOARD_FIELDS.index(time_field)
+        rows = sorted(rows + occurrences, key=lambda row: row[time_index])
+    datetime_field = serializers.DateTimeField()
+    return [
+        {
+            "flight": flight_id,
+            "departure_time": datetime_field.to_representation(departure_time),
+            "arrival_time": datetime_field.to_representation(arrival_time),
+            "source": {"id": source_id, "name": source_name, "closest_big_city": source_city},
+            "destination": {
+                "id": destination_id,
+                "name": destination_name,
+                "closest_big_city": destination_city,
+            },
+            "airplane": airplane,
+        }
+        for (
+            flight_id, departure_time, arrival_time,
+            source_id, source_name, source_city,
+            destination_id, destination_name, destination_city,
+            airplane,
+        ) in rows
+    ]
+
+
+def get_board(kind, airport_id, date):
+    """Return the board of ``airport_id`` for ``date``, building it on a cache miss.
+
+    Returns None when there is no such airport. The key carries the Airport
+    version, so a cached board is never served for a deleted airport.
+    """
+    key = board_key(kind, airport_id, date)
+    board = cache.get(key)
+    if board is None:
+        if not Airport.objects.filter(pk=airport_id).exists():
+            return None
+        board = build_board(kind, airport_id, date)
+        # add, not set: a board built before a flight write commits must not
+        # replace the one refresh_boards stores after the commit.
+        cache.add(key, board, settings.BOARD_CACHE_TIMEOUT)
+    return board
+
+
+def refresh_boards(boards):
+    """Rebuild the given (kind, airport_id, date) boards once the transaction commits."""
+    boards = set(boards)
+
+    def refresh():
+        for kind, airport_id, date in boards:
+            cache.set(
+                board_key(kind, airport_id, date),
+                build_board(kind, airport_id, date),
+                settings.BOARD_CACHE_TIMEOUT,
+            )
+
+    transaction.on_commit(refresh)
+
+
+def stored_flight_boards(flight_id):
+    """The boards the saved flight ``flight_id`` is listed on."""
+    flight = (
+        Flight.objects.filter(pk=flight_id)
+        .values_list("route__source_id", "route__destination_id", "departure_time", "arrival_time")
+        .first()
+    )
+    if flight is None:
+        return set()
+    source_id, destination_id, departure_time, arrival_time = flight
+    return {
+        (DEPARTURES, source_id, timezone.localtime(departure_time).date()),
+        (ARRIVALS, destination_id, timezone.localtime(arrival_time).date()),
+    }
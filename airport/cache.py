@@ -0,0 +1,104 @@
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+from rest_framework.response import Response
+
+
+# Version names mapped to a callable returning the timeout, in seconds, of a
+# version that get_versions starts, for data that expires by itself.
+VERSION_TIMEOUTS = {}
+
+
+def _version_key(model):
+    label = model if isinstance(model, str) else model._meta.label_lower
+    return f"model-version:{label}"
+
+
+def bump_version(model, timeout=None):
+    """Mark every cached value and validator that depends on ``model`` as stale.
+
+    ``model`` is a model class or the name of a version shared by several
+    models, such as airport.itineraries.SCHEDULE_VERSION. A ``timeout`` in
+    seconds drops the version when the data it stands for expires by itself,
+    and get_versions then starts a new one.
+    """
+    key = _version_key(model)
+    cache.set(key, time.time_ns(), timeout)
+    # Readers running before the commit may have stored pre-commit data under
+    # the version set above, so move on to a fresh one once the data is visible.
+    transaction.on_commit(lambda: cache.set(key, time.time_ns(), timeout))
+
+
+def get_versions(models):
+    """Return the current change version of each model, in the order given.
+
+    A version is the time of the last change in nanoseconds. Models with no
+    recorded version (first use, an evicted or an expired key) start a new one,
+    which expires after the model's VERSION_TIMEOUTS timeout if it has one.
+    """
+    models = list(models)
+    keys = [_version_key(model) for model in models]
+    versions = cache.get_many(keys)
+    for model, key in zip(models, keys):
+        if key not in versions:
+            timeout = VERSION_TIMEOUTS[model]() if model in VERSION_TIMEOUTS else None
+            cache.add(key, time.time_ns(), timeout)
+            versions[key] = cache.get(key)
+    return [versions[key] for key in keys]
+
+
+class VersionedResponseMixin:
+    """Conditional GET and response caching for reads keyed on model change versions.
+
+    ``version_models`` lists every model the response is built from. Saving or
+    deleting any of them (see airport.signals) changes the ETag and
+    Last-Modified validators and makes cached responses unreachable.
+    """
+
+    version_models = ()
+    cache_responses = True
+
+    def get_response_signature(self, request, versions):
+        query = sorted(
+            (name, value)
+            for name, values in request.query_params.lists()
+            for value in values
+        )
+        raw_key = repr((
+            request.get_host(),
+            request.path,
+            query,
+            request.accepted_renderer.format,
+            versions,
+        ))
+        return hashlib.md5(raw_key.encode()).hexdigest()
+
+    def versioned_response(self, handler, request, *args, **kwargs):
+        versions = get_versions(self.version_models)
+        signature = self.get_response_signature(request, versions)
+        etag = quote_etag(signature)
+        last_modified = max(versions, default=0) // 10 ** 9
+
+        not_modified = get_conditional_response(request, etag=etag, last_modified=last_modified)
+        if not_modified is not None:
+            return not_modified
+
+        key = f"response:{signature}"
+        data = cache.get(key) if self.cache_responses else None
+        if data is not None:
+            response = Response(data)
+        else:
+            response = handler(request, *args, **kwargs)
+            if response.status_code != 200:
+                return response
+            if self.cache_responses:
+                cache.set(key, response.data, settings.RESPONSE_CACHE_TIMEOUT)
+
+        response["ETag"] = etag
+        response["Last-Modified"] = http_date(last_modified)
+        return response
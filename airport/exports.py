@@ -0,0 +1,104 @@
+import csv
+from datetime import datetime
+
+from django.db.models import Count, F
+from django.http import StreamingHttpResponse
+from rest_framework import serializers
+
+from airport.renderers import FastJSONRenderer
+
+# Rows fetched per round trip; a server-side cursor is used on PostgreSQL,
+# so memory stays bounded by this no matter how many rows are exported.
+CHUNK_SIZE = 2000
+
+FLIGHT_COLUMNS = (
+    ("id", "id"),
+    ("route", "route_id"),
+    ("source", "route__source__name"),
+    ("destination", "route__destination__name"),
+    ("airplane", "airplane__name"),
+    ("departure_time", "departure_time"),
+    ("arrival_time", "arrival_time"),
+    ("capacity", "capacity"),
+    ("seats_sold", "seats_sold"),
+)
+
+TICKET_COLUMNS = (
+    ("id", "id"),
+    ("flight", "flight_id"),
+    ("departure_time", "flight__departure_time"),
+    ("source", "flight__route__source__name"),
+    ("destination", "flight__route__destination__name"),
+    ("row", "row"),
+    ("seat", "seat"),
+    ("order", "order_id"),
+    ("email", "order__user__email"),
+)
+
+ORDER_COLUMNS = (
+    ("id", "id"),
+    ("created_at", "created_at"),
+    ("email", "user__email"),
+    ("tickets", "tickets_count"),
+)
+
+OUTPUT_FORMATS = {
+    "ndjson": ("application/x-ndjson", "ndjson"),
+    "csv": ("text/csv", "csv"),
+}
+
+_datetime_field = serializers.DateTimeField()
+
+
+class Echo:
+    """File-like object that hands back what is written, for csv.writer."""
+
+    def write(self, value):
+        return value
+
+
+def flight_rows(queryset):
+    return queryset.annotate(
+        capacity=F("airplane__rows") * F("airplane__seats_in_row")
+    ).order_by("departure_time", "id")
+
+
+def ticket_rows(queryset):
+    return queryset.order_by("flight__departure_time", "flight_id", "row", "seat")
+
+
+def order_rows(queryset):
+    return queryset.annotate(tickets_count=Count("tickets")).order_by("created_at", "id")
+
+
+def _rows(queryset, columns, chunk_size):
+    lookups = [lookup for _, lookup in columns]
+    for row in queryset.values_list(*lookups).iterator(chunk_size=chunk_size):
+        yield [
+            _datetime_field.to_representation(value) if isinstance(value, datetime) else value
+            for value in row
+        ]
+
+
+def ndjson_lines(queryset, columns, chunk_size=CHUNK_SIZE):
+    renderer = FastJSONRenderer()
+    names = [name for name, _ in columns]
+    for row in _rows(queryset, columns, chunk_size):
+        yield renderer.render(dict(zip(names, row))) + b"\n"
+
+
+def csv_lines(queryset, columns, chunk_size=CHUNK_SIZE):
+    writer = csv.writer(Echo())
+    yield writer.writerow([name for name, _ in columns])
+    for row in _rows(queryset, columns, chunk_size):
+        yield writer.writerow(row)
+
+
+def streaming_export(queryset, columns, output, filename):
+    """Stream ``columns`` of ``queryset`` as NDJSON or CSV without building it in memory."""
+    content_type, extension = OUTPUT_FORMATS[output]
+    lines = ndjson_lines if output == "ndjson" else csv_lines
+    response = StreamingHttpResponse(lines(queryset, columns), content_type=content_type)
+    response["Content-Disposition"] = f'attachment; filename="{filename}.{extension}"'
+    return response
+
@@ -0,0 +1,239 @@
+import math
+import secrets
+import time
+from collections import Counter
+from contextlib import contextmanager
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+
+from airport.cache import bump_version, VERSION_TIMEOUTS
+from airport.models import Ticket
+
+# Change version of the seats held on any flight. Holds expire on their own,
+# so the version expires with the earliest hold still running (see
+# SeatHold.version_timeout) and every expiry starts a new one.
+SEAT_HOLDS_VERSION = "airport.seat_holds"
+
+# Expiry timestamps of the running holds, earliest first.
+HOLD_EXPIRIES_KEY = "seat-hold-expiries"
+
+# Seconds an index update waits for another one to finish before going ahead.
+INDEX_LOCK_TIMEOUT = 2
+
+
+class SeatsHeld(Exception):
+    """Raised when some of the requested seats are held by another hold."""
+
+    def __init__(self, seats):
+        super().__init__(seats)
+        self.seats = seats
+
+
+def _seat_key(flight_id, row, seat):
+    return f"seat-hold:{flight_id}:{row}:{seat}"
+
+
+def _hold_key(token):
+    return f"seat-hold-token:{token}"
+
+
+def _flight_key(flight_id):
+    return f"seat-hold-flight:{flight_id}"
+
+
+def _timeout(expires):
+    """Seconds from now until the ``expires`` timestamp, rounded up."""
+    return max(1, math.ceil(expires - time.time()))
+
+
+@contextmanager
+def _locked(key):
+    """Serialize read-modify-write updates of the cached value at ``key``."""
+    lock = f"{key}:lock"
+    deadline = time.monotonic() + INDEX_LOCK_TIMEOUT
+    while not cache.add(lock, True, INDEX_LOCK_TIMEOUT):
+        if time.monotonic() > deadline:
+            # A worker died holding the lock; it expires by itself meanwhile.
+            break
+        time.sleep(0.005)
+    try:
+        yield
+    finally:
+        cache.delete(lock)
+
+
+class SeatHold:
+    """Seats set aside for one user for ``SEAT_HOLD_TTL`` seconds.
+
+    Each held seat is a cache key claimed with ``cache.add``, so two holds can
+    never own the same seat and contention is settled before any order reaches
+    the database. Expired holds are dropped by the cache itself.
+
+    Each flight also keeps an index of its running holds (token mapped to the
+    expiry timestamp and held (row, seat) pairs), so the seats held on a flight
+    are read with one cache key rather than one per seat.
+    """
+
+    def __init__(self, token, user_id, seats, expires_at):
+        self.token = token
+        self.user_id = user_id
+        self.seats = seats
+        self.expires_at = expires_at
+
+    @classmethod
+    def create(cls, user, seats, ttl=None):
+        """Hold ``seats`` ((flight_id, row, seat) tuples) for ``user`` or raise SeatsHeld."""
+        ttl = ttl or settings.SEAT_HOLD_TTL
+        token = secrets.token_urlsafe(16)
+        owner = (token, user.id)
+
+        seats = sorted(seats)
+        claimed = []
+        for seat in seats:
+            if not cache.add(_seat_key(*seat), owner, ttl):
+                break
+            claimed.append(seat)
+
+        if len(claimed) != len(seats):
+            cache.delete_many([_seat_key(*seat) for seat in claimed])
+            # The conflicting hold may have expired meanwhile; report the seat that failed then.
+            raise SeatsHeld(sorted(cls.holders(seats)) or [seats[len(claimed)]])
+
+        hold = cls(token, user.id, list(seats), timezone.now() + timedelta(seconds=ttl))
+        cache.set(_hold_key(token), (hold.user_id, hold.seats, hold.expires_at), ttl)
+        hold._index()
+        bump_version(SEAT_HOLDS_VERSION, timeout=cls.version_timeout())
+        return hold
+
+    @classmethod
+    def get(cls, token):
+        value = cache.get(_hold_key(token))
+        if value is None:
+            return None
+        user_id, seats, expires_at = value
+        return cls(token, user_id, seats, expires_at)
+
+    def release(self):
+        holders = self.holders(self.seats)
+        owner = (self.token, self.user_id)
+        cache.delete_many(
+            [_seat_key(*seat) for seat in self.seats if holders.get(seat) == owner]
+            + [_hold_key(self.token)]
+        )
+        self._unindex()
+        bump_version(SEAT_HOLDS_VERSION, timeout=self.version_timeout())
+
+    def _seats_by_flight(self):
+        seats = {}
+        for flight_id, row, seat in self.seats:
+            seats.setdefault(flight_id, []).append((row, seat))
+        return seats
+
+    def _index(self):
+        expires = self.expires_at.timestamp()
+        for flight_id, seats in self._seats_by_flight().items():
+            key = _flight_key(flight_id)
+            with _locked(key):
+                now = time.time()
+                holds = {
+                    token: hold for token, hold in (cache.get(key) or {}).items()
+                    if hold[0] > now
+                }
+                holds[self.token] = (expires, seats)
+                cache.set(key, holds, _timeout(max(hold[0] for hold in holds.values())))
+
+        with _locked(HOLD_EXPIRIES_KEY):
+            now = time.time()
+            expiries = [expiry for expiry in cache.get(HOLD_EXPIRIES_KEY, []) if expiry > now]
+            expiries = sorted(expiries + [expires])
+            cache.set(HOLD_EXPIRIES_KEY, expiries, _timeout(expiries[-1]))
+
+    def _unindex(self):
+        for flight_id in self._seats_by_flight():
+            key = _flight_key(flight_id)
+            with _locked(key):
+                now = time.time()
+                holds = {
+                    token: hold for token, hold in (cache.get(key) or {}).items()
+                    if hold[0] > now and token != self.token
+                }
+                if holds:
+                    cache.set(key, holds, _timeout(max(hold[0] for hold in holds.values())))
+                else:
+                    cache.delete(key)
+
+    @staticmethod
+    def version_timeout():
+        """Seconds until the earliest running hold expires, or None without holds.
+
+        A released hold keeps its expiry here, which only changes the version
+        once more than needed.
+        """
+        now = time.time()
+        expiries = [expiry for expiry in cache.get(HOLD_EXPIRIES_KEY, []) if expiry > now]
+        return _timeout(expiries[0]) if expiries else None
+
+    @staticmethod
+    def holders(seats):
+        """Map each held seat of ``seats`` to its (token, user_id) owner."""
+        keys = {_seat_key(*seat): seat for seat in seats}
+        return {keys[key]: owner for key, owner in cache.get_many(keys).items()}
+
+    @classmethod
+    def held_by_others(cls, seats, user):
+        return sorted(
+            seat for seat, (_, user_id) in cls.holders(seats).items()
+            if user_id != getattr(user, "id", None)
+        )
+
+    @staticmethod
+    def _running(keys, indexes):
+        now = time.time()
+        return {
+            (keys[key], row, seat)
+            for key, holds in indexes.items()
+            for expires, seats in holds.values() if expires > now
+            for row, seat in seats
+        }
+
+    @classmethod
+    def held_seats(cls, flight_ids):
+        """Return the (flight_id, row, seat) triples held on ``flight_ids``.
+
+        One cache key is read per flight, whatever the size of its airplane.
+        """
+        keys = {_flight_key(flight_id): flight_id for flight_id in flight_ids}
+        return cls._running(keys, cache.get_many(keys))
+
+    @classmethod
+    def held_on_flight(cls, flight_id):
+        return cls.held_seats([flight_id])
+
+    @classmethod
+    def held_counts(cls, flight_ids):
+        """Map flight ids to how many of their seats are held and not sold yet.
+
+        Held seats are checked against the sold ones with one query when
+        anything is held at all.
+        """
+        held = cls.held_seats(flight_ids)
+        held -= Ticket.taken_seats(held)
+        return Counter(flight_id for flight_id, _, _ in held)
+
+    @classmethod
+    async def aheld_counts(cls, flight_ids):
+        """Async twin of ``held_counts``."""
+        keys = {_flight_key(flight_id): flight_id for flight_id in flight_ids}
+        held = cls._running(keys, await cache.aget_many(keys))
+        held -= await Ticket.ataken_seats(held)
+        return Counter(flight_id for flight_id, _, _ in held)
+
+    @staticmethod
+    def format_seats(seats):
+        return [f"Seat {row}: {seat} on flight {flight_id} is on hold" for flight_id, row, seat in seats]
+
+
+VERSION_TIMEOUTS[SEAT_HOLDS_VERSION] = SeatHold.version_timeout
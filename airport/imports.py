@@ -0,0 +1,351 @@
+import csv
+import json
+import time
+from bisect import bisect_left, insort
+from itertools import islice
+
+from django.db import transaction
+from rest_framework import serializers
+
+from airport.boards import BOARDS_VERSION
+from airport.cache import bump_version
+from airport.intervals import airplane_schedule, crew_roster
+from airport.itineraries import SCHEDULE_VERSION
+from airport.models import Route, Airplane, Crew, Flight
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson is an optional speed-up
+    orjson = None
+
+# Rows validated and inserted per transaction.
+CHUNK_SIZE = 1000
+
+# Import format -> content type of the request body.
+IMPORT_FORMATS = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv",
+}
+
+# Crews of a CSV row are separated by this in the "crews" column.
+CREW_SEPARATOR = ";"
+
+# Stands for bytes that are not valid UTF-8, see decode_lines.
+_UNDECODABLE = "\ufffd"
+
+_AMBIGUOUS = object()
+_datetime_field = serializers.DateTimeField()
+
+
+def decode_lines(lines, encoding="utf-8"):
+    """Decode byte ``lines`` one by one, replacing undecodable bytes with U+FFFD.
+
+    Records holding a replacement character are then rejected one by one by
+    ScheduleImporter.validate instead of failing the whole import.
+    """
+    for line in lines:
+        yield line.decode(encoding, errors="replace")
+
+
+def csv_records(lines):
+    """Yield ``(line number, record)`` from CSV text lines with a header row."""
+    reader = csv.DictReader(lines)
+    for record in reader:
+        crews = record.get("crews") or ""
+        record["crews"] = [crew.strip() for crew in crews.split(CREW_SEPARATOR) if crew.strip()]
+        yield reader.line_num, record
+
+
+def ndjson_records(lines):
+    """Yield ``(line number, record)`` from NDJSON lines; broken lines yield ``None``."""
+    loads = orjson.loads if orjson is not None else json.loads
+    for line_number, line in enumerate(lines, 1):
+        if not line.strip():
+            continue
+        try:
+            record = loads(line)
+        except ValueError:
+            record = None
+        yield line_number, record if isinstance(record, dict) else None
+
+
+RECORD_READERS = {
+    "ndjson": ndjson_records,
+    "csv": csv_records,
+}
+
+
+def _by_name(items):
+    names = {}
+    for item_id, name in items:
+        names[name] = _AMBIGUOUS if name in names else item_id
+    return names
+
+
+class ImportStats:
+    def __init__(self, max_errors=None):
+        self.rows = 0
+        self.created = 0
+        self.existing = 0
+        self.invalid = 0
+        self.errors = []
+        self.max_errors = max_errors
+        self.started = time.perf_counter()
+
+    def add_error(self, line, message):
+        self.invalid += 1
+        if self.max_errors is None or len(self.errors) < self.max_errors:
+            self.errors.append({"line": line, "error": message})
+
+    @property
+    def elapsed(self):
+        return time.perf_counter() - self.started
+
+    @property
+    def rate(self):
+        return self.rows / self.elapsed if self.elapsed else 0.0
+
+    def as_dict(self):
+        return {
+            "rows": self.rows,
+            "created": self.created,
+            "existing": self.existing,
+            "invalid": self.invalid,
+            "errors": self.errors,
+        }
+
+
+class ScheduleImporter:
+    """Bulk-insert flights from schedule records.
+
+    Each record names a route (``route`` id, or ``source`` and ``destination``
+    airport names), an ``airplane`` (name or id), ``departure_time``,
+    ``arrival_time`` and optional ``crews`` (full names or ids). Routes,
+    airplanes and crews are resolved from maps loaded once, and every chunk
+    is checked against the database in one query before it is inserted.
+
+    A flight is identified by route, airplane and departure time: flights
+    that already exist are counted and skipped, so re-importing a schedule
+    is a no-op. Invalid records, including flights whose airplane or crew is
+    already in the air at that time, are reported and skipped.
+    """
+
+    def __init__(self, chunk_size=CHUNK_SIZE, max_errors=None, progress=None):
+        self.chunk_size = chunk_size
+        self.progress = progress
+        self.stats = ImportStats(max_errors)
+        # airplane id -> (IntervalIndex of its flights before the import, imported intervals)
+        self.airplane_flights = {}
+        # crew id -> (IntervalIndex of their flights before the import, imported intervals)
+        self.crew_flights = {}
+        # airplane or crew id -> their FlightSchedules, see FlightIntervals.schedules
+        self.airplane_schedules = {}
+        self.crew_schedules = {}
+
+        self.route_ids = set(Route.objects.values_list("id", flat=True))
+        self.routes_by_airports = _by_name(
+            (route_id, (source, destination))
+            for route_id, source, destination in Route.objects.values_list(
+                "id", "source__name", "destination__name"
+            )
+        )
+        self.airplane_ids = set(Airplane.objects.values_list("id", flat=True))
+        self.airplanes_by_name = _by_name(Airplane.objects.values_list("id", "name"))
+        self.crew_ids = set(Crew.objects.values_list("id", flat=True))
+        self.crews_by_name = _by_name(
+            (crew_id, f"{first_name} {last_name}")
+            for crew_id, first_name, last_name in Crew.objects.values_list("id", "first_name", "last_name")
+        )
+
+    @staticmethod
+    def _resolve(value, ids, by_name, label):
+        if isinstance(value, str):
+            value = value.strip()
+        resolved = by_name.get(value) if isinstance(value, str) else None
+        if resolved is _AMBIGUOUS:
+            raise ValueError(f"{label} {value!r} is ambiguous, use its id")
+        if resolved is not None:
+            return resolved
+        if isinstance(value, int) or (isinstance(value, str) and value.isdigit()):
+            if int(value) in ids:
+                return int(value)
+        raise ValueError(f"Unknown {label} {value!r}")
+
+    def resolve_route(self, record):
+        route = record.get("route")
+        if route not in (None, ""):
+            return self._resolve(route, self.route_ids, {}, "route")
+        source, destination = record.get("source"), record.get("destination")
+        if not source or not destination:
+            raise ValueError("Either route or source and destination are required")
+        route_id = self.routes_by_airports.get((str(source).strip(), str(destination).strip()))
+        if route_id is _AMBIGUOUS:
+            raise ValueError(f"Route {source} -> {destination} is ambiguous, use its id")
+        if route_id is None:
+            raise ValueError(f"Unknown route {source} -> {destination}")
+        return route_id
+
+    @staticmethod
+    def parse_time(record, field):
+        value = record.get(field)
+        if value in (None, ""):
+            raise ValueError(f"{field} is required")
+        try:
+            return _datetime_field.run_validation(value)
+        except serializers.ValidationError as error:
+            raise ValueError(f"{field}: {' '.join(error.detail)}")
+
+    def validate(self, record):
+        """Return ``(route_id, airplane_id, departure_time, arrival_time, crew_ids)``."""
+        if record is None:
+            raise ValueError("Not a JSON object")
+        crews = record.get("crews") or []
+        if not isinstance(crews, list):
+            raise ValueError("crews must be a list")
+        if any(_UNDECODABLE in value for value in (*record.values(), *crews) if isinstance(value, str)):
+            raise ValueError("Not valid UTF-8")
+        route_id = self.resolve_route(record)
+        airplane = record.get("airplane")
+        if airplane in (None, ""):
+            raise ValueError("airplane is required")
+        airplane_id = self._resolve(airplane, self.airplane_ids, self.airplanes_by_name, "airplane")
+        departure_time = self.parse_time(record, "departure_time")
+        arrival_time = self.parse_time(record, "arrival_time")
+        if arrival_time <= departure_time:
+            raise ValueError("arrival_time must be after departure_time")
+        crew_ids = {self._resolve(crew, self.crew_ids, self.crews_by_name, "crew") for crew in crews}
+        return route_id, airplane_id, departure_time, arrival_time, crew_ids
+
+    def run(self, records):
+        """Import ``(line number, record)`` pairs and return the ImportStats."""
+        records = iter(records)
+        while chunk := list(islice(records, self.chunk_size)):
+            self.import_chunk(chunk)
+            if self.progress:
+                self.progress(self.stats)
+        return self.stats
+
+    @staticmethod
+    def _overlap(flights, departure_time, arrival_time):
+        """Return ``(flight id, line)`` of a flight overlapping these times, one of them None, or None.
+
+        Flights in the database are checked through an IntervalIndex loaded once
+        per airplane or crew member, and flights of this import through a sorted
+        list kept free of overlaps, so each check costs a couple of bisections.
+        """
+        existing, imported = flights
+        overlapping = existing.overlapping(departure_time, arrival_time)
+        if overlapping:
+            return overlapping[0][2], None
+
+        # Imported intervals never overlap, so only the neighbours of the new one can.
+        index = bisect_left(imported, (departure_time,))
+        for start, end, line in imported[max(index - 1, 0):index + 1]:
+            if start < arrival_time and end > departure_time:
+                return None, line
+        return None
+
+    @staticmethod
+    def _scheduled_overlap(intervals, schedules, key, departure_time, arrival_time):
+        """Return ``(occurrence id, None)`` of a schedule occurrence with no Flight yet at these times, or None."""
+        scheduled = intervals.scheduled([key], departure_time, arrival_time, schedules=schedules)
+        return (scheduled[key][0][2], None) if scheduled else None
+
+    def airplane_conflict(self, airplane_id, departure_time, arrival_time):
+        """Describe what the airplane already flies at these times, or return None."""
+        overlap = self._overlap(
+            self.airplane_flights[airplane_id], departure_time, arrival_time
+        ) or self._scheduled_overlap(
+            airplane_schedule, self.airplane_schedules, airplane_id, departure_time, arrival_time
+        )
+        if overlap is None:
+            return None
+        flight_id, line = overlap
+        if flight_id is not None:
+            return f"Airplane {airplane_id} already flies flight {flight_id} at that time"
+        return f"Airplane {airplane_id} already flies the flight on line {line} at that time"
+
+    def crew_conflict(self, crew_ids, departure_time, arrival_time):
+        """Describe the first flight a crew member is already on at these times, or return None."""
+        for crew_id in sorted(crew_ids):
+            overlap = self._overlap(
+                self.crew_flights[crew_id], departure_time, arrival_time
+            ) or self._scheduled_overlap(crew_roster, self.crew_schedules, crew_id, departure_time, arrival_time)
+            if overlap is None:
+                continue
+            flight_id, line = overlap
+            if flight_id is not None:
+                return f"Crew {crew_id} is already on flight {flight_id} at that time"
+            return f"Crew {crew_id} is already on the flight on line {line} at that time"
+        return None
+
+    def import_chunk(self, chunk):
+        flights = []
+        for line, record in chunk:
+            self.stats.rows += 1
+            try:
+                flights.append((line, self.validate(record)))
+            except ValueError as error:
+                self.stats.add_error(line, str(error))
+
+        if not flights:
+            return
+
+        missing = {flight[1] for _, flight in flights} - set(self.airplane_flights)
+        if missing:
+            for airplane_id, index in airplane_schedule.load(missing).items():
+                self.airplane_flights[airplane_id] = (index, [])
+        missing = {crew_id for _, flight in flights for crew_id in flight[4]} - set(self.crew_flights)
+        if missing:
+            for crew_id, index in crew_roster.load(missing).items():
+                self.crew_flights[crew_id] = (index, [])
+        # Schedule occurrences with no Flight yet are busy too (see FlightIntervals.scheduled).
+        self.airplane_schedules = airplane_schedule.schedules({flight[1] for _, flight in flights})
+        self.crew_schedules = crew_roster.schedules({crew_id for _, flight in flights for crew_id in flight[4]})
+
+        with transaction.atomic():
+            existing = set(
+                Flight.objects.filter(
+                    airplane_id__in={flight[1] for _, flight in flights},
+                    departure_time__in={flight[2] for _, flight in flights},
+                ).values_list("route_id", "airplane_id", "departure_time")
+            )
+            new_flights = []
+            for line, flight in flights:
+                key = flight[:3]
+                if key in existing:
+                    self.stats.existing += 1
+                    continue
+                route_id, airplane_id, departure_time, arrival_time, crew_ids = flight
+                conflict = (
+                    self.airplane_conflict(airplane_id, departure_time, arrival_time)
+                    or self.crew_conflict(crew_ids, departure_time, arrival_time)
+                )
+                if conflict:
+                    self.stats.add_error(line, conflict)
+                    continue
+                # Earlier chunks are committed, so only repeats within this chunk are left.
+                existing.add(key)
+                insort(self.airplane_flights[airplane_id][1], (departure_time, arrival_time, line))
+                for crew_id in crew_ids:
+                    insort(self.crew_flights[crew_id][1], (departure_time, arrival_time, line))
+                new_flights.append(flight)
+
+            created = Flight.objects.bulk_create(
+                Flight(route_id=route_id, airplane_id=airplane_id, departure_time=departure, arrival_time=arrival)
+                for route_id, airplane_id, departure, arrival, _ in new_flights
+            )
+            Flight.crews.through.objects.bulk_create(
+                Flight.crews.through(flight_id=flight.id, crew_id=crew_id)
+                for flight, (*_, crew_ids) in zip(created, new_flights)
+                for crew_id in crew_ids
+            )
+        self.stats.created += len(created)
+
+        # bulk_create skips the signals that keep cached data fresh.
+        if created:
+            bump_version(Flight)
+            bump_version(SCHEDULE_VERSION)
+            bump_version(BOARDS_VERSION)
+            airplane_schedule.bump(airplane_id for _, airplane_id, *_ in new_flights)
+            crew_roster.bump(crew_id for *_, crew_ids in new_flights for crew_id in crew_ids)
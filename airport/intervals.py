@@ -0,0 +1,219 @@
+import heapq
+import threading
+from bisect import bisect_left
+
+from django.utils import timezone
+
+from airport.cache import get_versions, bump_version
+from airport.models import Flight, FlightSchedule
+
+# Prefixes of the change versions of each crew member's and airplane's flights (see airport.signals).
+CREW_ROSTER_VERSION = "airport.crew_roster"
+AIRPLANE_SCHEDULE_VERSION = "airport.airplane_schedule"
+
+
+class IntervalIndex:
+    """Half-open ``[start, end)`` intervals sorted by start, for overlap queries.
+
+    ``max_ends[i]`` is the latest end among the first ``i + 1`` intervals, so
+    whether anything overlaps a new interval is answered with one bisection.
+    """
+
+    def __init__(self, intervals):
+        self.intervals = sorted(intervals, key=lambda interval: (interval[0], interval[1]))
+        self.starts = [interval[0] for interval in self.intervals]
+        self.max_ends = []
+        for _, end, *_ in self.intervals:
+            self.max_ends.append(max(end, self.max_ends[-1]) if self.max_ends else end)
+
+    def __len__(self):
+        return len(self.intervals)
+
+    def overlaps(self, start, end):
+        """Whether any interval overlaps ``[start, end)``, in O(log n)."""
+        index = bisect_left(self.starts, end)
+        return index > 0 and self.max_ends[index - 1] > start
+
+    def overlapping(self, start, end):
+        """The intervals overlapping ``[start, end)``, ordered by start.
+
+        Walks back from the last interval starting before ``end`` and stops as
+        soon as no earlier interval can reach ``start``.
+        """
+        index = bisect_left(self.starts, end) - 1
+        found = []
+        while index >= 0 and self.max_ends[index] > start:
+            if self.intervals[index][1] > start:
+                found.append(self.intervals[index])
+            index -= 1
+        return found[::-1]
+
+
+def overlapping_pairs(intervals):
+    """Yield every pair of overlapping ``[start, end)`` intervals, by sweeping over their starts.
+
+    Intervals still in the air are kept in a heap ordered by end, so the sweep
+    takes O(n log n) plus the number of pairs instead of comparing all pairs.
+    """
+    active = []
+    for interval in sorted(intervals, key=lambda interval: (interval[0], interval[1])):
+        while active and active[0][0] <= interval[0]:
+            heapq.heappop(active)
+        for _, _, other in active:
+            yield other, interval
+        heapq.heappush(active, (interval[1], id(interval), interval))
+
+
+class FlightIntervals:
+    """Per-process IntervalIndex of the flights of each crew member or airplane.
+
+    ``key_lookup`` is the Flight lookup the flights are grouped by. An index is
+    loaded the first time it is needed and kept until ``version`` changes, so
+    checking a new flight is a bisection instead of a query over every flight
+    of that crew member or airplane. Intervals are ``(departure_time,
+    arrival_time, flight_id, source name, destination name)``.
+
+    Each key has its own version, so a flight change only reloads the indexes
+    of its crew or airplane instead of every index of the process.
+
+    Conflicts also cover the FlightSchedule occurrences that have no Flight
+    yet, from the schedules of each key kept until FlightSchedule changes.
+    Their flight id is the occurrence id.
+    """
+
+    def __init__(self, key_lookup, version):
+        self.key_lookup = key_lookup
+        self.version = version
+        self._lock = threading.Lock()
+        self._versions = {}
+        self._indexes = {}
+        self._schedules_version = None
+        self._schedules = {}
+
+    def key_version(self, key):
+        return f"{self.version}:{key}"
+
+    def bump(self, keys):
+        """Mark the indexes of ``keys`` as stale, after their flights changed."""
+        for key in set(keys):
+            bump_version(self.key_version(key))
+
+    def load(self, keys):
+        intervals = {key: [] for key in keys}
+        rows = (
+            Flight.objects.filter(**{f"{self.key_lookup}__in": keys})
+            .order_by()
+            .values_list(
+                self.key_lookup, "departure_time", "arrival_time", "id",
+                "route__source__name", "route__destination__name",
+            )
+        )
+        for key, *interval in rows:
+            intervals[key].append(tuple(interval))
+        return {key: IntervalIndex(key_intervals) for key, key_intervals in intervals.items()}
+
+    def get(self, keys):
+        """Return ``{key: IntervalIndex}`` for ``keys``."""
+        keys = list(keys)
+        versions = dict(zip(keys, get_versions([self.key_version(key) for key in keys])))
+        with self._lock:
+            stale = {key for key in keys if self._versions.get(key) != versions[key]}
+            if stale:
+                self._indexes.update(self.load(stale))
+                self._versions.update((key, versions[key]) for key in stale)
+            return {key: self._indexes[key] for key in keys}
+
+    def load_schedules(self):
+        schedules = {}
+        rows = FlightSchedule.objects.order_by().values_list(
+            self.key_lookup, "id", "weekdays", "departure_time", "duration", "valid_from", "valid_until",
+            "route__source__name", "route__destination__name",
+        )
+        for key, pk, weekdays, departure_time, duration, valid_from, valid_until, source, destination in rows:
+            schedule = FlightSchedule(
+                pk=pk,
+                weekdays=weekdays,
+                departure_time=departure_time,
+                duration=duration,
+                valid_from=valid_from,
+                valid_until=valid_until,
+            )
+            schedules.setdefault(key, []).append((schedule, source, destination))
+        return schedules
+
+    def schedules(self, keys):
+        """Return ``{key: [(FlightSchedule, source name, destination name), ...]}`` for ``keys``."""
+        (version,) = get_versions((FlightSchedule,))
+        with self._lock:
+            if self._schedules_version != version:
+                self._schedules = self.load_schedules()
+                self._schedules_version = version
+            return {key: self._schedules.get(key, []) for key in keys}
+
+    def scheduled(self, keys, start, end, exclude_schedule=None, schedules=None):
+        """Return ``{key: [interval, ...]}`` of schedule occurrences with no Flight yet overlapping ``[start, end)``.
+
+        ``schedules`` are the ones returned by ``schedules(keys)``, when the
+        caller already has them.
+        """
+        if schedules is None:
+            schedules = self.schedules(keys)
+        candidates = {}
+        for key in keys:
+            for schedule, source, destination in schedules.get(key, ()):
+                if schedule.pk == exclude_schedule:
+                    continue
+                for date, departure_time, arrival_time in schedule.occurrences_between(start, end):
+                    interval = (
+                        departure_time, arrival_time, FlightSchedule.occurrence_id(schedule.pk, date),
+                        source, destination,
+                    )
+                    candidates.setdefault((schedule.pk, date), []).append((key, interval))
+        if not candidates:
+            return {}
+
+        # An occurrence is materialized once its schedule has a Flight that day,
+        # as in FlightViewSet.with_schedule_occurrences.
+        materialized = FlightSchedule.materialized(candidates)
+        scheduled = {}
+        for occurrence, intervals in candidates.items():
+            if occurrence not in materialized:
+                for key, interval in intervals:
+                    scheduled.setdefault(key, []).append(interval)
+        for intervals in scheduled.values():
+            intervals.sort(key=lambda interval: (interval[0], interval[1]))
+        return scheduled
+
+    def conflicts(self, keys, departure_time, arrival_time, exclude_flight=None, exclude_schedule=None):
+        """Return ``{key: [interval, ...]}`` of flights and schedule occurrences overlapping the given times."""
+        conflicts = {}
+        for key, index in self.get(keys).items():
+            if not index.overlaps(departure_time, arrival_time):
+                continue
+            overlapping = [
+                interval for interval in index.overlapping(departure_time, arrival_time)
+                if interval[2] != exclude_flight
+            ]
+            if overlapping:
+                conflicts[key] = overlapping
+        for key, intervals in self.scheduled(keys, departure_time, arrival_time, exclude_schedule).items():
+            conflicts.setdefault(key, []).extend(intervals)
+        return conflicts
+
+
+def conflict_messages(names, conflicts, doing):
+    """Describe ``conflicts`` of ``FlightIntervals.conflicts`` for people, ``names`` being ``{key: name}``.
+
+    ``doing`` completes the name, e.g. "already flies" gives "Dreamliner
+    already flies flight 4 from 2025-10-08 08:30 to 2025-10-08 10:30".
+    """
+    return [
+        f"{name} {doing} flight {flight_id} from "
+        f"{timezone.localtime(departure):%Y-%m-%d %H:%M} to {timezone.localtime(arrival):%Y-%m-%d %H:%M}"
+        for key, name in names.items()
+        for departure, arrival, flight_id, *_ in conflicts.get(key, [])
+    ]
+
+
+crew_roster = FlightIntervals("crews__id", CREW_ROSTER_VERSION)
+airplane_schedule = FlightIntervals("airplane_id", AIRPLANE_SCHEDULE_VERSION)
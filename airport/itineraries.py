@@ -0,0 +1,199 @@
+import heapq
+import threading
+from bisect import bisect_left
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import F
+from django.utils import timezone
+
+from airport.cache import get_versions
+from airport.models import Airport, Flight, FlightSchedule, SEATS_SOLD_VERSION
+
+# Change version of everything FlightGraph is built from (see airport.signals).
+# Seat sales bump SEATS_SOLD_VERSION instead, so they only refresh availability.
+SCHEDULE_VERSION = "airport.schedule"
+
+
+class Leg:
+    __slots__ = (
+        "flight_id", "source_id", "destination_id", "departure_time", "arrival_time", "rows", "seats_in_row"
+    )
+
+    def __init__(self, flight_id, source_id, destination_id, departure_time, arrival_time, rows, seats_in_row):
+        self.flight_id = flight_id
+        self.source_id = source_id
+        self.destination_id = destination_id
+        self.departure_time = departure_time
+        self.arrival_time = arrival_time
+        # Airplane layout, to look up the seats on hold.
+        self.rows = rows
+        self.seats_in_row = seats_in_row
+
+
+class FlightGraph:
+    """Airports as nodes and upcoming flights as timed edges, for itinerary search.
+
+    Departures of each airport are kept sorted by departure time, so the
+    flights that can be caught after a connection are found by bisection.
+    Schedule occurrences with no Flight yet within ITINERARY_SCHEDULE_DAYS are
+    legs too, under their occurrence id; ``scheduled_seats`` holds their seats.
+    """
+
+    def __init__(self, legs, airports, since, scheduled_seats=None):
+        self.airports = airports
+        self.since = since
+        self.scheduled_seats = scheduled_seats or {}
+        self.departures = {}
+        # Occurrence ids are strings, so ties are broken on the id's text.
+        for leg in sorted(legs, key=lambda leg: (leg.departure_time, str(leg.flight_id))):
+            self.departures.setdefault(leg.source_id, []).append(leg)
+        self.departure_times = {
+            airport_id: [leg.departure_time for leg in legs]
+            for airport_id, legs in self.departures.items()
+        }
+
+    @staticmethod
+    def scheduled_legs(since, until):
+        """Legs of the schedule occurrences with no Flight yet departing in ``[since, until)``."""
+        schedules = FlightSchedule.objects.filter(
+            valid_from__lte=until.date(), valid_until__gte=since.date()
+        ).select_related("route", "airplane")
+
+        occurrences = {}
+        for schedule in schedules:
+            for date, departure_time, arrival_time in schedule.occurrences_between(since, until):
+                if departure_time < since:
+                    continue
+                occurrences[schedule.pk, date] = Leg(
+                    FlightSchedule.occurrence_id(schedule.pk, date),
+                    schedule.route.source_id,
+                    schedule.route.destination_id,
+                    departure_time,
+                    arrival_time,
+                    schedule.airplane.rows,
+                    schedule.airplane.seats_in_row,
+                )
+        materialized = FlightSchedule.materialized(occurrences)
+        return [leg for occurrence, leg in occurrences.items() if occurrence not in materialized]
+
+    @classmethod
+    def build(cls, since):
+        scheduled = cls.scheduled_legs(since, since + timedelta(days=settings.ITINERARY_SCHEDULE_DAYS))
+        legs = scheduled + [
+            Leg(*row)
+            for row in Flight.objects.filter(departure_time__gte=since)
+            .order_by()
+            .values_list(
+                "id", "route__source_id", "route__destination_id", "departure_time", "arrival_time",
+                "airplane__rows", "airplane__seats_in_row",
+            )
+            .iterator(chunk_size=5000)
+        ]
+        airports = {
+            airport_id: {"id": airport_id, "name": name, "closest_big_city": city}
+            for airport_id, name, city in Airport.objects.values_list("id", "name", "closest_big_city")
+        }
+        scheduled_seats = {leg.flight_id: leg.rows * leg.seats_in_row for leg in scheduled}
+        return cls(legs, airports, since, scheduled_seats)
+
+    def departures_between(self, airport_id, earliest, latest):
+        times = self.departure_times.get(airport_id, [])
+        legs = self.departures.get(airport_id, [])
+        index = bisect_left(times, earliest)
+        while index < len(legs) and legs[index].departure_time <= latest:
+            yield legs[index]
+            index += 1
+
+    def search(self, source_id, destination_id, departure_after, departure_before, available,
+               tickets=1, limit=5, max_legs=3):
+        """Return up to ``limit`` itineraries (lists of legs) ordered by arrival time.
+
+        A time-dependent Dijkstra where an airport may be settled ``limit`` times,
+        which yields the ``limit`` earliest arrivals. Connections need
+        ITINERARY_MIN_CONNECTION_MINUTES and at most ITINERARY_MAX_LAYOVER_HOURS,
+        airports are not revisited and every leg needs ``tickets`` free seats.
+        """
+        min_connection = timedelta(minutes=settings.ITINERARY_MIN_CONNECTION_MINUTES)
+        max_layover = timedelta(hours=settings.ITINERARY_MAX_LAYOVER_HOURS)
+
+        queue = []
+        counter = 0
+        for leg in self.departures_between(source_id, departure_after, departure_before):
+            if available.get(leg.flight_id, 0) >= tickets:
+                heapq.heappush(queue, (leg.arrival_time, 1, counter, (leg,)))
+                counter += 1
+
+        settled = {}
+        itineraries = []
+        while queue and len(itineraries) < limit:
+            arrival_time, legs_count, _, path = heapq.heappop(queue)
+            airport_id = path[-1].destination_id
+            if airport_id == destination_id:
+                itineraries.append(list(path))
+                continue
+
+            settled[airport_id] = settled.get(airport_id, 0) + 1
+            if settled[airport_id] > limit or legs_count >= max_legs:
+                continue
+
+            visited = {path[0].source_id, *(leg.destination_id for leg in path)}
+            for leg in self.departures_between(
+                airport_id, arrival_time + min_connection, arrival_time + max_layover
+            ):
+                if leg.destination_id in visited or available.get(leg.flight_id, 0) < tickets:
+                    continue
+                heapq.heappush(queue, (leg.arrival_time, legs_count + 1, counter, path + (leg,)))
+                counter += 1
+
+        return itineraries
+
+
+class ItineraryIndex:
+    """Per-process FlightGraph plus seat availability, rebuilt when their versions change.
+
+    The graph follows SCHEDULE_VERSION and availability SEATS_SOLD_VERSION, so
+    bookings reload the seats sold and never the graph.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._graph = None
+        self._graph_version = None
+        self._available = None
+        self._available_version = None
+
+    @staticmethod
+    def load_available(graph):
+        """Free seats by flight id; schedule occurrences have nothing sold yet."""
+        available = dict(graph.scheduled_seats)
+        available.update(
+            Flight.objects.filter(departure_time__gte=graph.since)
+            .order_by()
+            .values_list("id", F("airplane__rows") * F("airplane__seats_in_row") - F("seats_sold"))
+            .iterator(chunk_size=5000)
+        )
+        return available
+
+    def get(self):
+        """Return the current (graph, available seats by flight id)."""
+        schedule_version, seats_sold_version = get_versions((SCHEDULE_VERSION, SEATS_SOLD_VERSION))
+        # Flights that left before today are dropped once a day.
+        since = timezone.localtime().replace(hour=0, minute=0, second=0, microsecond=0)
+
+        with self._lock:
+            if (
+                self._graph is None
+                or self._graph_version != schedule_version
+                or self._graph.since != since
+            ):
+                self._graph = FlightGraph.build(since)
+                self._graph_version = schedule_version
+                self._available_version = None
+            if self._available_version != seats_sold_version:
+                self._available = self.load_available(self._graph)
+                self._available_version = seats_sold_version
+            return self._graph, self._available
+
+
+itinerary_index = ItineraryIndex()
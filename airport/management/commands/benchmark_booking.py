@@ -0,0 +1,118 @@
+import random
+import statistics
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+
+from django.contrib.auth import get_user_model
+from django.core.management import BaseCommand, CommandError
+from django.db import connection
+from rest_framework import serializers
+
+from airport.models import Flight, Order
+from airport.serializers import OrderSerializer, BookingConflict
+
+
+class Command(BaseCommand):
+    help = (
+        "Books overlapping seats on one flight from concurrent threads through "
+        "OrderSerializer and reports throughput, conflict rate and latency"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--flight", type=int, required=True, help="Flight to book seats on")
+        parser.add_argument("--email", required=True, help="User the orders are booked for")
+        parser.add_argument("--workers", type=int, default=16, help="Concurrent booking threads")
+        parser.add_argument("--requests", type=int, default=50, help="Bookings per worker")
+        parser.add_argument("--tickets", type=int, default=2, help="Seats per order")
+        parser.add_argument(
+            "--hot-rows",
+            type=int,
+            default=3,
+            help="Only book seats in the first N rows, to force overlapping requests",
+        )
+        parser.add_argument("--keep", action="store_true", help="Keep the booked orders")
+        parser.add_argument("--seed", type=int)
+
+    def book(self, user, flight, seats):
+        serializer = OrderSerializer(
+            data={"tickets": [{"row": row, "seat": seat, "flight": flight.id} for row, seat in seats]},
+            context={"request": SimpleNamespace(user=user)},
+        )
+        started = time.perf_counter()
+        try:
+            if serializer.is_valid():
+                serializer.save(user=user)
+                outcome = "booked"
+            else:
+                outcome = "conflict"
+        except serializers.ValidationError:
+            # Lost the race between validation and the locked re-check.
+            outcome = "conflict"
+        except BookingConflict:
+            outcome = "retries exhausted"
+        except Exception:
+            outcome = "error"
+        return outcome, (time.perf_counter() - started) * 1000
+
+    def run_worker(self, user, flight, options, seed):
+        rng = random.Random(seed)
+        hot_seats = [
+            (row, seat)
+            for row in range(1, min(options["hot_rows"], flight.airplane.rows) + 1)
+            for seat in range(1, flight.airplane.seats_in_row + 1)
+        ]
+        try:
+            return [
+                self.book(user, flight, rng.sample(hot_seats, min(options["tickets"], len(hot_seats))))
+                for _ in range(options["requests"])
+            ]
+        finally:
+            connection.close()
+
+    def handle(self, *args, **options):
+        try:
+            flight = Flight.objects.select_related("airplane").get(pk=options["flight"])
+            user = get_user_model().objects.get(email=options["email"])
+        except (Flight.DoesNotExist, get_user_model().DoesNotExist) as error:
+            raise CommandError(str(error))
+
+        seed = options["seed"] if options["seed"] is not None else random.randrange(10 ** 6)
+        orders_before = set(Order.objects.filter(user=user).values_list("id", flat=True))
+        tickets_before = flight.tickets.count()
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=options["workers"]) as executor:
+            results = [
+                result
+                for worker in executor.map(
+                    lambda index: self.run_worker(user, flight, options, seed + index),
+                    range(options["workers"]),
+                )
+                for result in worker
+            ]
+        elapsed = time.perf_counter() - started
+
+        outcomes = Counter(outcome for outcome, _ in results)
+        latencies = sorted(latency for _, latency in results)
+        self.stdout.write(
+            f"{len(results)} bookings from {options['workers']} workers in {elapsed:.2f}s (seed {seed})"
+        )
+        self.stdout.write(f"throughput        {len(results) / elapsed:.1f} req/s")
+        for outcome in ("booked", "conflict", "retries exhausted", "error"):
+            self.stdout.write(f"{outcome:<18}{outcomes[outcome]} ({outcomes[outcome] / len(results):.1%})")
+        self.stdout.write(
+            f"latency ms        p50 {statistics.median(latencies):.2f}  "
+            f"p99 {latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))]:.2f}"
+        )
+
+        seats_sold = flight.seats_sold
+        flight.refresh_from_db()
+        tickets = flight.tickets.count() - tickets_before
+        self.stdout.write(f"tickets           {tickets} sold, seats_sold +{flight.seats_sold - seats_sold}")
+        if tickets != outcomes["booked"] * options["tickets"] or flight.seats_sold - seats_sold != tickets:
+            self.stderr.write("Sold tickets do not match the successful bookings")
+
+        if not options["keep"]:
+            Order.objects.filter(user=user).exclude(id__in=orders_before).delete()
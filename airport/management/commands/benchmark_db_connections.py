@@ -0,0 +1,74 @@
+import statistics
+import time
+from copy import deepcopy
+
+from django.core.management import BaseCommand
+from django.db import connections
+
+MODES = ("fresh", "persistent", "pooled")
+
+
+class Command(BaseCommand):
+    help = (
+        "Measures per-request database latency with a new connection per request, "
+        "persistent connections and psycopg's connection pool"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--requests", type=int, default=200)
+        parser.add_argument("--modes", nargs="+", choices=MODES, default=list(MODES))
+
+    @staticmethod
+    def settings_for(mode):
+        database = deepcopy(connections.settings["default"])
+        options = database.setdefault("OPTIONS", {})
+        options.pop("pool", None)
+        database["CONN_HEALTH_CHECKS"] = mode != "fresh"
+        database["CONN_MAX_AGE"] = 600 if mode == "persistent" else 0
+        if mode == "pooled":
+            options["pool"] = {"min_size": 1, "max_size": 4, "timeout": 10}
+        return database
+
+    @staticmethod
+    def run_requests(connection, requests):
+        timings = []
+        for _ in range(requests):
+            started = time.perf_counter()
+            # The same calls Django makes on request_started / request_finished.
+            connection.close_if_unusable_or_obsolete()
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT 1")
+            connection.close_if_unusable_or_obsolete()
+            timings.append((time.perf_counter() - started) * 1000)
+        return timings
+
+    @staticmethod
+    def alias(mode):
+        return f"benchmark_{mode}"
+
+    def handle(self, *args, **options):
+        self.stdout.write(f"{'mode':<12}{'mean ms':>10}{'p50 ms':>10}{'p95 ms':>10}")
+        for mode in options["modes"]:
+            # Each mode is registered as a database alias of its own while it runs,
+            # since connection_created handlers such as django.contrib.postgres'
+            # look the new connection up by alias in django.db.connections.
+            alias = self.alias(mode)
+            connections.settings[alias] = self.settings_for(mode)
+            try:
+                connection = connections[alias]
+                # Warm up so that pool creation is not part of the measurement.
+                self.run_requests(connection, 1)
+                timings = self.run_requests(connection, options["requests"])
+                connection.close()
+                if mode == "pooled":
+                    connection.close_pool()
+            finally:
+                del connections[alias]
+                del connections.settings[alias]
+
+            self.stdout.write(
+                f"{mode:<12}"
+                f"{statistics.mean(timings):>10.3f}"
+                f"{statistics.median(timings):>10.3f}"
+                f"{statistics.quantiles(timings, n=20)[-1]:>10.3f}"
+            )
@@ -0,0 +1,54 @@
+import statistics
+import time
+
+from django.core.management import BaseCommand, CommandError
+from rest_framework.renderers import JSONRenderer
+
+from airport.renderers import FastJSONRenderer
+from airport.serializers import FlightListSerializer
+from airport.views import FlightViewSet
+
+
+class Command(BaseCommand):
+    help = (
+        "Measures rendering FlightListSerializer payloads with DRF's JSONRenderer "
+        "and with FastJSONRenderer on the flights in the database"
+    )
+
+    RENDERERS = (JSONRenderer, FastJSONRenderer)
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=1000, help="Number of flights per payload")
+        parser.add_argument("--repeat", type=int, default=20)
+
+    @staticmethod
+    def measure(renderer, data, repeat):
+        timings = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            renderer.render(data)
+            timings.append(time.perf_counter() - started)
+        return statistics.median(timings)
+
+    def handle(self, *args, **options):
+        flights = list(FlightViewSet.queryset[:options["rows"]])
+        if not flights:
+            raise CommandError("No flights to render, load some data first")
+        data = FlightListSerializer(flights, many=True).data
+
+        outputs = {renderer_class: renderer_class().render(data) for renderer_class in self.RENDERERS}
+        if len(set(outputs.values())) != 1:
+            raise CommandError("Renderers disagree on the payload")
+
+        self.stdout.write(
+            f"{len(flights)} flights, {len(outputs[JSONRenderer])} bytes, "
+            f"median of {options['repeat']} runs"
+        )
+        self.stdout.write(f"{'renderer':<20}{'ms':>10}{'us/row':>10}{'MB/s':>10}")
+        for renderer_class in self.RENDERERS:
+            elapsed = self.measure(renderer_class(), data, options["repeat"])
+            self.stdout.write(
+                f"{renderer_class.__name__:<20}{elapsed * 1000:>10.3f}"
+                f"{elapsed * 10 ** 6 / len(flights):>10.2f}"
+                f"{len(outputs[renderer_class]) / elapsed / 10 ** 6:>10.1f}"
+            )
@@ -0,0 +1,63 @@
+import statistics
+import time
+
+from django.core.management import BaseCommand, CommandError
+from rest_framework.renderers import JSONRenderer
+
+from airport.serializers import FlightListSerializer, FlightListValuesSerializer
+from airport.views import FlightViewSet
+
+
+class Command(BaseCommand):
+    help = (
+        "Measures per-row cost of rendering the flight list with FlightListSerializer "
+        "and with FlightListValuesSerializer on the flights in the database"
+    )
+
+    MODES = (
+        (
+            "FlightListSerializer",
+            lambda queryset: list(queryset),
+            lambda rows: FlightListSerializer(rows, many=True).data,
+        ),
+        (
+            "FlightListValuesSerializer",
+            lambda queryset: list(FlightListValuesSerializer.project(queryset)),
+            lambda rows: FlightListValuesSerializer(rows).data,
+        ),
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=1000, help="Number of flights to serialize")
+        parser.add_argument("--repeat", type=int, default=5)
+
+    @staticmethod
+    def measure(load, serialize, queryset, repeat):
+        """Median seconds of fetch + serialize + render, and of serialize + render alone."""
+        totals = []
+        serialize_only = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            rows = load(queryset.all())
+            loaded = time.perf_counter()
+            JSONRenderer().render(serialize(rows))
+            finished = time.perf_counter()
+            totals.append(finished - started)
+            serialize_only.append(finished - loaded)
+        return statistics.median(totals), statistics.median(serialize_only)
+
+    def handle(self, *args, **options):
+        ids = list(FlightViewSet.queryset.values_list("id", flat=True)[:options["rows"]])
+        if not ids:
+            raise CommandError("No flights to serialize, load some data first")
+        queryset = FlightViewSet.queryset.filter(id__in=ids)
+
+        self.stdout.write(f"{len(ids)} flights, median of {options['repeat']} runs")
+        self.stdout.write(f"{'serializer':<30}{'total ms':>10}{'us/row':>10}{'serialize us/row':>18}")
+        for name, load, serialize in self.MODES:
+            total, serialize_only = self.measure(load, serialize, queryset, options["repeat"])
+            self.stdout.write(
+                f"{name:<30}{total * 1000:>10.2f}"
+                f"{total * 10 ** 6 / len(ids):>10.2f}"
+                f"{serialize_only * 10 ** 6 / len(ids):>18.2f}"
+            )
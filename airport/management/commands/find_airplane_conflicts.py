@@ -0,0 +1,58 @@
+import time
+from datetime import datetime
+from itertools import groupby
+
+from django.core.management import BaseCommand, CommandError
+from django.utils import timezone
+
+from airport.intervals import overlapping_pairs
+from airport.models import Flight
+
+
+class Command(BaseCommand):
+    help = (
+        "Reports airplanes assigned to flights whose departure/arrival times overlap, "
+        "with one sweep over each airplane's flights sorted by departure"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--since", help="Only check flights arriving after this date (YYYY-MM-DD)")
+        parser.add_argument("--chunk-size", type=int, default=5000, help="Rows fetched per round trip")
+        parser.add_argument(
+            "--fail",
+            action="store_true",
+            help="Exit with an error when conflicts are found, for use in checks",
+        )
+
+    def handle(self, *args, **options):
+        flights = Flight.objects.order_by("airplane_id", "departure_time", "id")
+        if options["since"]:
+            try:
+                since = datetime.strptime(options["since"], "%Y-%m-%d")
+            except ValueError:
+                raise CommandError("--since must be a YYYY-MM-DD date")
+            flights = flights.filter(arrival_time__gt=timezone.make_aware(since))
+
+        started = time.perf_counter()
+        rows = flights.values_list(
+            "airplane_id", "airplane__name", "departure_time", "arrival_time", "id"
+        ).iterator(chunk_size=options["chunk_size"])
+
+        checked = conflicts = 0
+        for (airplane_id, airplane), airplane_rows in groupby(rows, key=lambda row: row[:2]):
+            intervals = [(departure, arrival, flight_id) for _, _, departure, arrival, flight_id in airplane_rows]
+            checked += len(intervals)
+            for first, second in overlapping_pairs(intervals):
+                conflicts += 1
+                self.stdout.write(
+                    f"{airplane} ({airplane_id}): flight {first[2]} "
+                    f"{timezone.localtime(first[0]):%Y-%m-%d %H:%M}-{timezone.localtime(first[1]):%H:%M} "
+                    f"overlaps flight {second[2]} "
+                    f"{timezone.localtime(second[0]):%Y-%m-%d %H:%M}-{timezone.localtime(second[1]):%H:%M}"
+                )
+
+        elapsed = time.perf_counter() - started
+        summary = f"{conflicts} conflicts in {checked} flights ({elapsed:.2f}s)"
+        if conflicts and options["fail"]:
+            raise CommandError(summary)
+        self.stdout.write(self.style.SUCCESS(summary) if not conflicts else self.style.WARNING(summary))
@@ -0,0 +1,57 @@
+import os
+import sys
+from contextlib import nullcontext
+
+from django.core.management import BaseCommand, CommandError
+
+from airport.imports import ScheduleImporter, RECORD_READERS, CHUNK_SIZE, decode_lines
+
+
+class Command(BaseCommand):
+    help = (
+        "Imports a flight schedule from a CSV or NDJSON file in bulk. "
+        "Flights that already exist are skipped, so a schedule can be re-imported safely"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="Schedule file, or - to read standard input")
+        parser.add_argument(
+            "--format",
+            choices=sorted(RECORD_READERS),
+            help="Schedule format, guessed from the file extension by default",
+        )
+        parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE, help="Rows per transaction")
+
+    def get_format(self, path, schedule_format):
+        if schedule_format:
+            return schedule_format
+        extension = os.path.splitext(path)[1].lstrip(".").lower()
+        if extension not in RECORD_READERS:
+            raise CommandError("Cannot guess the schedule format, pass --format")
+        return extension
+
+    def report(self, stats):
+        self.stdout.write(
+            f"{stats.rows} rows: {stats.created} created, {stats.existing} existing, "
+            f"{stats.invalid} invalid ({stats.rate:.0f} rows/s)"
+        )
+
+    def handle(self, *args, **options):
+        path = options["path"]
+        read_records = RECORD_READERS[self.get_format(path, options["format"])]
+
+        try:
+            schedule = nullcontext(sys.stdin.buffer) if path == "-" else open(path, "rb")
+        except OSError as error:
+            raise CommandError(str(error))
+
+        importer = ScheduleImporter(chunk_size=options["chunk_size"], progress=self.report)
+        with schedule as lines:
+            stats = importer.run(read_records(decode_lines(lines)))
+
+        for error in stats.errors:
+            self.stderr.write(f"line {error['line']}: {error['error']}")
+        self.stdout.write(self.style.SUCCESS(
+            f"Imported {stats.created} flights from {stats.rows} rows in {stats.elapsed:.2f}s "
+            f"({stats.rate:.0f} rows/s), {stats.existing} already existed, {stats.invalid} invalid"
+        ))
@@ -0,0 +1,110 @@
+import json
+import statistics
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management import BaseCommand, CommandError
+
+
+class Command(BaseCommand):
+    help = "Fires concurrent GET requests at a running server and reports throughput and latency"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--base-url", default="http://127.0.0.1:8000")
+        parser.add_argument(
+            "--path",
+            action="append",
+            dest="paths",
+            help="Path to request, may be repeated (default: /api/core/flights/)",
+        )
+        parser.add_argument("--requests", type=int, default=500, help="Requests per path")
+        parser.add_argument("--concurrency", type=int, default=16)
+        parser.add_argument("--email", help="Obtain a JWT for this user before the run")
+        parser.add_argument("--password")
+        parser.add_argument("--token", help="Use this JWT access token")
+        parser.add_argument(
+            "--compare-async",
+            action="store_true",
+            help="Also run each /api/core/ path against its /api/core/async/ twin",
+        )
+
+    def obtain_token(self, base_url, email, password):
+        request = urllib.request.Request(
+            f"{base_url}/api/user/token/",
+            data=json.dumps({"email": email, "password": password}).encode(),
+            headers={"Content-Type": "application/json"},
+        )
+        try:
+            with urllib.request.urlopen(request) as response:
+                return json.load(response)["access"]
+        except urllib.error.HTTPError as error:
+            raise CommandError(f"Could not obtain a token: {error.code}")
+
+    @staticmethod
+    def async_path(path):
+        prefix = "/api/core/"
+        if not path.startswith(prefix) or path.startswith(prefix + "async/"):
+            return None
+        return prefix + "async/" + path[len(prefix):]
+
+    @staticmethod
+    def fetch(url, headers):
+        request = urllib.request.Request(url, headers=headers)
+        started = time.perf_counter()
+        try:
+            with urllib.request.urlopen(request) as response:
+                response.read()
+                status = response.status
+        except urllib.error.HTTPError as error:
+            status = error.code
+        except urllib.error.URLError:
+            status = None
+        return status, (time.perf_counter() - started) * 1000
+
+    def run_path(self, url, headers, requests, concurrency):
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            started = time.perf_counter()
+            results = list(executor.map(lambda _: self.fetch(url, headers), range(requests)))
+            elapsed = time.perf_counter() - started
+
+        latencies = sorted(latency for _, latency in results)
+        errors = sum(1 for status, _ in results if status is None or status >= 400)
+        return {
+            "rps": requests / elapsed,
+            "p50": statistics.median(latencies),
+            "p99": latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))],
+            "errors": errors,
+        }
+
+    def handle(self, *args, **options):
+        base_url = options["base_url"].rstrip("/")
+        token = options["token"]
+        if not token and options["email"]:
+            token = self.obtain_token(base_url, options["email"], options["password"])
+
+        headers = {"Accept": "application/json"}
+        if token:
+            headers["Authorization"] = f"Bearer {token}"
+
+        self.stdout.write(
+            f"{options['requests']} requests per path, concurrency {options['concurrency']}"
+        )
+        self.stdout.write(f"{'path':<40}{'req/s':>10}{'p50 ms':>10}{'p99 ms':>10}{'errors':>8}")
+        paths = options["paths"] or ["/api/core/flights/"]
+        if options["compare_async"]:
+            paths = [
+                compared
+                for path in paths
+                for compared in (path, self.async_path(path))
+                if compared
+            ]
+        for path in paths:
+            result = self.run_path(
+                base_url + path, headers, options["requests"], options["concurrency"]
+            )
+            self.stdout.write(
+                f"{path:<40}{result['rps']:>10.1f}{result['p50']:>10.2f}"
+                f"{result['p99']:>10.2f}{result['errors']:>8}"
+            )
@@ -0,0 +1,54 @@
+from django.core.management import BaseCommand
+from django.db import transaction
+from django.db.models import Count, OuterRef, Subquery, F
+from django.db.models.functions import Coalesce
+
+from airport.cache import bump_version
+from airport.models import Flight, Ticket, SEATS_SOLD_VERSION
+
+
+class Command(BaseCommand):
+    help = "Recounts Flight.seats_sold from tickets and fixes flights that drifted"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--dry-run", action="store_true", help="Only report drifted flights")
+        parser.add_argument("--batch-size", type=int, default=1000)
+
+    @staticmethod
+    def with_actual_seats_sold(queryset):
+        sold = (
+            Ticket.objects.filter(flight=OuterRef("pk"))
+            .order_by()
+            .values("flight")
+            .annotate(sold=Count("id"))
+            .values("sold")
+        )
+        return queryset.annotate(actual_seats_sold=Coalesce(Subquery(sold), 0))
+
+    def handle(self, *args, **options):
+        drifted_ids = list(
+            self.with_actual_seats_sold(Flight.objects.order_by("id"))
+            .exclude(seats_sold=F("actual_seats_sold"))
+            .values_list("id", flat=True)
+        )
+        self.stdout.write(f"Flights with drifted seats_sold: {len(drifted_ids)}")
+        if options["dry_run"] or not drifted_ids:
+            return
+
+        fixed = 0
+        batch_size = options["batch_size"]
+        for start in range(0, len(drifted_ids), batch_size):
+            with transaction.atomic():
+                flights = self.with_actual_seats_sold(
+                    Flight.objects.select_for_update()
+                    .filter(id__in=drifted_ids[start:start + batch_size])
+                    .order_by("id")
+                )
+                for flight in flights:
+                    if flight.seats_sold != flight.actual_seats_sold:
+                        Flight.objects.filter(pk=flight.pk).update(seats_sold=flight.actual_seats_sold)
+                        fixed += 1
+
+        if fixed:
+            bump_version(SEATS_SOLD_VERSION)
+        self.stdout.write(self.style.SUCCESS(f"Reconciled seats_sold for {fixed} flights"))
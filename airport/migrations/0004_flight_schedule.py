@@ -0,0 +1,37 @@
+# Generated by Django 5.2.6 on 2026-10-18 07:18
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('airport', '0003_search_and_filter_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FlightSchedule',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('weekdays', models.CharField(help_text='ISO weekdays the flight operates on, e.g. 135 for Monday, Wednesday and Friday', max_length=7)),
+                ('departure_time', models.TimeField()),
+                ('duration', models.DurationField()),
+                ('valid_from', models.DateField()),
+                ('valid_until', models.DateField()),
+                ('airplane', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='schedules', to='airport.airplane')),
+                ('crews', models.ManyToManyField(blank=True, related_name='schedules', to='airport.crew')),
+                ('route', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='schedules', to='airport.route')),
+            ],
+        ),
+        migrations.AddField(
+            model_name='flight',
+            name='schedule',
+            field=models.ForeignKey(blank=True, editable=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='flights', to='airport.flightschedule'),
+        ),
+        migrations.AddConstraint(
+            model_name='flight',
+            constraint=models.UniqueConstraint(fields=('schedule', 'departure_time'), name='airport_flight_schedule_departure_uniq'),
+        ),
+    ]
@@ -0,0 +1,37 @@
+from django.db import migrations
+
+# airport.search.database_search matches the raw columns with the pg_trgm %>
+# operator, which the UPPER() expression indexes of 0003 cannot serve.
+TRIGRAM_INDEXES = (
+    ("airport_airport_name_word_trgm", "airport_airport", "name"),
+    ("airport_airport_city_word_trgm", "airport_airport", "closest_big_city"),
+    ("airport_airplane_name_word_trgm", "airport_airplane", "name"),
+    ("airport_airplanetype_name_word_trgm", "airport_airplanetype", "name"),
+)
+
+
+def create_trigram_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    for index, table, column in TRIGRAM_INDEXES:
+        schema_editor.execute(
+            f'CREATE INDEX IF NOT EXISTS "{index}" ON "{table}" USING gin ("{column}" gin_trgm_ops)'
+        )
+
+
+def drop_trigram_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    for index, _, _ in TRIGRAM_INDEXES:
+        schema_editor.execute(f'DROP INDEX IF EXISTS "{index}"')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('airport', '0004_flight_schedule'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_trigram_indexes, drop_trigram_indexes),
+    ]
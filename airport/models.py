@@ -1,12 +1,21 @@
 import os
+import re
 import uuid
+from datetime import datetime, timedelta
 
 from django.db import models
+from django.db.models.functions import Greatest
+from django.utils import timezone
 from django.utils.text import slugify
 from rest_framework.exceptions import ValidationError
 
+from airport.cache import bump_version
 from airport_api_service import settings
 
+# Change version of Flight.seats_sold. Bookings bump it instead of the Flight
+# version, so caches of the timetable survive them.
+SEATS_SOLD_VERSION = "airport.seats_sold"
+
 
 class Airport(models.Model):
     name = models.CharField(max_length=255)
@@ -76,18 +85,203 @@ class Crew(models.Model):
         return f"{self.first_name} {self.last_name}"
 
 
+class FlightSchedule(models.Model):
+    """A recurring flight, expanded into dated flights on demand.
+
+    Occurrences are listed without being stored; a Flight row is only
+    created (``materialize``) when the first seat on one is booked.
+    """
+
+    OCCURRENCE_ID = re.compile(r"^s(\d+)-(\d{8})$")
+
+    route = models.ForeignKey(Route, on_delete=models.CASCADE, related_name="schedules")
+    airplane = models.ForeignKey(Airplane, on_delete=models.CASCADE, related_name="schedules")
+    crews = models.ManyToManyField(Crew, related_name="schedules", blank=True)
+    weekdays = models.CharField(
+        max_length=7,
+        help_text="ISO weekdays the flight operates on, e.g. 135 for Monday, Wednesday and Friday",
+    )
+    departure_time = models.TimeField()
+    duration = models.DurationField()
+    valid_from = models.DateField()
+    valid_until = models.DateField()
+
+    def __str__(self):
+        return f"{self.airplane.name}: route {self.route_id} on {self.weekdays} at {self.departure_time}"
+
+    @staticmethod
+    def occurrence_id(schedule_id, date):
+        """Id of the not yet materialized flight of a schedule on ``date``."""
+        return f"s{schedule_id}-{date:%Y%m%d}"
+
+    @classmethod
+    def parse_occurrence_id(cls, value):
+        """Return ``(schedule_id, date)`` of an occurrence id, or None."""
+        match = cls.OCCURRENCE_ID.match(str(value))
+        if not match:
+            return None
+        try:
+            return int(match[1]), datetime.strptime(match[2], "%Y%m%d").date()
+        except ValueError:
+            return None
+
+    def runs_on(self, date):
+        return self.valid_from <= date <= self.valid_until and str(date.isoweekday()) in self.weekdays
+
+    def departure_on(self, date):
+        return timezone.make_aware(datetime.combine(date, self.departure_time))
+
+    def occurrences_between(self, start, end):
+        """Yield ``(date, departure_time, arrival_time)`` of the occurrences overlapping ``[start, end)``."""
+        date = max(timezone.localtime(start - self.duration).date(), self.valid_from)
+        last = min(timezone.localtime(end).date(), self.valid_until)
+        while date <= last:
+            if str(date.isoweekday()) in self.weekdays:
+                departure_time = self.departure_on(date)
+                if departure_time < end and departure_time + self.duration > start:
+                    yield date, departure_time, departure_time + self.duration
+            date += timedelta(days=1)
+
+    @staticmethod
+    def materialized(occurrences):
+        """Return the (schedule_id, date) pairs of ``occurrences`` that have a Flight that day."""
+        occurrences = set(occurrences)
+        if not occurrences:
+            return set()
+        return occurrences & {
+            (schedule_id, timezone.localdate(departure_time))
+            for schedule_id, departure_time in Flight.objects.filter(
+                schedule_id__in={schedule_id for schedule_id, _ in occurrences},
+                departure_time__date__in={date for _, date in occurrences},
+            ).values_list("schedule_id", "departure_time")
+        }
+
+    def occurrence(self, date):
+        """The Flight of this schedule on ``date``, unsaved unless it was materialized before."""
+        departure_time = self.departure_on(date)
+        flight = self.flights.select_related("airplane").filter(departure_time=departure_time).first()
+        if flight is None:
+            flight = Flight(
+                schedule=self,
+                route_id=self.route_id,
+                airplane=self.airplane,
+                departure_time=departure_time,
+                arrival_time=departure_time + self.duration,
+            )
+        flight.occurrence_id = self.occurrence_id(self.pk, date)
+        return flight
+
+    def materialize(self, date):
+        """Return the Flight of this schedule on ``date``, creating it once.
+
+        A new Flight gets the same airplane and crew checks as one added
+        through the API, so an occurrence clashing with another flight
+        raises ValidationError instead of double-booking them.
+        """
+        # airport.intervals imports this module.
+        from airport.intervals import airplane_schedule, crew_roster, conflict_messages
+
+        departure_time = self.departure_on(date)
+        arrival_time = departure_time + self.duration
+        flight = self.flights.filter(departure_time=departure_time).first()
+        if flight is None:
+            crews = list(self.crews.all())
+            errors = conflict_messages(
+                {self.airplane_id: self.airplane.name},
+                airplane_schedule.conflicts(
+                    [self.airplane_id], departure_time, arrival_time, exclude_schedule=self.pk
+                ),
+                "already flies",
+            ) + conflict_messages(
+                {crew.id: crew.full_name for crew in crews},
+                crew_roster.conflicts(
+                    [crew.id for crew in crews], departure_time, arrival_time, exclude_schedule=self.pk
+                ),
+                "is already on",
+            )
+            if errors:
+                raise ValidationError(errors)
+
+            flight, created = Flight.objects.get_or_create(
+                schedule=self,
+                departure_time=departure_time,
+                defaults={
+                    "route_id": self.route_id,
+                    "airplane_id": self.airplane_id,
+                    "arrival_time": arrival_time,
+                },
+            )
+            if created:
+                flight.crews.set(crews)
+        flight.airplane = self.airplane
+        return flight
+
+    def clean(self):
+        if not self.weekdays or not set(self.weekdays) <= set("1234567"):
+            raise ValidationError("Weekdays must be ISO weekday numbers from 1 (Monday) to 7 (Sunday)")
+
+        if self.valid_until < self.valid_from:
+            raise ValidationError("Schedule must be valid until a date after it is valid from")
+
+        if self.duration.total_seconds() <= 0:
+            raise ValidationError("Flight duration must be positive")
+
+    def save(self, *args, **kwargs):
+        self.weekdays = "".join(sorted(set(self.weekdays)))
+        self.full_clean()
+        return super(FlightSchedule, self).save(*args, **kwargs)
+
+
 class Flight(models.Model):
     route = models.ForeignKey(Route, on_delete=models.CASCADE, related_name="flights")
     airplane = models.ForeignKey(Airplane, on_delete=models.CASCADE, related_name="flights")
     departure_time = models.DateTimeField()
     arrival_time = models.DateTimeField()
     crews = models.ManyToManyField(Crew, related_name="crews")
+    seats_sold = models.PositiveIntegerField(default=0, editable=False)
+    schedule = models.ForeignKey(
+        FlightSchedule,
+        null=True,
+        blank=True,
+        editable=False,
+        on_delete=models.SET_NULL,
+        related_name="flights",
+    )
 
     def __str__(self):
         return f"{self.airplane.name}: {self.route.source.name} -> {self.route.destination.name}"
 
+    @staticmethod
+    def lock(flight_ids):
+        """Lock the flights' rows in id order, so concurrent bookings queue instead of deadlocking."""
+        return list(
+            Flight.objects.select_for_update()
+            .filter(pk__in=flight_ids)
+            .order_by("pk")
+            .values_list("pk", flat=True)
+        )
+
+    @staticmethod
+    def add_seats_sold(counts):
+        """Apply ``{flight_id: delta}`` to ``seats_sold``, locking flights in id order."""
+        for flight_id in sorted(counts):
+            if counts[flight_id]:
+                Flight.objects.filter(pk=flight_id).update(
+                    seats_sold=Greatest(models.F("seats_sold") + counts[flight_id], 0)
+                )
+        bump_version(SEATS_SOLD_VERSION)
+
     class Meta:
         ordering = ("departure_time",)
+        indexes = [
+            models.Index(fields=["departure_time", "id"], name="airport_flight_departure_idx"),
+        ]
+        constraints = [
+            # One materialized flight per schedule occurrence.
+            models.UniqueConstraint(
+                fields=["schedule", "departure_time"], name="airport_flight_schedule_departure_uniq"
+            ),
+        ]
 
 
 class Order(models.Model):
@@ -99,6 +293,9 @@ class Order(models.Model):
 
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=["user", "-created_at"], name="airport_order_user_created_idx"),
+        ]
 
 class Ticket(models.Model):
     row = models.IntegerField()
@@ -110,14 +307,50 @@ class Ticket(models.Model):
         return f"{self.row}: {self.seat}"
 
     @staticmethod
-    def validate_ticket(row, seat, errors_in_raise):
+    def validate_ticket(row, seat, errors_in_raise, airplane=None):
         if not (seat > 0 and row > 0):
             raise errors_in_raise(
                 "Ticket seat must be greater than 0 and row must be greater than 0"
             )
+        if airplane and not (row <= airplane.rows and seat <= airplane.seats_in_row):
+            raise errors_in_raise(
+                f"Ticket row must be in range [1, {airplane.rows}] "
+                f"and seat must be in range [1, {airplane.seats_in_row}]"
+            )
+
+    @staticmethod
+    def _seat_candidates(seats):
+        return Ticket.objects.filter(
+            flight_id__in={flight_id for flight_id, _, _ in seats},
+            row__in={row for _, row, _ in seats},
+            seat__in={seat for _, _, seat in seats},
+        ).values_list("flight_id", "row", "seat")
+
+    @staticmethod
+    def taken_seats(seats):
+        """Return the (flight_id, row, seat) triples from ``seats`` that are already booked."""
+        seats = set(seats)
+        if not seats:
+            return set()
+        return seats.intersection(Ticket._seat_candidates(seats))
+
+    @staticmethod
+    async def ataken_seats(seats):
+        """Async twin of ``taken_seats``."""
+        seats = set(seats)
+        if not seats:
+            return set()
+        return seats.intersection([seat async for seat in Ticket._seat_candidates(seats)])
+
+    @staticmethod
+    def format_seats(seats):
+        return [
+            f"Seat {row}: {seat} on flight {flight_id} is already taken"
+            for flight_id, row, seat in sorted(seats)
+        ]
 
     def clean(self):
-        Ticket.validate_ticket(self.row, self.seat, ValidationError)
+        Ticket.validate_ticket(self.row, self.seat, ValidationError, self.flight.airplane)
 
     def save(self, *args, **kwargs):
         self.full_clean()
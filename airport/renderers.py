@@ -0,0 +1,41 @@
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson is an optional speed-up
+    orjson = None
+from rest_framework.renderers import JSONRenderer
+
+ORJSON_OPTIONS = (
+    orjson.OPT_PASSTHROUGH_DATETIME
+    | orjson.OPT_PASSTHROUGH_DATACLASS
+    | orjson.OPT_NON_STR_KEYS
+) if orjson is not None else 0
+
+
+class FastJSONRenderer(JSONRenderer):
+    """JSONRenderer that encodes with orjson when it is installed.
+
+    Output parses to the same JSON as JSONRenderer's: dates, times, Decimals,
+    UUIDs and lazy strings still go through the renderer's ``encoder_class``,
+    U+2028/U+2029 are escaped, and indented or non-compact output falls back to
+    the stdlib encoder. So does anything orjson refuses, such as integers
+    wider than 64 bits. It is not always byte for byte the same: floats in
+    exponent notation are written without the sign and padding of the
+    exponent (``1e16`` and ``1e-7`` instead of ``1e+16`` and ``1e-07``), and
+    NaN and infinity render as ``null`` instead of raising.
+    """
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if (
+            orjson is None
+            or data is None
+            or self.ensure_ascii
+            or not self.compact
+            or self.get_indent(accepted_media_type, renderer_context or {}) is not None
+        ):
+            return super().render(data, accepted_media_type, renderer_context)
+
+        try:
+            ret = orjson.dumps(data, default=self.encoder_class().default, option=ORJSON_OPTIONS)
+        except orjson.JSONEncodeError:
+            return super().render(data, accepted_media_type, renderer_context)
+        return ret.replace(b"\xe2\x80\xa8", b"\\u2028").replace(b"\xe2\x80\xa9", b"\\u2029")
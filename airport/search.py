@@ -0,0 +1,199 @@
+import re
+import threading
+import unicodedata
+from functools import reduce
+from operator import or_
+
+from django.contrib.postgres.search import SearchQuery, SearchRank, SearchVector, TrigramWordSimilarity
+from django.db.models import Q, F, Value, CharField
+from django.db.models.functions import Greatest
+
+from airport.cache import get_versions
+from airport.models import Airport, Airplane, AirplaneType
+
+AIRPORT = "airport"
+AIRPLANE = "airplane"
+AIRPLANE_TYPE = "airplane_type"
+
+# (result type, model, name field, detail field, searched fields)
+SEARCHES = (
+    (AIRPORT, Airport, "name", "closest_big_city", ("name", "closest_big_city")),
+    (AIRPLANE, Airplane, "name", "airplane_type__name", ("name", "airplane_type__name")),
+    (AIRPLANE_TYPE, AirplaneType, "name", None, ("name",)),
+)
+SEARCH_VERSIONS = (Airport, Airplane, AirplaneType)
+
+WORD = re.compile(r"\w+")
+
+
+def normalize(text):
+    """Casefold ``text`` and strip accents, so "Zürich" is found by "zur"."""
+    decomposed = unicodedata.normalize("NFKD", text.casefold())
+    return "".join(char for char in decomposed if not unicodedata.combining(char))
+
+
+def words(text):
+    return WORD.findall(normalize(text))
+
+
+class _Node:
+    __slots__ = ("children", "entries", "ending", "size")
+
+    def __init__(self):
+        self.children = {}
+        self.entries = []
+        # Entries with a word ending here, and the number of words at or below this node.
+        self.ending = []
+        self.size = 0
+
+
+class PrefixTrie:
+    """Search entries by word prefixes, answered from memory.
+
+    Every word of an entry's searched text is added character by character and
+    each node keeps the best ``max_entries`` entries below it, shortest names
+    first, so a lookup walks ``len(prefix)`` nodes. A query of several words
+    starts from the word with the fewest entries below it, and only visits
+    that subtree when its kept entries are too few once the other words are
+    matched. Entries are ``{"type", "id", "name", "detail"}`` dicts.
+    """
+
+    def __init__(self, max_entries=50):
+        self.max_entries = max_entries
+        self.root = _Node()
+        self._words = {}
+
+    @staticmethod
+    def rank(entry):
+        return len(entry["name"]), normalize(entry["name"]), entry["type"], entry["id"]
+
+    @classmethod
+    def build(cls, entries, max_entries=50):
+        """Build a trie from ``(entry, searched text)`` pairs."""
+        trie = cls(max_entries)
+        for entry, text in sorted(entries, key=lambda item: cls.rank(item[0])):
+            trie.add(entry, text)
+        return trie
+
+    def add(self, entry, text):
+        """Add ``entry`` under every word of ``text``; entries must come in rank order."""
+        entry_words = set(words(text))
+        self._words[id(entry)] = entry_words
+        for word in entry_words:
+            node = self.root
+            for char in word:
+                node = node.children.setdefault(char, _Node())
+                node.size += 1
+                if len(node.entries) < self.max_entries and (not node.entries or node.entries[-1] is not entry):
+                    node.entries.append(entry)
+            node.ending.append(entry)
+
+    def _node(self, prefix):
+        node = self.root
+        for char in prefix:
+            node = node.children.get(char)
+            if node is None:
+                return None
+        return node
+
+    def _subtree_entries(self, node):
+        """Every entry with a word below ``node``, in rank order."""
+        found = {}
+        nodes = [node]
+        while nodes:
+            node = nodes.pop()
+            found.update((id(entry), entry) for entry in node.ending)
+            nodes.extend(node.children.values())
+        return sorted(found.values(), key=self.rank)
+
+    def matches(self, entry, prefixes):
+        entry_words = self._words[id(entry)]
+        return all(any(word.startswith(prefix) for word in entry_words) for prefix in prefixes)
+
+    def score(self, entry, prefixes):
+        """How much of the entry's name the prefixes cover, 1.0 for an exact match."""
+        name = words(entry["name"])
+        covered = sum(
+            len(prefix) for prefix in prefixes if any(word.startswith(prefix) for word in name)
+        )
+        return round(min(covered / max(sum(map(len, name)), 1), 1.0), 4)
+
+    def search(self, query, limit=10):
+        """Entries with a word starting with each word of ``query``, best first."""
+        prefixes = words(query)
+        if not prefixes:
+            return []
+        nodes = [self._node(prefix) for prefix in prefixes]
+        if None in nodes:
+            return []
+        node = min(nodes, key=lambda node: node.size)
+        candidates = [entry for entry in node.entries if self.matches(entry, prefixes)]
+        # A full node may have left out entries that match the other words too.
+        if len(node.entries) == self.max_entries and len(candidates) < min(limit, len(node.entries)):
+            candidates = [entry for entry in self._subtree_entries(node) if self.matches(entry, prefixes)]
+        found = [{**entry, "score": self.score(entry, prefixes)} for entry in candidates]
+        found.sort(key=lambda entry: -entry["score"])
+        return found[:limit]
+
+
+class SearchIndex:
+    """Per-process PrefixTrie of airports, airplanes and airplane types, rebuilt when they change."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._trie = None
+        self._versions = None
+
+    @staticmethod
+    def load():
+        entries = []
+        for kind, model, name_field, detail_field, fields in SEARCHES:
+            for pk, name, *texts in model.objects.order_by().values_list("id", name_field, *fields):
+                detail = texts[fields.index(detail_field)] if detail_field else None
+                entry = {"type": kind, "id": pk, "name": name, "detail": detail}
+                entries.append((entry, " ".join(texts)))
+        return PrefixTrie.build(entries)
+
+    def get(self):
+        versions = get_versions(SEARCH_VERSIONS)
+        with self._lock:
+            if self._trie is None or self._versions != versions:
+                self._trie = self.load()
+                self._versions = versions
+            return self._trie
+
+    def search(self, query, limit=10):
+        return self.get().search(query, limit)
+
+
+search_index = SearchIndex()
+
+
+def database_search(query, limit=10):
+    """Ranked search in PostgreSQL, for queries the prefix trie cannot answer.
+
+    Rows are matched with the pg_trgm ``%>`` operator, which tolerates typos
+    and uses the trigram indexes on the searched columns, then ranked by the
+    best word similarity of their fields plus the full-text rank of the query.
+    """
+    search_query = SearchQuery(query, config="simple", search_type="websearch")
+    found = []
+    for kind, model, name_field, detail_field, fields in SEARCHES:
+        similarities = [TrigramWordSimilarity(query, field) for field in fields]
+        similarity = Greatest(*similarities) if len(similarities) > 1 else similarities[0]
+        vector = SearchVector(*fields, config="simple")
+        rows = (
+            model.objects.filter(reduce(or_, (Q(**{f"{field}__trigram_word_similar": query}) for field in fields)))
+            .annotate(
+                score=similarity + SearchRank(vector, search_query),
+                result_detail=F(detail_field) if detail_field else Value(None, output_field=CharField()),
+            )
+            .order_by("-score", "id")
+            .values_list("id", name_field, "result_detail", "score")[:limit]
+        )
+        found.extend(
+            {"type": kind, "id": pk, "name": name, "detail": detail, "score": round(score, 4)}
+            for pk, name, detail, score in rows
+        )
+    found.sort(key=lambda entry: -entry["score"])
+    return found[:limit]
@@ -0,0 +1,89 @@
+from airport.holds import SeatHold
+from airport.models import Ticket
+
+
+class SeatMap:
+    """Occupancy of a flight's seats packed into one bit per seat.
+
+    Sold and held seats are kept in two separate bitmaps.
+    """
+
+    FREE = "0"
+    TAKEN = "1"
+    HELD = "2"
+
+    def __init__(self, rows, seats_in_row, flight_id=None):
+        self.flight_id = flight_id
+        self.rows = rows
+        self.seats_in_row = seats_in_row
+        self._bits = bytearray((rows * seats_in_row + 7) // 8)
+        self._held_bits = bytearray(len(self._bits))
+
+    @classmethod
+    def for_flight(cls, flight):
+        seat_map = cls(flight.airplane.rows, flight.airplane.seats_in_row, flight.id)
+        for row, seat in Ticket.objects.filter(flight=flight).values_list("row", "seat"):
+            seat_map.occupy(row, seat)
+        for _, row, seat in SeatHold.held_on_flight(flight.id):
+            seat_map.hold(row, seat)
+        return seat_map
+
+    def _index(self, row, seat):
+        return (row - 1) * self.seats_in_row + (seat - 1)
+
+    def _set(self, bits, row, seat):
+        if not self.contains(row, seat):
+            return
+        index = self._index(row, seat)
+        bits[index >> 3] |= 1 << (index & 7)
+
+    def _get(self, bits, row, seat):
+        if not self.contains(row, seat):
+            return False
+        index = self._index(row, seat)
+        return bool(bits[index >> 3] & (1 << (index & 7)))
+
+    def contains(self, row, seat):
+        return 1 <= row <= self.rows and 1 <= seat <= self.seats_in_row
+
+    def occupy(self, row, seat):
+        self._set(self._bits, row, seat)
+
+    def is_taken(self, row, seat):
+        return self._get(self._bits, row, seat)
+
+    def hold(self, row, seat):
+        self._set(self._held_bits, row, seat)
+
+    def is_held(self, row, seat):
+        return self._get(self._held_bits, row, seat) and not self.is_taken(row, seat)
+
+    @property
+    def capacity(self):
+        return self.rows * self.seats_in_row
+
+    @property
+    def taken_count(self):
+        return sum(bin(byte).count("1") for byte in self._bits)
+
+    @property
+    def held_count(self):
+        return sum(bin(held & ~taken).count("1") for held, taken in zip(self._held_bits, self._bits))
+
+    @property
+    def available_count(self):
+        return self.capacity - self.taken_count - self.held_count
+
+    def state(self, row, seat):
+        if self.is_taken(row, seat):
+            return self.TAKEN
+        if self.is_held(row, seat):
+            return self.HELD
+        return self.FREE
+
+    @property
+    def grid(self):
+        return [
+            "".join(self.state(row, seat) for seat in range(1, self.seats_in_row + 1))
+            for row in range(1, self.rows + 1)
+        ]
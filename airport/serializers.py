@@ -1,7 +1,13 @@
-from django.db import transaction
-from rest_framework import serializers
+from collections import Counter
+from datetime import timedelta
 
-from airport.models import Airport, Route, Airplane, AirplaneType, Flight, Order, Ticket, Crew
+from django.db import transaction, IntegrityError, OperationalError
+from django.db.models import F
+from rest_framework import serializers, exceptions, status
+
+from airport.holds import SeatHold, SeatsHeld
+from airport.intervals import crew_roster, airplane_schedule, conflict_messages, IntervalIndex
+from airport.models import Airport, Route, Airplane, AirplaneType, Flight, Order, Ticket, Crew, FlightSchedule
 
 
 class AirportSerializer(serializers.ModelSerializer):
@@ -78,6 +84,59 @@ class FlightSerializer(serializers.ModelSerializer):
         model = Flight
         fields = ("id", "route", "airplane", "departure_time", "arrival_time", "crews")
 
+    def validate(self, attrs):
+        data = super(FlightSerializer, self).validate(attrs)
+        self.validate_airplane_availability(attrs)
+        self.validate_crew_availability(attrs)
+        return data
+
+    def _times(self, attrs):
+        instance = self.instance
+        return (
+            attrs.get("departure_time", getattr(instance, "departure_time", None)),
+            attrs.get("arrival_time", getattr(instance, "arrival_time", None)),
+        )
+
+    def validate_airplane_availability(self, attrs):
+        """Reject an airplane that is flying another flight at the same time."""
+        airplane = attrs.get("airplane", getattr(self.instance, "airplane", None))
+        departure_time, arrival_time = self._times(attrs)
+        if airplane is None or departure_time is None or arrival_time is None:
+            return
+
+        conflicts = airplane_schedule.conflicts(
+            [airplane.id],
+            departure_time,
+            arrival_time,
+            exclude_flight=getattr(self.instance, "pk", None),
+        )
+        if conflicts:
+            raise serializers.ValidationError({
+                "airplane": conflict_messages({airplane.id: airplane.name}, conflicts, "already flies")
+            })
+
+    def validate_crew_availability(self, attrs):
+        """Reject crew members who are on another flight at the same time."""
+        instance = self.instance
+        departure_time, arrival_time = self._times(attrs)
+        if "crews" in attrs:
+            crews = attrs["crews"]
+        else:
+            crews = list(instance.crews.all()) if instance is not None else []
+        if not crews or departure_time is None or arrival_time is None:
+            return
+
+        conflicts = crew_roster.conflicts(
+            [crew.id for crew in crews],
+            departure_time,
+            arrival_time,
+            exclude_flight=getattr(instance, "pk", None),
+        )
+        if conflicts:
+            raise serializers.ValidationError({
+                "crews": conflict_messages({crew.id: crew.full_name for crew in crews}, conflicts, "is already on")
+            })
+
 
 class FlightListSerializer(FlightSerializer):
     route = RouteListSerializer(read_only=True, many=False)
@@ -90,6 +149,244 @@ class FlightListSerializer(FlightSerializer):
         fields = ("id", "route", "airplane", "departure_time", "arrival_time", "tickets","crews")
 
 
+class FlightListValuesSerializer:
+    """Read-only twin of FlightListSerializer built from flat ``values()`` rows.
+
+    Produces the same data as FlightListSerializer for a queryset annotated with
+    ``tickets_available``, without instantiating models or per-field serializers.
+    Crews are fetched with one extra query for the whole page, and seats on
+    hold are taken off the available tickets.
+
+    Rows made by ``occurrences`` stand for FlightSchedule occurrences that have
+    no Flight yet; their id is the occurrence id and their crews are the schedule's.
+    """
+
+    FIELDS = (
+        "id",
+        "departure_time",
+        "arrival_time",
+        "tickets_available",
+        "route_id",
+        "route__distance",
+        "route__source_id",
+        "route__source__name",
+        "route__source__closest_big_city",
+        "route__destination_id",
+        "route__destination__name",
+        "route__destination__closest_big_city",
+        "airplane_id",
+        "airplane__name",
+        "airplane__rows",
+        "airplane__seats_in_row",
+        "airplane__image",
+        "airplane__airplane_type_id",
+        "airplane__airplane_type__name",
+    )
+
+    def __init__(self, rows, context=None):
+        self.rows = rows
+        self.context = context or {}
+
+    # Fields a FlightSchedule shares with a flight, under the same lookups.
+    SCHEDULE_FIELDS = FIELDS[4:] + ("id", "departure_time", "duration")
+
+    @classmethod
+    def project(cls, queryset):
+        """Turn a FlightViewSet queryset into the rows this serializer expects."""
+        return queryset.select_related(None).prefetch_related(None).values(*cls.FIELDS)
+
+    @classmethod
+    def running_on(cls, schedules, date, exclude=()):
+        """``values()`` of the ``schedules`` flying on ``date``, except the ``exclude`` schedule ids."""
+        return schedules.filter(
+            valid_from__lte=date,
+            valid_until__gte=date,
+            weekdays__contains=str(date.isoweekday()),
+        ).exclude(id__in=exclude).values(*cls.SCHEDULE_FIELDS)
+
+    @classmethod
+    def occurrences(cls, schedules, date):
+        """Rows of the occurrences on ``date`` of ``schedules``, made by ``running_on``."""
+        rows = []
+        for schedule in schedules:
+            row = {field: schedule[field] for field in cls.FIELDS[4:]}
+            departure_time = FlightSchedule(departure_time=schedule["departure_time"]).departure_on(date)
+            row.update(
+                id=FlightSchedule.occurrence_id(schedule["id"], date),
+                departure_time=departure_time,
+                arrival_time=departure_time + schedule["duration"],
+                tickets_available=schedule["airplane__rows"] * schedule["airplane__seats_in_row"],
+                schedule_id=schedule["id"],
+            )
+            rows.append(row)
+        return rows
+
+    @staticmethod
+    def crew_rows(relation, ids):
+        """(owner id, crew id, first name, last name) of the crews of the ``relation`` (crews
+        for flights, schedules for schedules) objects with ``ids``."""
+        return (
+            Crew.objects.filter(**{f"{relation}__in": ids})
+            .annotate(owner_id=F(f"{relation}__id"))
+            .values_list("owner_id", "id", "first_name", "last_name")
+        )
+
+    @staticmethod
+    def group_crews(ids, rows):
+        crews = {owner_id: [] for owner_id in ids}
+        for owner_id, crew_id, first_name, last_name in rows:
+            crews[owner_id].append({"id": crew_id, "first_name": first_name, "last_name": last_name})
+        return crews
+
+    def crews_by_flight(self, flight_ids):
+        return self.group_crews(flight_ids, self.crew_rows("crews", flight_ids))
+
+    def crews_by_schedule(self, schedule_ids):
+        return self.group_crews(schedule_ids, self.crew_rows("schedules", schedule_ids))
+
+    def image_url(self, name):
+        if not name:
+            return None
+        url = Airplane._meta.get_field("image").storage.url(name)
+        request = self.context.get("request")
+        return request.build_absolute_uri(url) if request is not None else url
+
+    def to_representation(self, row, crews, datetime_field, held=0):
+        return {
+            "id": row["id"],
+            "route": {
+                "id": row["route_id"],
+                "source": {
+                    "id": row["route__source_id"],
+                    "name": row["route__source__name"],
+                    "closest_big_city": row["route__source__closest_big_city"],
+                },
+                "destination": {
+                    "id": row["route__destination_id"],
+                    "name": row["route__destination__name"],
+                    "closest_big_city": row["route__destination__closest_big_city"],
+                },
+                "distance": row["route__distance"],
+            },
+            "airplane": {
+                "id": row["airplane_id"],
+                "name": row["airplane__name"],
+                "rows": row["airplane__rows"],
+                "seats_in_row": row["airplane__seats_in_row"],
+                "airplane_type": {
+                    "id": row["airplane__airplane_type_id"],
+                    "name": row["airplane__airplane_type__name"],
+                },
+                "image": self.image_url(row["airplane__image"]),
+            },
+            "departure_time": datetime_field.to_representation(row["departure_time"]),
+            "arrival_time": datetime_field.to_representation(row["arrival_time"]),
+            "tickets": row["tickets_available"] - held,
+            "crews": crews,
+        }
+
+    @staticmethod
+    def owner_ids(rows):
+        """Ids of the flights and of the schedules of the occurrences among ``rows``."""
+        flight_ids = [row["id"] for row in rows if "schedule_id" not in row]
+        schedule_ids = {row["schedule_id"] for row in rows if "schedule_id" in row}
+        return flight_ids, schedule_ids
+
+    @property
+    def data(self):
+        rows = list(self.rows)
+        flight_ids, schedule_ids = self.owner_ids(rows)
+        crews = self.crews_by_flight(flight_ids) if flight_ids else {}
+        schedule_crews = self.crews_by_schedule(schedule_ids) if schedule_ids else {}
+        return self.represent(rows, crews, schedule_crews, SeatHold.held_counts(flight_ids))
+
+    async def adata(self):
+        """Async twin of ``data``, for rows fetched already."""
+        rows = list(self.rows)
+        flight_ids, schedule_ids = self.owner_ids(rows)
+        crews, schedule_crews = {}, {}
+        if flight_ids:
+            crews = self.group_crews(flight_ids, [row async for row in self.crew_rows("crews", flight_ids)])
+        if schedule_ids:
+            schedule_crews = self.group_crews(
+                schedule_ids, [row async for row in self.crew_rows("schedules", schedule_ids)]
+            )
+        return self.represent(rows, crews, schedule_crews, await SeatHold.aheld_counts(flight_ids))
+
+    def represent(self, rows, crews, schedule_crews, held):
+        datetime_field = serializers.DateTimeField()
+        return [
+            self.to_representation(
+                row,
+                schedule_crews[row["schedule_id"]] if "schedule_id" in row else crews[row["id"]],
+                datetime_field,
+                held.get(row["id"], 0),
+            )
+            for row in rows
+        ]
+
+
+class FlightScheduleSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = FlightSchedule
+        fields = (
+            "id", "route", "airplane", "crews", "weekdays", "departure_time", "duration", "valid_from", "valid_until"
+        )
+
+    TIMING_FIELDS = ("weekdays", "departure_time", "duration", "valid_from", "valid_until")
+
+    def validate(self, attrs):
+        data = super(FlightScheduleSerializer, self).validate(attrs)
+        instance = self.instance
+        schedule = FlightSchedule(
+            pk=getattr(instance, "pk", None),
+            **{field: attrs.get(field, getattr(instance, field, None)) for field in self.TIMING_FIELDS},
+        )
+        if None in (getattr(schedule, field) for field in self.TIMING_FIELDS) or schedule.duration <= timedelta(0):
+            return data
+
+        airplane = attrs.get("airplane", getattr(instance, "airplane", None))
+        if "crews" in attrs:
+            crews = attrs["crews"]
+        else:
+            crews = list(instance.crews.all()) if instance is not None else []
+        errors = {}
+        if airplane is not None:
+            errors["airplane"] = self.schedule_conflicts(
+                schedule, airplane_schedule, {airplane.id: airplane.name}, "already flies"
+            )
+        if crews:
+            errors["crews"] = self.schedule_conflicts(
+                schedule, crew_roster, {crew.id: crew.full_name for crew in crews}, "is already on"
+            )
+        errors = {field: messages for field, messages in errors.items() if messages}
+        if errors:
+            raise serializers.ValidationError(errors)
+        return data
+
+    def schedule_conflicts(self, schedule, intervals, names, doing):
+        """Describe the first flight or other schedule's occurrence each of ``names`` has during ``schedule``.
+
+        The flights and occurrences of the whole validity period are fetched
+        once, then every occurrence of ``schedule`` is a bisection.
+        """
+        start = schedule.departure_on(schedule.valid_from)
+        end = schedule.departure_on(schedule.valid_until) + schedule.duration
+        busy = intervals.conflicts(list(names), start, end, exclude_schedule=schedule.pk)
+        # Flights this schedule has already materialized are its own occurrences.
+        own_flights = set(self.instance.flights.values_list("id", flat=True)) if self.instance is not None else set()
+
+        conflicts = {}
+        for key, key_intervals in busy.items():
+            index = IntervalIndex(interval for interval in key_intervals if interval[2] not in own_flights)
+            for _, departure_time, arrival_time in schedule.occurrences_between(start, end):
+                overlapping = index.overlapping(departure_time, arrival_time)
+                if overlapping:
+                    conflicts[key] = overlapping[:1]
+                    break
+        return conflict_messages(names, conflicts, doing)
+
+
 class FlightDetailSerializer(FlightSerializer):
     final_place = serializers.CharField(read_only=True, source="route.destination.closest_big_city")
     airplane = serializers.CharField(read_only=True, source="airplane.name")
@@ -99,19 +396,100 @@ class FlightDetailSerializer(FlightSerializer):
         fields = ("id", "final_place", "airplane", "departure_time", "arrival_time", "crews")
 
 
+class FlightSeatMapSerializer(serializers.Serializer):
+    flight = serializers.IntegerField(source="flight_id", read_only=True)
+    rows = serializers.IntegerField(read_only=True)
+    seats_in_row = serializers.IntegerField(read_only=True)
+    available = serializers.IntegerField(source="available_count", read_only=True)
+    held = serializers.IntegerField(source="held_count", read_only=True)
+    seats = serializers.ListField(child=serializers.CharField(), source="grid", read_only=True)
+
+
+class ItinerarySearchSerializer(serializers.Serializer):
+    source = serializers.IntegerField(help_text="Departure airport id")
+    destination = serializers.IntegerField(help_text="Arrival airport id")
+    date = serializers.DateField(required=False, help_text="Departure date, the next 24 hours by default")
+    tickets = serializers.IntegerField(min_value=1, default=1, help_text="Seats needed on every leg")
+    limit = serializers.IntegerField(min_value=1, max_value=20, default=5)
+    max_legs = serializers.IntegerField(min_value=1, max_value=4, default=3)
+
+    def validate(self, attrs):
+        if attrs["source"] == attrs["destination"]:
+            raise serializers.ValidationError("Source and destination must be different airports")
+        return attrs
+
+
+class SearchSerializer(serializers.Serializer):
+    q = serializers.CharField(max_length=100, help_text="Words or word prefixes to look for")
+    limit = serializers.IntegerField(min_value=1, max_value=50, default=10)
+
+
+class IdListField(serializers.Field):
+    """Comma-separated ids, e.g. ``?crews=1,2``."""
+
+    default_error_messages = {"invalid": "Enter comma-separated ids, e.g. 1,2."}
+
+    def to_internal_value(self, data):
+        try:
+            return [int(pk) for pk in str(data).split(",")]
+        except ValueError:
+            self.fail("invalid")
+
+    def to_representation(self, value):
+        return ",".join(map(str, value))
+
+
+class FlightFilterSerializer(serializers.Serializer):
+    date = serializers.DateField(required=False)
+    route = serializers.IntegerField(required=False)
+    crews = IdListField(required=False)
+
+
+class ExportFilterSerializer(FlightFilterSerializer):
+    flight = serializers.IntegerField(required=False)
+
+
+class OrderFlightField(serializers.PrimaryKeyRelatedField):
+    """Resolves flights from the ones OrderSerializer prefetched for the whole order.
+
+    A FlightSchedule occurrence id resolves to the Flight of that occurrence,
+    unsaved until OrderSerializer books it (see ``FlightSchedule.occurrence``).
+    """
+
+    def to_internal_value(self, data):
+        occurrence = FlightSchedule.parse_occurrence_id(data) if isinstance(data, str) else None
+        if occurrence is not None:
+            schedule_id, date = occurrence
+            schedule = FlightSchedule.objects.select_related("airplane").filter(pk=schedule_id).first()
+            if schedule is None or not schedule.runs_on(date):
+                self.fail("does_not_exist", pk_value=data)
+            return schedule.occurrence(date)
+
+        flights = self.context.get("prefetched_flights", {})
+        try:
+            return flights[int(data)]
+        except (KeyError, TypeError, ValueError):
+            return super().to_internal_value(data)
+
+
 class TicketSerializer(serializers.ModelSerializer):
+    flight = OrderFlightField(queryset=Flight.objects.select_related("airplane"))
+
     def validate(self, attrs):
         data = super(TicketSerializer, self).validate(attrs)
         Ticket.validate_ticket(
             attrs["row"],
             attrs["seat"],
             serializers.ValidationError,
+            attrs["flight"].airplane,
         )
         return data
 
     class Meta:
         model = Ticket
         fields = ("id", "row", "seat", "flight")
+        # Seat uniqueness is checked for the whole order at once in OrderSerializer.
+        validators = []
 
 
 class TicketListSerializer(TicketSerializer):
@@ -121,20 +499,159 @@ class TicketListSerializer(TicketSerializer):
         fields = ("id", "row", "seat", "flight")
 
 
-class OrderSerializer(serializers.ModelSerializer):
+# serialization_failure and deadlock_detected: the transaction can simply be run again.
+RETRYABLE_SQLSTATES = {"40001", "40P01"}
+BOOKING_ATTEMPTS = 3
+
+
+class BookingConflict(exceptions.APIException):
+    status_code = status.HTTP_409_CONFLICT
+    default_detail = "The seats could not be booked because of concurrent bookings, please try again."
+    default_code = "booking_conflict"
+
+
+class SeatsValidationMixin:
+    """Validates the ``tickets`` of an order or a hold against sold and held seats."""
+
+    def to_internal_value(self, data):
+        self.context["prefetched_flights"] = self._prefetch_flights(data)
+        return super().to_internal_value(data)
+
+    @staticmethod
+    def _prefetch_flights(data):
+        tickets = data.get("tickets") if hasattr(data, "get") else None
+        if not isinstance(tickets, list):
+            return {}
+
+        flight_ids = set()
+        for ticket in tickets:
+            try:
+                flight_ids.add(int(ticket["flight"]))
+            except (KeyError, TypeError, ValueError):
+                continue
+        return Flight.objects.select_related("airplane").in_bulk(flight_ids)
+
+    @staticmethod
+    def _seats(tickets):
+        return [(ticket["flight"].id, ticket["row"], ticket["seat"]) for ticket in tickets]
+
+    def validate_tickets(self, tickets):
+        # Unsaved schedule occurrences have no seats sold or held yet.
+        booked = [
+            (ticket["flight"].pk or ticket["flight"].occurrence_id, ticket["row"], ticket["seat"])
+            for ticket in tickets
+        ]
+        if len(set(booked)) != len(booked):
+            raise serializers.ValidationError("The same seat is booked more than once in this order")
+
+        seats = self._seats(ticket for ticket in tickets if ticket["flight"].pk is not None)
+        taken = Ticket.taken_seats(seats)
+        if taken:
+            raise serializers.ValidationError(Ticket.format_seats(taken))
+
+        request = self.context.get("request")
+        held = SeatHold.held_by_others(seats, getattr(request, "user", None))
+        if held:
+            raise serializers.ValidationError(SeatHold.format_seats(held))
+        return tickets
+
+
+class OrderSerializer(SeatsValidationMixin, serializers.ModelSerializer):
     tickets = TicketSerializer(read_only=False, many=True, allow_empty=False)
     class Meta:
         model = Order
         fields = ("id", "tickets", "created_at")
 
     def create(self, validated_data):
-        with transaction.atomic():
-            tickets = validated_data.pop("tickets")
-            order = Order.objects.create(**validated_data)
-            for ticket in tickets:
-                Ticket.objects.create(order=order, **ticket)
+        tickets = validated_data.pop("tickets")
+        # A failed transaction can only be retried when it is the outermost one.
+        attempts = 1 if transaction.get_connection().in_atomic_block else BOOKING_ATTEMPTS
+
+        for attempt in range(1, attempts + 1):
+            try:
+                with transaction.atomic():
+                    return self._book(validated_data, tickets)
+            except IntegrityError:
+                taken = Ticket.taken_seats(
+                    self._seats(ticket for ticket in tickets if ticket["flight"].pk is not None)
+                )
+                raise serializers.ValidationError(
+                    {"tickets": Ticket.format_seats(taken) or ["Some of the seats have just been booked"]}
+                )
+            except OperationalError as error:
+                if getattr(error.__cause__, "sqlstate", None) not in RETRYABLE_SQLSTATES:
+                    raise
+                if attempt == attempts:
+                    raise BookingConflict()
+
+    @staticmethod
+    def _materialize(tickets):
+        """Return ``tickets`` with the schedule occurrences they book created as Flights."""
+        flights = {}
+        materialized = []
+        for ticket in tickets:
+            flight = ticket["flight"]
+            if flight.pk is None:
+                if flight.occurrence_id not in flights:
+                    _, date = FlightSchedule.parse_occurrence_id(flight.occurrence_id)
+                    try:
+                        flights[flight.occurrence_id] = flight.schedule.materialize(date)
+                    except serializers.ValidationError as error:
+                        raise serializers.ValidationError({"tickets": error.detail})
+                flight = flights[flight.occurrence_id]
+            materialized.append({**ticket, "flight": flight})
+        return materialized
+
+    @classmethod
+    def _book(cls, validated_data, tickets):
+        # Occurrences are created here, so a rejected or failed order leaves no Flight behind.
+        tickets = cls._materialize(tickets)
+        seats = cls._seats(tickets)
+        # Seats are checked again under the flight locks, so conflicting orders are
+        # turned away with the taken seats rather than failing on the unique index.
+        Flight.lock({flight_id for flight_id, _, _ in seats})
+        taken = Ticket.taken_seats(seats)
+        if taken:
+            raise serializers.ValidationError({"tickets": Ticket.format_seats(taken)})
+
+        order = Order.objects.create(**validated_data)
+        Ticket.objects.bulk_create(
+            [Ticket(order=order, **ticket) for ticket in tickets]
+        )
+        Flight.add_seats_sold(Counter(flight_id for flight_id, _, _ in seats))
+        return order
+
+
+class SeatHoldSerializer(SeatsValidationMixin, serializers.Serializer):
+    id = serializers.CharField(source="token", read_only=True)
+    tickets = TicketSerializer(many=True, allow_empty=False)
+    expires_at = serializers.DateTimeField(read_only=True)
+
+    def validate_tickets(self, tickets):
+        unbooked = sorted({ticket["flight"].occurrence_id for ticket in tickets if ticket["flight"].pk is None})
+        if unbooked:
+            raise serializers.ValidationError([
+                f"Seats on flight {occurrence_id} can only be held once its first seat is booked"
+                for occurrence_id in unbooked
+            ])
+        return super(SeatHoldSerializer, self).validate_tickets(tickets)
+
+    def create(self, validated_data):
+        try:
+            return SeatHold.create(self.context["request"].user, self._seats(validated_data["tickets"]))
+        except SeatsHeld as error:
+            raise serializers.ValidationError({"tickets": SeatHold.format_seats(error.seats)})
+
+    def to_representation(self, instance):
+        return {
+            "id": instance.token,
+            "tickets": [
+                {"row": row, "seat": seat, "flight": flight_id}
+                for flight_id, row, seat in instance.seats
+            ],
+            "expires_at": self.fields["expires_at"].to_representation(instance.expires_at),
+        }
 
-            return order
 
 class OrderListSerializer(OrderSerializer):
     tickets = TicketListSerializer(read_only=True, many=True)
@@ -0,0 +1,126 @@
+from django.db.models.signals import pre_save, post_save, pre_delete, post_delete, m2m_changed
+from django.dispatch import receiver
+
+from airport.boards import refresh_boards, stored_flight_boards
+from airport.cache import bump_version
+from airport.intervals import crew_roster, airplane_schedule
+from airport.itineraries import SCHEDULE_VERSION
+from airport.models import Airport, AirplaneType, Airplane, Route, Crew, Flight, FlightSchedule, Ticket
+
+# Models whose change versions key cached responses and ETags (see airport.cache).
+# Ticket changes bump SEATS_SOLD_VERSION through Flight.add_seats_sold.
+VERSIONED_MODELS = (Airport, AirplaneType, Airplane, Route, Crew, Flight, FlightSchedule)
+
+# Models the itinerary index is built from, see airport.itineraries.
+SCHEDULE_MODELS = (Airport, Route, Airplane, Flight, FlightSchedule)
+
+
+@receiver(pre_save, sender=Ticket)
+def remember_ticket_flight(sender, instance, **kwargs):
+    instance._previous_flight_id = None
+    if instance.pk and not kwargs.get("raw"):
+        instance._previous_flight_id = (
+            Ticket.objects.filter(pk=instance.pk).values_list("flight_id", flat=True).first()
+        )
+
+
+@receiver(post_save, sender=Ticket)
+def count_saved_ticket(sender, instance, created, **kwargs):
+    if kwargs.get("raw"):
+        return
+    if created:
+        Flight.add_seats_sold({instance.flight_id: 1})
+        return
+
+    previous_flight_id = getattr(instance, "_previous_flight_id", None)
+    if previous_flight_id and previous_flight_id != instance.flight_id:
+        Flight.add_seats_sold({previous_flight_id: -1, instance.flight_id: 1})
+
+
+@receiver(post_delete, sender=Ticket)
+def count_deleted_ticket(sender, instance, **kwargs):
+    Flight.add_seats_sold({instance.flight_id: -1})
+
+
+@receiver(pre_save, sender=Flight)
+def remember_flight_boards(sender, instance, **kwargs):
+    instance._previous_boards = set()
+    if instance.pk and not kwargs.get("raw"):
+        instance._previous_boards = stored_flight_boards(instance.pk)
+
+
+@receiver(post_save, sender=Flight)
+def refresh_saved_flight_boards(sender, instance, **kwargs):
+    if not kwargs.get("raw"):
+        refresh_boards(getattr(instance, "_previous_boards", set()) | stored_flight_boards(instance.pk))
+
+
+@receiver(pre_delete, sender=Flight)
+def refresh_deleted_flight_boards(sender, instance, **kwargs):
+    refresh_boards(stored_flight_boards(instance.pk))
+
+
+def bump_model_version(sender, **kwargs):
+    bump_version(sender)
+
+
+for model in VERSIONED_MODELS:
+    post_save.connect(bump_model_version, sender=model)
+    post_delete.connect(bump_model_version, sender=model)
+
+
+def bump_schedule_version(sender, **kwargs):
+    bump_version(SCHEDULE_VERSION)
+
+
+for model in SCHEDULE_MODELS:
+    post_save.connect(bump_schedule_version, sender=model)
+    post_delete.connect(bump_schedule_version, sender=model)
+
+
+@receiver(pre_save, sender=Flight)
+def remember_flight_airplane(sender, instance, **kwargs):
+    instance._previous_airplane_id = None
+    if instance.pk and not kwargs.get("raw"):
+        instance._previous_airplane_id = (
+            Flight.objects.filter(pk=instance.pk).values_list("airplane_id", flat=True).first()
+        )
+
+
+@receiver(post_save, sender=Flight)
+def bump_saved_flight_intervals(sender, instance, created, **kwargs):
+    airplane_schedule.bump({instance.airplane_id, getattr(instance, "_previous_airplane_id", None)} - {None})
+    # A new flight has no crew yet; adding it is handled by bump_flight_crews_version.
+    if not created:
+        crew_roster.bump(instance.crews.values_list("id", flat=True))
+
+
+@receiver(pre_delete, sender=Flight)
+def remember_deleted_flight_crews(sender, instance, **kwargs):
+    instance._crew_ids = list(instance.crews.values_list("id", flat=True))
+
+
+@receiver(post_delete, sender=Flight)
+def bump_deleted_flight_intervals(sender, instance, **kwargs):
+    airplane_schedule.bump([instance.airplane_id])
+    crew_roster.bump(getattr(instance, "_crew_ids", []))
+
+
+@receiver(m2m_changed, sender=Flight.crews.through)
+def bump_flight_crews_version(sender, instance, action, reverse, pk_set, **kwargs):
+    if action == "pre_clear" and not reverse:
+        instance._cleared_crew_ids = list(instance.crews.values_list("id", flat=True))
+    if action in ("post_add", "post_remove", "post_clear"):
+        bump_version(Flight)
+        if reverse:
+            crew_roster.bump([instance.pk])
+        elif action == "post_clear":
+            crew_roster.bump(getattr(instance, "_cleared_crew_ids", []))
+        else:
+            crew_roster.bump(pk_set)
+
+
+@receiver(m2m_changed, sender=FlightSchedule.crews.through)
+def bump_schedule_crews_version(sender, action, **kwargs):
+    if action in ("post_add", "post_remove", "post_clear"):
+        bump_version(FlightSchedule)
@@ -1,4 +1,5 @@
 import os
+import shutil
 import tempfile
 
 from PIL import Image
@@ -6,7 +7,7 @@ from django.urls import reverse
 from rest_framework import status
 from rest_framework.test import APIClient
 from django.contrib.auth import get_user_model
-from django.test import TestCase
+from django.test import TestCase, override_settings
 
 from airport.models import Airplane, AirplaneType
 from airport.serializers import AirplaneListSerializer, AirplaneDetailSerializer
@@ -40,6 +41,12 @@ def detail_url(airplane_id):
 
 class AirplaneImageUploadTests(TestCase):
     def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root, ignore_errors=True)
+        media_settings = override_settings(MEDIA_ROOT=media_root)
+        media_settings.enable()
+        self.addCleanup(media_settings.disable)
+
         self.client = APIClient()
         self.user = get_user_model().objects.create_superuser(
             email="admin@test.com", password="password"
@@ -84,6 +91,20 @@ class AirplaneImageUploadTests(TestCase):
         res = self.client.get(detail_url(self.airplane.id))
         self.assertIn("image", res.data)
 
+    @override_settings(DEBUG=False)
+    def test_uploaded_image_is_served_without_debug(self):
+        url = image_upload_url(self.airplane.id)
+        with tempfile.NamedTemporaryFile(suffix=".jpg") as ntf:
+            img = Image.new("RGB", (10, 10))
+            img.save(ntf, format="JPEG")
+            ntf.seek(0)
+            self.client.post(url, {"image": ntf}, format="multipart")
+        self.airplane.refresh_from_db()
+
+        res = self.client.get(self.airplane.image.url)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res["Content-Type"], "image/jpeg")
+
 class UnauthorizedAirplaneTests(TestCase):
     def setUp(self):
         self.client = APIClient()
@@ -0,0 +1,135 @@
+import io
+import random
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command, CommandError
+from django.test import TestCase, SimpleTestCase
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from airport.intervals import overlapping_pairs
+from airport.models import Flight
+from airport.tests.test_flight_api import sample_route, sample_airplane, sample_flight, sample_crew
+
+FLIGHT_URL = reverse("airport:flight-list")
+FLIGHT_DETAIL_URL = lambda pk: reverse("airport:flight-detail", args=[pk])
+IMPORT_URL = reverse("airport:flight-import")
+
+
+class OverlappingPairsTests(SimpleTestCase):
+    def test_matches_brute_force(self):
+        rng = random.Random(3)
+        intervals = []
+        for key in range(200):
+            start = rng.randrange(2000)
+            intervals.append((start, start + rng.randrange(1, 30), key))
+
+        expected = {
+            frozenset((first[2], second[2]))
+            for index, first in enumerate(intervals)
+            for second in intervals[index + 1:]
+            if first[0] < second[1] and second[0] < first[1]
+        }
+        found = [frozenset((first[2], second[2])) for first, second in overlapping_pairs(intervals)]
+        self.assertEqual(len(found), len(expected))
+        self.assertEqual(set(found), expected)
+
+    def test_touching_intervals_do_not_overlap(self):
+        self.assertEqual(list(overlapping_pairs([(0, 10, "a"), (10, 20, "b")])), [])
+
+
+class AirplaneConflictTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        self.client = APIClient()
+        self.admin = get_user_model().objects.create_user(
+            email="admin@test.com", password="adminpass", is_staff=True
+        )
+        self.client.force_authenticate(self.admin)
+
+        self.start = (timezone.now() + timedelta(days=1)).replace(hour=8, minute=0, second=0, microsecond=0)
+        self.route = sample_route()
+        self.airplane = sample_airplane(name="Dreamliner")
+        self.flight = sample_flight(
+            route=self.route,
+            airplane=self.airplane,
+            departure_time=self.start,
+            arrival_time=self.start + timedelta(hours=3),
+        )
+
+    def at(self, hours):
+        return self.start + timedelta(hours=hours)
+
+    def payload(self, departure_hours, arrival_hours, airplane=None):
+        return {
+            "route": self.route.id,
+            "airplane": (airplane or self.airplane).id,
+            "departure_time": self.at(departure_hours).isoformat(),
+            "arrival_time": self.at(arrival_hours).isoformat(),
+            "crews": [sample_crew().id],
+        }
+
+    def test_overlapping_flight_rejected(self):
+        res = self.client.post(FLIGHT_URL, self.payload(2, 5), format="json")
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST, res.data)
+        self.assertIn(f"Dreamliner already flies flight {self.flight.id}", res.data["airplane"][0])
+
+        res = self.client.post(FLIGHT_URL, self.payload(3, 5), format="json")
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED, res.data)
+        res = self.client.post(FLIGHT_URL, self.payload(2, 5, sample_airplane()), format="json")
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED, res.data)
+
+    def test_update_ignores_the_flight_itself(self):
+        res = self.client.patch(
+            FLIGHT_DETAIL_URL(self.flight.id), {"arrival_time": self.at(4).isoformat()}, format="json"
+        )
+        self.assertEqual(res.status_code, status.HTTP_200_OK, res.data)
+
+        other = sample_flight(route=self.route, airplane=sample_airplane(), departure_time=self.at(1),
+                              arrival_time=self.at(2))
+        res = self.client.patch(FLIGHT_DETAIL_URL(other.id), {"airplane": self.airplane.id}, format="json")
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_import_skips_double_booked_rows(self):
+        body = "route,airplane,departure_time,arrival_time\n" + "".join(
+            f"{self.route.id},{self.airplane.id},{self.at(departure).isoformat()},{self.at(arrival).isoformat()}\n"
+            for departure, arrival in ((1, 2), (3, 5), (4, 6), (6, 7), (5.5, 6.5))
+        )
+        res = self.client.post(IMPORT_URL, data=body, content_type="text/csv")
+        self.assertEqual((res.data["created"], res.data["invalid"]), (2, 3))
+        self.assertEqual(
+            [error["error"] for error in res.data["errors"]],
+            [
+                f"Airplane {self.airplane.id} already flies flight {self.flight.id} at that time",
+                f"Airplane {self.airplane.id} already flies the flight on line 3 at that time",
+                f"Airplane {self.airplane.id} already flies the flight on line 5 at that time",
+            ],
+        )
+
+    def test_conflicts_report(self):
+        out = io.StringIO()
+        call_command("find_airplane_conflicts", stdout=out)
+        self.assertIn("0 conflicts in 1 flights", out.getvalue())
+
+        # Written around FlightSerializer, like data that predates the check.
+        overlapping = Flight.objects.create(
+            route=self.route, airplane=self.airplane, departure_time=self.at(2), arrival_time=self.at(4)
+        )
+        out = io.StringIO()
+        call_command("find_airplane_conflicts", stdout=out)
+        self.assertIn(f"flight {self.flight.id}", out.getvalue())
+        self.assertIn(f"overlaps flight {overlapping.id}", out.getvalue())
+        self.assertIn("1 conflicts in 2 flights", out.getvalue())
+
+        with self.assertRaises(CommandError):
+            call_command("find_airplane_conflicts", "--fail", stdout=io.StringIO())
+
+        out = io.StringIO()
+        call_command("find_airplane_conflicts", "--since", (self.start + timedelta(days=1)).date().isoformat(),
+                     stdout=out)
+        self.assertIn("0 conflicts in 0 flights", out.getvalue())
@@ -1,13 +1,27 @@
+import threading
+from io import StringIO
+from unittest import mock, skipUnless
+
+import psycopg
 from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection, OperationalError
+from django.test import TransactionTestCase
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
+from rest_framework.exceptions import ValidationError
 from rest_framework.test import APITestCase, APIClient
-from airport.models import Airport, Route, Flight, Ticket, Order, Airplane, AirplaneType
+from airport.models import Airport, Route, Flight, Ticket, Order, Airplane, AirplaneType, Crew
+from airport.serializers import OrderSerializer, BookingConflict
 
 User = get_user_model()
 URL = reverse("airport:order-list")
 
 class OrderApiTests(APITestCase):
     def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
         self.client = APIClient()
         self.user = User.objects.create_user(
             email="user@example.com", password="testpass123"
@@ -79,4 +93,246 @@ class OrderApiTests(APITestCase):
         res = self.client.get(URL)
         self.assertEqual(res.status_code, 200)
         self.assertEqual(len(res.data), 1)
-        self.assertEqual(res.data[0]["id"], order.id)
\ No newline at end of file
+        self.assertEqual(res.data[0]["id"], order.id)
+
+    def test_create_order_with_taken_seat(self):
+        order = Order.objects.create(user=self.other_user)
+        Ticket.objects.create(order=order, flight=self.flight, row=1, seat=2)
+        payload = {
+            "tickets": [
+                {"row": 1, "seat": 2, "flight": self.flight.id},
+                {"row": 1, "seat": 3, "flight": self.flight.id},
+            ]
+        }
+        res = self.client.post(URL, payload, format="json")
+        self.assertEqual(res.status_code, 400)
+        self.assertEqual(
+            res.data["tickets"],
+            [f"Seat 1: 2 on flight {self.flight.id} is already taken"],
+        )
+        self.assertEqual(Order.objects.filter(user=self.user).count(), 0)
+
+    def test_create_order_with_duplicated_seat(self):
+        payload = {
+            "tickets": [
+                {"row": 1, "seat": 2, "flight": self.flight.id},
+                {"row": 1, "seat": 2, "flight": self.flight.id},
+            ]
+        }
+        res = self.client.post(URL, payload, format="json")
+        self.assertEqual(res.status_code, 400)
+        self.assertEqual(Ticket.objects.count(), 0)
+
+    def test_create_order_race_returns_conflicting_seats(self):
+        serializer = OrderSerializer()
+        Ticket.objects.create(
+            order=Order.objects.create(user=self.other_user),
+            flight=self.flight,
+            row=4,
+            seat=4,
+        )
+        with self.assertRaises(ValidationError) as context:
+            serializer.create({
+                "user": self.user,
+                "tickets": [
+                    {"row": 4, "seat": 4, "flight": self.flight},
+                    {"row": 4, "seat": 5, "flight": self.flight},
+                ],
+            })
+        self.assertEqual(
+            context.exception.detail["tickets"],
+            [f"Seat 4: 4 on flight {self.flight.id} is already taken"],
+        )
+        self.assertEqual(Order.objects.filter(user=self.user).count(), 0)
+
+    def test_create_order_outside_airplane_capacity(self):
+        payload = {
+            "tickets": [
+                {"row": 21, "seat": 1, "flight": self.flight.id},
+            ]
+        }
+        res = self.client.post(URL, payload, format="json")
+        self.assertEqual(res.status_code, 400)
+
+        payload["tickets"] = [{"row": 1, "seat": 7, "flight": self.flight.id}]
+        res = self.client.post(URL, payload, format="json")
+        self.assertEqual(res.status_code, 400)
+        self.assertEqual(Ticket.objects.count(), 0)
+
+    def test_create_order_query_count_does_not_grow_with_tickets(self):
+        def post_order(rows):
+            payload = {
+                "tickets": [
+                    {"row": row, "seat": seat, "flight": self.flight.id}
+                    for row in rows
+                    for seat in range(1, 7)
+                ]
+            }
+            with CaptureQueriesContext(connection) as queries:
+                res = self.client.post(URL, payload, format="json")
+            self.assertEqual(res.status_code, 201)
+            return len(queries)
+
+        self.assertEqual(post_order([1]), post_order(range(2, 12)))
+
+    def test_order_list_query_count_is_constant(self):
+        crew = Crew.objects.create(first_name="Alice", last_name="Smith")
+        self.flight.crews.add(crew)
+        order = Order.objects.create(user=self.user)
+        Ticket.objects.create(order=order, flight=self.flight, row=1, seat=1)
+
+        with self.assertNumQueries(3):
+            res = self.client.get(URL)
+        self.assertEqual(res.status_code, 200)
+
+        other_flight = Flight.objects.create(
+            route=self.route,
+            airplane=self.airplane,
+            departure_time="2025-09-25T12:00:00Z",
+            arrival_time="2025-09-25T14:00:00Z",
+        )
+        other_flight.crews.add(crew)
+        for row in range(2, 12):
+            order = Order.objects.create(user=self.user)
+            Ticket.objects.create(order=order, flight=self.flight, row=row, seat=1)
+            Ticket.objects.create(order=order, flight=other_flight, row=row, seat=2)
+
+        with self.assertNumQueries(3):
+            res = self.client.get(URL)
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(len(res.data), 11)
+        self.assertEqual(res.data[0]["tickets"][0]["flight"]["final_place"], "Berlin")
+
+    def test_order_list_cursor_pagination(self):
+        orders = [Order.objects.create(user=self.user) for _ in range(3)]
+
+        res = self.client.get(f"{URL}?pagination=cursor&page_size=2")
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(
+            [order["id"] for order in res.data["results"]],
+            [orders[2].id, orders[1].id],
+        )
+
+        res = self.client.get(res.data["next"])
+        self.assertEqual([order["id"] for order in res.data["results"]], [orders[0].id])
+        self.assertIsNone(res.data["next"])
+
+    def test_seats_sold_follows_orders(self):
+        payload = {
+            "tickets": [
+                {"row": 1, "seat": 2, "flight": self.flight.id},
+                {"row": 1, "seat": 3, "flight": self.flight.id},
+            ]
+        }
+        res = self.client.post(URL, payload, format="json")
+        self.flight.refresh_from_db()
+        self.assertEqual(self.flight.seats_sold, 2)
+
+        Ticket.objects.create(order=Order.objects.create(user=self.user), flight=self.flight, row=2, seat=1)
+        self.flight.refresh_from_db()
+        self.assertEqual(self.flight.seats_sold, 3)
+
+        res = self.client.delete(reverse("airport:order-detail", args=[res.data["id"]]))
+        self.assertEqual(res.status_code, 204)
+        self.flight.refresh_from_db()
+        self.assertEqual(self.flight.seats_sold, 1)
+
+    def test_cannot_cancel_other_user_order(self):
+        order = Order.objects.create(user=self.other_user)
+        res = self.client.delete(reverse("airport:order-detail", args=[order.id]))
+        self.assertEqual(res.status_code, 404)
+        self.assertTrue(Order.objects.filter(id=order.id).exists())
+
+    def test_reconcile_seats_sold_command(self):
+        order = Order.objects.create(user=self.user)
+        Ticket.objects.bulk_create([
+            Ticket(order=order, flight=self.flight, row=row, seat=1) for row in range(1, 6)
+        ])
+        self.flight.refresh_from_db()
+        self.assertEqual(self.flight.seats_sold, 0)
+
+        call_command("reconcile_seats_sold", stdout=StringIO())
+        self.flight.refresh_from_db()
+        self.assertEqual(self.flight.seats_sold, 5)
+
+
+def serialization_failure():
+    error = OperationalError("could not serialize access due to concurrent update")
+    error.__cause__ = psycopg.errors.SerializationFailure()
+    return error
+
+
+class ConcurrentBookingTests(TransactionTestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(email="user@example.com", password="testpass123")
+        route = Route.objects.create(
+            source=Airport.objects.create(name="Boryspil Airport", closest_big_city="Kyiv"),
+            destination=Airport.objects.create(name="Berlin Tegel", closest_big_city="Berlin"),
+            distance=1200,
+        )
+        airplane = Airplane.objects.create(
+            name="Boeing 737",
+            rows=20,
+            seats_in_row=6,
+            airplane_type=AirplaneType.objects.create(name="Boryspil Airplane"),
+        )
+        self.flight = Flight.objects.create(
+            route=route,
+            airplane=airplane,
+            departure_time="2025-09-24T12:00:00Z",
+            arrival_time="2025-09-24T14:00:00Z",
+        )
+
+    def create_order(self, *seats):
+        return OrderSerializer().create({
+            "user": self.user,
+            "tickets": [{"row": row, "seat": seat, "flight": self.flight} for row, seat in seats],
+        })
+
+    def test_serialization_failure_is_retried(self):
+        with mock.patch.object(Flight, "lock", side_effect=[serialization_failure(), [self.flight.id]]):
+            order = self.create_order((1, 1))
+        self.assertEqual(order.tickets.count(), 1)
+        self.flight.refresh_from_db()
+        self.assertEqual(self.flight.seats_sold, 1)
+
+    def test_retries_are_bounded(self):
+        with mock.patch.object(Flight, "lock", side_effect=serialization_failure()) as lock:
+            with self.assertRaises(BookingConflict):
+                self.create_order((1, 1))
+        self.assertEqual(lock.call_count, 3)
+        self.assertFalse(Order.objects.exists())
+
+    def test_other_operational_errors_are_not_retried(self):
+        with mock.patch.object(Flight, "lock", side_effect=OperationalError("connection lost")) as lock:
+            with self.assertRaises(OperationalError):
+                self.create_order((1, 1))
+        self.assertEqual(lock.call_count, 1)
+
+    @skipUnless(connection.vendor == "postgresql", "Needs concurrent transactions")
+    def test_concurrent_bookings_of_the_same_seats(self):
+        workers = 8
+        barrier = threading.Barrier(workers)
+        outcomes = []
+
+        def book(index):
+            barrier.wait()
+            try:
+                self.create_order((1, 1), (index + 2, 1))
+                outcomes.append("booked")
+            except ValidationError as error:
+                outcomes.append(error.detail["tickets"])
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=book, args=(index,)) for index in range(workers)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        conflict = [f"Seat 1: 1 on flight {self.flight.id} is already taken"]
+        self.assertEqual(outcomes.count("booked"), 1)
+        self.assertEqual(outcomes.count(conflict), workers - 1)
+        self.flight.refresh_from_db()
+        self.assertEqual(self.flight.seats_sold, Ticket.objects.filter(flight=self.flight).count())
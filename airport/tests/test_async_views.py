@@ -0,0 +1,138 @@
+from datetime import timedelta, time
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from airport.models import FlightSchedule
+from airport.tests.test_flight_api import sample_flight, sample_crew, sample_airport, sample_route, \
+    sample_airplane
+
+ASYNC_FLIGHT_URL = reverse("airport:async-flight-list")
+ASYNC_DETAIL_URL = lambda pk: reverse("airport:async-flight-detail", args=[pk])
+ASYNC_AIRPORT_URL = reverse("airport:async-airport-list")
+ASYNC_ROUTE_URL = reverse("airport:async-route-list")
+
+
+class UnauthorizedAsyncViewTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        self.client = APIClient()
+
+    def test_auth_required(self):
+        res = self.client.get(ASYNC_FLIGHT_URL)
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_invalid_token(self):
+        self.client.credentials(HTTP_AUTHORIZATION="Bearer invalid")
+        res = self.client.get(ASYNC_FLIGHT_URL)
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+
+class AsyncViewTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(email="user@test.com", password="testpass")
+        token = RefreshToken.for_user(self.user).access_token
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {token}")
+
+        self.crew = sample_crew()
+        self.flights = [
+            sample_flight(
+                departure_time=timezone.now() + timedelta(days=day),
+                arrival_time=timezone.now() + timedelta(days=day, hours=2),
+            )
+            for day in range(5)
+        ]
+        self.flights[0].crews.add(self.crew)
+
+    def assertSameAsSync(self, async_url, sync_url):
+        async_res = self.client.get(async_url)
+        sync_res = self.client.get(sync_url)
+        self.assertEqual(async_res.status_code, status.HTTP_200_OK)
+        self.assertEqual(async_res.json(), sync_res.json())
+
+    def test_flight_list_matches_sync(self):
+        async_res = self.client.get(ASYNC_FLIGHT_URL)
+        sync_res = self.client.get(reverse("airport:flight-list"))
+        self.assertEqual(async_res.status_code, status.HTTP_200_OK)
+        self.assertEqual(async_res.json()["count"], sync_res.json()["count"])
+        self.assertEqual(async_res.json()["results"], sync_res.json()["results"])
+
+    def test_flight_list_pages_match_sync(self):
+        query = "?page=2&page_size=2"
+        async_res = self.client.get(ASYNC_FLIGHT_URL + query)
+        sync_res = self.client.get(reverse("airport:flight-list") + query)
+        self.assertEqual(async_res.json()["results"], sync_res.json()["results"])
+        self.assertEqual(async_res.json()["count"], 5)
+        self.assertIn("page=3", async_res.json()["next"])
+        self.assertNotIn("page=", async_res.json()["previous"])
+
+    def test_flight_list_invalid_page(self):
+        res = self.client.get(ASYNC_FLIGHT_URL + "?page=10")
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_flight_list_filters_match_sync(self):
+        query = f"?crews={self.crew.id}"
+        async_res = self.client.get(ASYNC_FLIGHT_URL + query)
+        sync_res = self.client.get(reverse("airport:flight-list") + query)
+        self.assertEqual(async_res.json()["results"], sync_res.json()["results"])
+        self.assertEqual(async_res.json()["count"], 1)
+
+    def test_flight_list_includes_schedule_occurrences(self):
+        today = timezone.localdate()
+        schedule = FlightSchedule.objects.create(
+            route=sample_route(),
+            airplane=sample_airplane(),
+            weekdays="1234567",
+            departure_time=time(12, 0),
+            duration=timedelta(hours=2),
+            valid_from=today,
+            valid_until=today,
+        )
+        query = f"?date={today.isoformat()}&page_size=10"
+        async_res = self.client.get(ASYNC_FLIGHT_URL + query)
+        sync_res = self.client.get(reverse("airport:flight-list") + query)
+        self.assertEqual(async_res.status_code, status.HTTP_200_OK)
+        self.assertEqual(async_res.json(), sync_res.json())
+        self.assertIn(
+            FlightSchedule.occurrence_id(schedule.id, today),
+            [flight["id"] for flight in async_res.json()["results"]],
+        )
+
+    def test_flight_detail_matches_sync(self):
+        flight = self.flights[0]
+        self.assertSameAsSync(
+            ASYNC_DETAIL_URL(flight.id), reverse("airport:flight-detail", args=[flight.id])
+        )
+
+    def test_flight_detail_not_found(self):
+        res = self.client.get(ASYNC_DETAIL_URL(0))
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_airport_search_matches_sync(self):
+        sample_airport(name="Heathrow", city="London")
+        self.assertSameAsSync(
+            ASYNC_AIRPORT_URL + "?city=lond", reverse("airport:airport-list") + "?city=lond"
+        )
+
+    def test_route_search(self):
+        route = sample_route(
+            source=sample_airport(name="Heathrow", city="London"),
+            destination=sample_airport(name="Orly", city="Paris"),
+        )
+        res = self.client.get(ASYNC_ROUTE_URL + "?source=london&destination=paris")
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual([item["id"] for item in res.json()], [route.id])
+
+    def test_write_methods_not_allowed(self):
+        res = self.client.post(ASYNC_FLIGHT_URL, {})
+        self.assertEqual(res.status_code, status.HTTP_405_METHOD_NOT_ALLOWED)
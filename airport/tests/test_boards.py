@@ -0,0 +1,151 @@
+from datetime import time, timedelta
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from airport.boards import DEPARTURES, build_board, get_board
+from airport.models import Flight, Route, FlightSchedule
+from airport.tests.test_flight_api import sample_airport, sample_airplane
+
+DEPARTURES_URL = lambda pk: reverse("airport:airport-departures", args=[pk])
+ARRIVALS_URL = lambda pk: reverse("airport:airport-arrivals", args=[pk])
+
+
+class AirportBoardTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(email="user@test.com", password="testpass")
+        self.client.force_authenticate(self.user)
+
+        self.day = (timezone.now() + timedelta(days=1)).replace(hour=0, minute=0, second=0, microsecond=0)
+        self.airplane = sample_airplane()
+        self.kyiv = sample_airport("Boryspil", "Kyiv")
+        self.warsaw = sample_airport("Chopin", "Warsaw")
+        self.berlin = sample_airport("Tegel", "Berlin")
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.late = self.flight(self.kyiv, self.warsaw, 15, 17)
+            self.early = self.flight(self.kyiv, self.berlin, 9, 11)
+            self.inbound = self.flight(self.warsaw, self.kyiv, 12, 14)
+
+    def flight(self, source, destination, departure_hour, arrival_hour):
+        route, _ = Route.objects.get_or_create(source=source, destination=destination, defaults={"distance": 1000})
+        return Flight.objects.create(
+            route=route,
+            airplane=self.airplane,
+            departure_time=self.day + timedelta(hours=departure_hour),
+            arrival_time=self.day + timedelta(hours=arrival_hour),
+        )
+
+    def board(self, url, date=None):
+        res = self.client.get(url, {"date": (date or self.day).date().isoformat()})
+        self.assertEqual(res.status_code, status.HTTP_200_OK, res.data)
+        return [entry["flight"] for entry in res.data["flights"]]
+
+    def test_departures_ordered_by_departure_time(self):
+        self.assertEqual(self.board(DEPARTURES_URL(self.kyiv.id)), [self.early.id, self.late.id])
+
+    def test_arrivals(self):
+        self.assertEqual(self.board(ARRIVALS_URL(self.kyiv.id)), [self.inbound.id])
+
+        res = self.client.get(ARRIVALS_URL(self.warsaw.id), {"date": self.day.date().isoformat()})
+        self.assertEqual(res.data["airport"], self.warsaw.id)
+        entry = res.data["flights"][0]
+        self.assertEqual(entry["source"]["closest_big_city"], "Kyiv")
+        self.assertEqual(entry["destination"]["name"], "Chopin")
+        self.assertEqual(entry["airplane"], self.airplane.name)
+
+    def test_board_read_is_a_cache_lookup(self):
+        self.board(DEPARTURES_URL(self.kyiv.id))
+        with self.assertNumQueries(0):
+            self.assertEqual(self.board(DEPARTURES_URL(self.kyiv.id)), [self.early.id, self.late.id])
+
+    def test_saved_flight_refreshes_affected_boards(self):
+        self.board(DEPARTURES_URL(self.kyiv.id))
+        with self.captureOnCommitCallbacks(execute=True):
+            added = self.flight(self.kyiv, self.berlin, 12, 13)
+        with self.assertNumQueries(0):
+            self.assertEqual(
+                self.board(DEPARTURES_URL(self.kyiv.id)), [self.early.id, added.id, self.late.id]
+            )
+
+    def test_moved_flight_leaves_previous_board(self):
+        next_day = self.day + timedelta(days=1)
+        self.early.departure_time += timedelta(days=1)
+        self.early.arrival_time += timedelta(days=1)
+        self.early.route = Route.objects.create(source=self.warsaw, destination=self.berlin, distance=500)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.early.save()
+
+        self.assertEqual(self.board(DEPARTURES_URL(self.kyiv.id)), [self.late.id])
+        self.assertEqual(self.board(DEPARTURES_URL(self.warsaw.id), next_day), [self.early.id])
+
+    def test_deleted_flight_leaves_board(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.late.delete()
+        self.assertEqual(self.board(DEPARTURES_URL(self.kyiv.id)), [self.early.id])
+
+    def test_schedule_occurrences_listed_until_materialized(self):
+        date = self.day.date()
+        route = Route.objects.get(source=self.kyiv, destination=self.warsaw)
+        schedule = FlightSchedule.objects.create(
+            route=route,
+            airplane=sample_airplane(name="Scheduled"),
+            weekdays="1234567",
+            departure_time=time(22, 0),
+            duration=timedelta(hours=3),
+            valid_from=date,
+            valid_until=date,
+        )
+        occurrence = FlightSchedule.occurrence_id(schedule.id, date)
+        self.assertEqual(self.board(DEPARTURES_URL(self.kyiv.id)), [self.early.id, self.late.id, occurrence])
+        # It lands after midnight, on the next day's arrivals board.
+        self.assertEqual(self.board(ARRIVALS_URL(self.warsaw.id)), [self.late.id])
+        self.assertEqual(self.board(ARRIVALS_URL(self.warsaw.id), self.day + timedelta(days=1)), [occurrence])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            flight = schedule.materialize(date)
+        self.assertEqual(self.board(DEPARTURES_URL(self.kyiv.id)), [self.early.id, self.late.id, flight.id])
+        self.assertEqual(self.board(ARRIVALS_URL(self.warsaw.id), self.day + timedelta(days=1)), [flight.id])
+
+    def test_renamed_airport_invalidates_boards(self):
+        self.board(ARRIVALS_URL(self.warsaw.id))
+        self.kyiv.closest_big_city = "Kiev"
+        self.kyiv.save()
+        res = self.client.get(ARRIVALS_URL(self.warsaw.id), {"date": self.day.date().isoformat()})
+        self.assertEqual(res.data["flights"][0]["source"]["closest_big_city"], "Kiev")
+
+    def test_date_defaults_to_today_and_is_validated(self):
+        res = self.client.get(DEPARTURES_URL(self.kyiv.id))
+        self.assertEqual(res.data["date"], timezone.localdate().isoformat())
+
+        res = self.client.get(DEPARTURES_URL(self.kyiv.id), {"date": "tomorrow"})
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_unknown_airport_not_found(self):
+        res = self.client.get(DEPARTURES_URL(0))
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_board_built_before_a_write_does_not_replace_the_refresh(self):
+        stale = build_board(DEPARTURES, self.kyiv.id, self.day.date())
+        with self.captureOnCommitCallbacks(execute=True):
+            added = self.flight(self.kyiv, self.berlin, 12, 13)
+
+        # A reader that missed the cache before the commit stores its board late.
+        cache_get = cache.get
+
+        def board_miss(key, *args, **kwargs):
+            return None if key.startswith("board:") else cache_get(key, *args, **kwargs)
+
+        with mock.patch("airport.boards.build_board", return_value=stale), \
+                mock.patch.object(cache, "get", side_effect=board_miss):
+            get_board(DEPARTURES, self.kyiv.id, self.day.date())
+        self.assertEqual(self.board(DEPARTURES_URL(self.kyiv.id)), [self.early.id, added.id, self.late.id])
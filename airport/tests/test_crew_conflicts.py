@@ -0,0 +1,183 @@
+import random
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase, SimpleTestCase
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from airport.intervals import IntervalIndex, crew_roster
+from airport.tests.test_flight_api import sample_route, sample_airplane, sample_crew, sample_flight
+
+FLIGHT_URL = reverse("airport:flight-list")
+FLIGHT_DETAIL_URL = lambda pk: reverse("airport:flight-detail", args=[pk])
+ROSTER_URL = lambda pk: reverse("airport:crew-roster", args=[pk])
+IMPORT_URL = reverse("airport:flight-import")
+
+
+class IntervalIndexTests(SimpleTestCase):
+    def test_matches_brute_force(self):
+        rng = random.Random(7)
+        intervals = []
+        for key in range(300):
+            start = rng.randrange(1000)
+            intervals.append((start, start + rng.randrange(1, 50), key))
+        index = IntervalIndex(intervals)
+
+        for _ in range(300):
+            start = rng.randrange(-20, 1050)
+            end = start + rng.randrange(1, 40)
+            expected = sorted(
+                (interval for interval in intervals if interval[0] < end and interval[1] > start),
+                key=lambda interval: (interval[0], interval[1]),
+            )
+            self.assertEqual(index.overlapping(start, end), expected)
+            self.assertEqual(index.overlaps(start, end), bool(expected))
+
+    def test_touching_intervals_do_not_overlap(self):
+        index = IntervalIndex([(10, 20, "a")])
+        self.assertFalse(index.overlaps(20, 30))
+        self.assertFalse(index.overlaps(0, 10))
+        self.assertTrue(index.overlaps(19, 30))
+        self.assertFalse(IntervalIndex([]).overlaps(0, 10))
+
+
+class CrewConflictTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        self.client = APIClient()
+        self.admin = get_user_model().objects.create_user(
+            email="admin@test.com", password="adminpass", is_staff=True
+        )
+        self.client.force_authenticate(self.admin)
+
+        self.start = (timezone.now() + timedelta(days=1)).replace(hour=8, minute=0, second=0, microsecond=0)
+        self.route = sample_route()
+        self.airplane = sample_airplane()
+        self.pilot = sample_crew("Amelia", "Earhart")
+        self.copilot = sample_crew("Charles", "Lindbergh")
+        self.flight = sample_flight(
+            route=self.route,
+            airplane=self.airplane,
+            departure_time=self.start,
+            arrival_time=self.start + timedelta(hours=3),
+        )
+        self.flight.crews.add(self.pilot)
+
+    def payload(self, departure_hours, duration_hours, crews):
+        departure_time = self.start + timedelta(hours=departure_hours)
+        return {
+            "route": self.route.id,
+            "airplane": sample_airplane().id,
+            "departure_time": departure_time.isoformat(),
+            "arrival_time": (departure_time + timedelta(hours=duration_hours)).isoformat(),
+            "crews": [crew.id for crew in crews],
+        }
+
+    def test_overlapping_assignment_rejected(self):
+        res = self.client.post(FLIGHT_URL, self.payload(2, 2, [self.copilot, self.pilot]), format="json")
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(len(res.data["crews"]), 1)
+        self.assertIn(f"Amelia Earhart is already on flight {self.flight.id}", res.data["crews"][0])
+
+    def test_back_to_back_flights_allowed(self):
+        res = self.client.post(FLIGHT_URL, self.payload(3, 2, [self.pilot]), format="json")
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED, res.data)
+
+        res = self.client.post(FLIGHT_URL, self.payload(2, 2, [self.copilot]), format="json")
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED, res.data)
+
+    def test_update_checks_other_flights_only(self):
+        res = self.client.patch(
+            FLIGHT_DETAIL_URL(self.flight.id),
+            {"arrival_time": (self.start + timedelta(hours=4)).isoformat()},
+            format="json",
+        )
+        self.assertEqual(res.status_code, status.HTTP_200_OK, res.data)
+
+        other = sample_flight(
+            route=self.route,
+            airplane=sample_airplane(),
+            departure_time=self.start + timedelta(hours=5),
+            arrival_time=self.start + timedelta(hours=6),
+        )
+        res = self.client.patch(FLIGHT_DETAIL_URL(other.id), {"crews": [self.pilot.id]}, format="json")
+        self.assertEqual(res.status_code, status.HTTP_200_OK, res.data)
+        res = self.client.patch(
+            FLIGHT_DETAIL_URL(other.id),
+            {"departure_time": (self.start + timedelta(hours=3)).isoformat()},
+            format="json",
+        )
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("crews", res.data)
+
+    def test_roster_index_is_reused_until_assignments_change(self):
+        self.assertTrue(crew_roster.conflicts([self.pilot.id], self.start, self.start + timedelta(hours=1)))
+        with self.assertNumQueries(0):
+            crew_roster.conflicts([self.pilot.id], self.start, self.start + timedelta(hours=1))
+
+        self.flight.crews.remove(self.pilot)
+        self.assertEqual(crew_roster.conflicts([self.pilot.id], self.start, self.start + timedelta(hours=1)), {})
+
+    def test_only_changed_rosters_are_reloaded(self):
+        pilot_roster = crew_roster.get([self.pilot.id])[self.pilot.id]
+        other = sample_flight(
+            route=self.route,
+            airplane=sample_airplane(),
+            departure_time=self.start + timedelta(hours=5),
+            arrival_time=self.start + timedelta(hours=6),
+        )
+        other.crews.add(self.copilot)
+        other.departure_time -= timedelta(hours=1)
+        other.save()
+        self.assertIs(crew_roster.get([self.pilot.id])[self.pilot.id], pilot_roster)
+        self.assertEqual(len(crew_roster.get([self.copilot.id])[self.copilot.id]), 1)
+
+        window = (self.start, self.start + timedelta(hours=1))
+        self.flight.delete()
+        self.assertEqual(crew_roster.conflicts([self.pilot.id, self.copilot.id], *window), {})
+
+    def test_import_skips_rows_with_busy_crews(self):
+        rows = ((1, 2, [self.pilot]), (3, 5, [self.pilot]), (4, 6, [self.copilot, self.pilot]),
+                (4, 6, [self.copilot]), (5.5, 6.5, [self.copilot]))
+        body = "route,airplane,departure_time,arrival_time,crews\n" + "".join(
+            f"{self.route.id},{sample_airplane().id},{(self.start + timedelta(hours=departure)).isoformat()},"
+            f"{(self.start + timedelta(hours=arrival)).isoformat()},{';'.join(str(crew.id) for crew in crews)}\n"
+            for departure, arrival, crews in rows
+        )
+        res = self.client.post(IMPORT_URL, data=body, content_type="text/csv")
+        self.assertEqual((res.data["created"], res.data["invalid"]), (2, 3))
+        self.assertEqual(
+            [error["error"] for error in res.data["errors"]],
+            [
+                f"Crew {self.pilot.id} is already on flight {self.flight.id} at that time",
+                f"Crew {self.pilot.id} is already on the flight on line 3 at that time",
+                f"Crew {self.copilot.id} is already on the flight on line 5 at that time",
+            ],
+        )
+
+    def test_roster(self):
+        later = sample_flight(
+            route=self.route,
+            airplane=self.airplane,
+            departure_time=self.start + timedelta(days=10),
+            arrival_time=self.start + timedelta(days=10, hours=2),
+        )
+        later.crews.add(self.pilot)
+
+        res = self.client.get(ROSTER_URL(self.pilot.id))
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data["crew"]["id"], self.pilot.id)
+        self.assertEqual([flight["flight"] for flight in res.data["flights"]], [self.flight.id])
+        self.assertEqual(res.data["flights"][0]["source"], self.route.source.name)
+
+        date_to = (self.start + timedelta(days=10)).date().isoformat()
+        res = self.client.get(ROSTER_URL(self.pilot.id), {"date_to": date_to})
+        self.assertEqual([flight["flight"] for flight in res.data["flights"]], [self.flight.id, later.id])
+
+        res = self.client.get(ROSTER_URL(self.pilot.id), {"date_from": date_to, "date_to": "2000-01-01"})
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
@@ -0,0 +1,23 @@
+from io import StringIO
+from unittest import mock
+
+from django.core.management import call_command
+from django.db import connections
+from django.test import TestCase
+
+from airport.management.commands.benchmark_db_connections import Command
+
+MODES = ("fresh", "persistent")
+
+
+class BenchmarkDbConnectionsCommandTests(TestCase):
+    def test_command_reports_each_mode(self):
+        # The command registers a database alias per mode while it runs.
+        aliases = {Command.alias(mode) for mode in MODES}
+        out = StringIO()
+        with mock.patch.object(type(self), "databases", self.databases | aliases):
+            call_command("benchmark_db_connections", "--requests", "3", "--modes", *MODES, stdout=out)
+
+        lines = out.getvalue().splitlines()
+        self.assertEqual([line.split()[0] for line in lines], ["mode", *MODES])
+        self.assertFalse(aliases & set(connections.settings))
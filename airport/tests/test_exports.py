@@ -0,0 +1,161 @@
+import csv
+import io
+import json
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from airport.models import Order, Ticket
+from airport.tests.test_flight_api import sample_flight, sample_route, sample_airport, sample_crew
+
+FLIGHTS_EXPORT_URL = reverse("airport:export-flights")
+TICKETS_EXPORT_URL = reverse("airport:export-tickets")
+ORDERS_EXPORT_URL = reverse("airport:export-orders")
+
+
+def read_stream(response):
+    return b"".join(response.streaming_content).decode()
+
+
+class ExportPermissionTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(email="user@test.com", password="testpass")
+        self.client.force_authenticate(self.user)
+
+    def test_admin_required(self):
+        for url in (FLIGHTS_EXPORT_URL, TICKETS_EXPORT_URL, ORDERS_EXPORT_URL):
+            res = self.client.get(url)
+            self.assertEqual(res.status_code, status.HTTP_403_FORBIDDEN)
+
+
+class ExportTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.admin = get_user_model().objects.create_user(
+            email="admin@test.com", password="adminpass", is_staff=True
+        )
+        self.client.force_authenticate(self.admin)
+
+        self.today = timezone.now().replace(hour=12, minute=0, second=0, microsecond=0)
+        self.route = sample_route(
+            source=sample_airport(name="Heathrow", city="London"),
+            destination=sample_airport(name="Orly", city="Paris"),
+        )
+        self.flight = sample_flight(
+            route=self.route,
+            departure_time=self.today,
+            arrival_time=self.today + timedelta(hours=2),
+        )
+        self.other_flight = sample_flight(
+            departure_time=self.today + timedelta(days=1),
+            arrival_time=self.today + timedelta(days=1, hours=2),
+        )
+        self.order = Order.objects.create(user=self.admin)
+        Ticket.objects.create(order=self.order, flight=self.flight, row=1, seat=2)
+        Ticket.objects.create(order=self.order, flight=self.other_flight, row=3, seat=4)
+
+    def test_flights_ndjson(self):
+        res = self.client.get(FLIGHTS_EXPORT_URL)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res["Content-Type"], "application/x-ndjson")
+
+        rows = [json.loads(line) for line in read_stream(res).splitlines()]
+        self.assertEqual([row["id"] for row in rows], [self.flight.id, self.other_flight.id])
+        self.assertEqual(rows[0]["source"], "Heathrow")
+        self.assertEqual(rows[0]["destination"], "Orly")
+        self.assertEqual(rows[0]["capacity"], 120)
+        self.assertEqual(rows[0]["seats_sold"], 1)
+        self.assertEqual(rows[0]["departure_time"], self.today.isoformat().replace("+00:00", "Z"))
+
+    def test_flights_csv(self):
+        res = self.client.get(FLIGHTS_EXPORT_URL, {"output": "csv"})
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res["Content-Type"], "text/csv")
+        self.assertIn('filename="flights.csv"', res["Content-Disposition"])
+
+        rows = list(csv.DictReader(io.StringIO(read_stream(res))))
+        self.assertEqual(len(rows), 2)
+        self.assertEqual(rows[0]["id"], str(self.flight.id))
+        self.assertEqual(rows[0]["route"], str(self.route.id))
+
+    def test_flights_filters(self):
+        res = self.client.get(FLIGHTS_EXPORT_URL, {"date": self.today.strftime("%Y-%m-%d")})
+        ids = [json.loads(line)["id"] for line in read_stream(res).splitlines()]
+        self.assertEqual(ids, [self.flight.id])
+
+        res = self.client.get(FLIGHTS_EXPORT_URL, {"route": self.other_flight.route_id})
+        ids = [json.loads(line)["id"] for line in read_stream(res).splitlines()]
+        self.assertEqual(ids, [self.other_flight.id])
+
+        crew = sample_crew()
+        self.other_flight.crews.add(crew)
+        res = self.client.get(FLIGHTS_EXPORT_URL, {"crews": f"{crew.id},{crew.id + 1}"})
+        ids = [json.loads(line)["id"] for line in read_stream(res).splitlines()]
+        self.assertEqual(ids, [self.other_flight.id])
+
+    def test_tickets_manifest_for_flight(self):
+        res = self.client.get(TICKETS_EXPORT_URL, {"flight": self.flight.id})
+        rows = [json.loads(line) for line in read_stream(res).splitlines()]
+        self.assertEqual(len(rows), 1)
+        self.assertEqual(rows[0]["flight"], self.flight.id)
+        self.assertEqual((rows[0]["row"], rows[0]["seat"]), (1, 2))
+        self.assertEqual(rows[0]["email"], "admin@test.com")
+
+    def test_tickets_filters(self):
+        res = self.client.get(TICKETS_EXPORT_URL, {"route": self.route.id})
+        self.assertEqual(len(read_stream(res).splitlines()), 1)
+
+        res = self.client.get(
+            TICKETS_EXPORT_URL,
+            {"date": (self.today + timedelta(days=1)).strftime("%Y-%m-%d")},
+        )
+        rows = [json.loads(line) for line in read_stream(res).splitlines()]
+        self.assertEqual([row["flight"] for row in rows], [self.other_flight.id])
+
+    def test_orders(self):
+        res = self.client.get(ORDERS_EXPORT_URL)
+        rows = [json.loads(line) for line in read_stream(res).splitlines()]
+        self.assertEqual(rows, [{
+            "id": self.order.id,
+            "created_at": rows[0]["created_at"],
+            "email": "admin@test.com",
+            "tickets": 2,
+        }])
+
+    def test_invalid_output(self):
+        res = self.client.get(FLIGHTS_EXPORT_URL, {"output": "xml"})
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_invalid_filters(self):
+        for url, params in (
+            (FLIGHTS_EXPORT_URL, {"route": "abc"}),
+            (FLIGHTS_EXPORT_URL, {"date": "2025-13-01"}),
+            (FLIGHTS_EXPORT_URL, {"crews": "1,x"}),
+            (TICKETS_EXPORT_URL, {"flight": "1,2"}),
+            (TICKETS_EXPORT_URL, {"route": "x"}),
+            (ORDERS_EXPORT_URL, {"date": "yesterday"}),
+        ):
+            res = self.client.get(url, params)
+            self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST, (url, params))
+            self.assertIn(next(iter(params)), res.data)
+
+    def test_export_is_one_query(self):
+        for day in range(2, 30):
+            sample_flight(
+                route=self.route,
+                departure_time=self.today + timedelta(days=day),
+                arrival_time=self.today + timedelta(days=day, hours=2),
+            )
+        res = self.client.get(FLIGHTS_EXPORT_URL)
+        with CaptureQueriesContext(connection) as queries:
+            lines = read_stream(res).splitlines()
+        self.assertEqual(len(lines), 30)
+        self.assertEqual(len(queries), 1)
@@ -1,3 +1,4 @@
+from django.core.cache import cache
 from django.db.models import F, Count
 from django.test import TestCase
 from rest_framework.test import APIClient
@@ -5,9 +6,15 @@ from rest_framework import status
 from django.contrib.auth import get_user_model
 from django.urls import reverse
 from datetime import datetime, timedelta
+from unittest import mock
 
-from airport.models import Flight, Airplane, AirplaneType, Route, Airport, Crew
-from airport.serializers import FlightListSerializer, FlightDetailSerializer
+from airport.models import Flight, Airplane, AirplaneType, Route, Airport, Crew, Order, Ticket
+from airport.seat_map import SeatMap
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIRequestFactory
+
+from airport.views import FlightCursorPagination, FlightViewSet
+from airport.serializers import FlightListSerializer, FlightDetailSerializer, FlightListValuesSerializer
 
 FLIGHT_URL = reverse("airport:flight-list")
 DETAIL_URL = lambda pk: reverse("airport:flight-detail", args=[pk])
@@ -64,6 +71,8 @@ class UnauthorizedFlightTests(TestCase):
 
 class AuthorizedFlightTests(TestCase):
     def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
         self.client = APIClient()
         self.user = get_user_model().objects.create_user(email="user@test.com", password="testpass")
         self.client.force_authenticate(self.user)
@@ -110,3 +119,127 @@ class AuthorizedFlightTests(TestCase):
         self.assertIn(self.flight.id, [f["id"] for f in res.data["results"]])
         self.assertNotIn(self.flight2.id, [f["id"] for f in res.data["results"]])
 
+    def test_filter_flights_by_route(self):
+        res = self.client.get(FLIGHT_URL, {"route": self.flight.route_id})
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual([f["id"] for f in res.data["results"]], [self.flight.id])
+
+    def test_invalid_filters(self):
+        for params in ({"route": "abc"}, {"crews": "1,x"}, {"date": "2025-13-01"}):
+            res = self.client.get(FLIGHT_URL, params)
+            self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST, params)
+            self.assertIn(next(iter(params)), res.data)
+
+
+
+SEATS_URL = lambda pk: reverse("airport:flight-seats", args=[pk])
+
+
+class FlightSeatMapTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(email="user@test.com", password="testpass")
+        self.client.force_authenticate(self.user)
+
+        self.flight = sample_flight(airplane=sample_airplane(rows=3, seats_in_row=4))
+        self.order = Order.objects.create(user=self.user)
+        Ticket.objects.create(order=self.order, flight=self.flight, row=1, seat=2)
+        Ticket.objects.create(order=self.order, flight=self.flight, row=3, seat=4)
+
+    def test_seat_map_grid(self):
+        res = self.client.get(SEATS_URL(self.flight.id))
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data["rows"], 3)
+        self.assertEqual(res.data["seats_in_row"], 4)
+        self.assertEqual(res.data["available"], 10)
+        self.assertEqual(res.data["seats"], ["0100", "0000", "0001"])
+
+    def test_seat_map_query_count(self):
+        with self.assertNumQueries(2):
+            res = self.client.get(SEATS_URL(self.flight.id))
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    def test_seat_map_bitmap(self):
+        seat_map = SeatMap(50, 10)
+        seat_map.occupy(50, 10)
+        seat_map.occupy(51, 1)
+        self.assertEqual(len(seat_map._bits), 63)
+        self.assertTrue(seat_map.is_taken(50, 10))
+        self.assertFalse(seat_map.is_taken(1, 1))
+        self.assertEqual(seat_map.available_count, 499)
+
+
+class FlightCursorPaginationTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(email="user@test.com", password="testpass")
+        self.client.force_authenticate(self.user)
+
+        now = datetime.now()
+        self.flights = [
+            sample_flight(departure_time=now + timedelta(hours=hours))
+            for hours in (3, 1, 2, 4)
+        ]
+
+    def test_cursor_pagination_walks_flights_in_departure_order(self):
+        res = self.client.get(f"{FLIGHT_URL}?pagination=cursor&page_size=2")
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertNotIn("count", res.data)
+        first_page = [flight["id"] for flight in res.data["results"]]
+
+        res = self.client.get(res.data["next"])
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        second_page = [flight["id"] for flight in res.data["results"]]
+        self.assertIsNone(res.data["next"])
+
+        expected = [flight.id for flight in sorted(self.flights, key=lambda f: f.departure_time)]
+        self.assertEqual(first_page + second_page, expected)
+
+    def test_cursor_pagination_max_page_size(self):
+        with mock.patch.object(FlightCursorPagination, "max_page_size", 2):
+            res = self.client.get(f"{FLIGHT_URL}?pagination=cursor&page_size=1000")
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(res.data["results"]), 2)
+
+
+class FlightListValuesSerializerTests(TestCase):
+    def setUp(self):
+        self.request = APIRequestFactory().get(FLIGHT_URL)
+        airplane = sample_airplane()
+        Airplane.objects.filter(id=airplane.id).update(image="uploads/airplanes/plane.jpg")
+        crews = [sample_crew("Alice", "Smith"), sample_crew("Bob", "Brown")]
+        self.flights = [
+            sample_flight(airplane=airplane),
+            sample_flight(departure_time=datetime.now() + timedelta(days=1)),
+            sample_flight(departure_time=datetime.now() + timedelta(days=2)),
+        ]
+        self.flights[0].crews.add(*crews)
+        self.flights[1].crews.add(crews[1])
+        order = Order.objects.create(
+            user=get_user_model().objects.create_user(email="user@test.com", password="testpass")
+        )
+        Ticket.objects.create(order=order, flight=self.flights[0], row=1, seat=1)
+
+    def test_output_is_byte_identical(self):
+        queryset = FlightViewSet.queryset.all()
+        context = {"request": self.request}
+
+        expected = JSONRenderer().render(FlightListSerializer(queryset, many=True, context=context).data)
+        actual = JSONRenderer().render(
+            FlightListValuesSerializer(FlightListValuesSerializer.project(queryset), context=context).data
+        )
+        self.assertEqual(actual, expected)
+
+    def test_query_count(self):
+        queryset = FlightListValuesSerializer.project(FlightViewSet.queryset.all())
+        with self.assertNumQueries(2):
+            FlightListValuesSerializer(queryset).data
+
+    def test_empty(self):
+        queryset = FlightListValuesSerializer.project(FlightViewSet.queryset.none())
+        with self.assertNumQueries(0):
+            self.assertEqual(FlightListValuesSerializer(queryset).data, [])
@@ -0,0 +1,272 @@
+from datetime import timedelta, time
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from airport.models import Flight, FlightSchedule, Ticket
+from airport.tests.test_flight_api import sample_route, sample_airplane, sample_crew, sample_flight
+
+FLIGHT_URL = reverse("airport:flight-list")
+ORDER_URL = reverse("airport:order-list")
+SCHEDULE_URL = reverse("airport:flightschedule-list")
+HOLD_URL = reverse("airport:hold-list")
+FLIGHT_DETAIL_URL = lambda pk: reverse("airport:flight-detail", args=[pk])
+IMPORT_URL = reverse("airport:flight-import")
+SCHEDULE_DETAIL_URL = lambda pk: reverse("airport:flightschedule-detail", args=[pk])
+
+
+class FlightScheduleTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(email="user@test.com", password="testpass")
+        self.client.force_authenticate(self.user)
+
+        self.monday = timezone.localdate() + timedelta(days=7 - timezone.localdate().weekday())
+        self.route = sample_route()
+        self.airplane = sample_airplane(rows=2, seats_in_row=2)
+        self.crew = sample_crew()
+        self.schedule = FlightSchedule.objects.create(
+            route=self.route,
+            airplane=self.airplane,
+            weekdays="531",
+            departure_time=time(8, 30),
+            duration=timedelta(hours=2),
+            valid_from=self.monday,
+            valid_until=self.monday + timedelta(days=30),
+        )
+        self.schedule.crews.add(self.crew)
+        self.occurrence_id = FlightSchedule.occurrence_id(self.schedule.id, self.monday)
+
+    def flights_on(self, date, **params):
+        res = self.client.get(FLIGHT_URL, {"date": date.isoformat(), "page_size": 50, **params})
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        return res.data["results"]
+
+    def book(self, flight, row=1, seat=1):
+        return self.client.post(
+            ORDER_URL, {"tickets": [{"row": row, "seat": seat, "flight": flight}]}, format="json"
+        )
+
+    def test_weekdays_are_normalized(self):
+        self.assertEqual(self.schedule.weekdays, "135")
+
+    def test_occurrence_listed_on_scheduled_days(self):
+        flights = self.flights_on(self.monday)
+        self.assertEqual(len(flights), 1)
+        self.assertEqual(flights[0]["id"], self.occurrence_id)
+        self.assertEqual(flights[0]["tickets"], 4)
+        self.assertEqual(flights[0]["crews"][0]["id"], self.crew.id)
+        self.assertEqual(flights[0]["route"]["id"], self.route.id)
+        self.assertEqual(
+            flights[0]["arrival_time"],
+            (self.schedule.departure_on(self.monday) + timedelta(hours=2)).isoformat().replace("+00:00", "Z"),
+        )
+        self.assertFalse(Flight.objects.exists())
+
+    def test_no_occurrence_outside_weekdays_or_validity(self):
+        self.assertEqual(self.flights_on(self.monday + timedelta(days=1)), [])
+        self.assertEqual(self.flights_on(self.monday - timedelta(days=7)), [])
+        self.assertEqual(self.flights_on(self.monday + timedelta(days=35)), [])
+
+    def test_occurrences_merged_with_flights_and_filtered(self):
+        day_start = self.schedule.departure_on(self.monday).replace(hour=0, minute=0)
+        early = sample_flight(
+            route=self.route,
+            airplane=self.airplane,
+            departure_time=day_start + timedelta(hours=6),
+            arrival_time=day_start + timedelta(hours=7),
+        )
+        self.assertEqual([flight["id"] for flight in self.flights_on(self.monday)], [early.id, self.occurrence_id])
+        self.assertEqual(
+            [flight["id"] for flight in self.flights_on(self.monday, route=sample_route().id)], []
+        )
+        self.assertEqual(
+            [flight["id"] for flight in self.flights_on(self.monday, crews=self.crew.id)], [self.occurrence_id]
+        )
+
+    def test_booking_materializes_flight_once(self):
+        res = self.book(self.occurrence_id)
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED, res.data)
+
+        flight = Flight.objects.get()
+        self.assertEqual(flight.schedule, self.schedule)
+        self.assertEqual(flight.departure_time, self.schedule.departure_on(self.monday))
+        self.assertEqual(list(flight.crews.all()), [self.crew])
+        self.assertEqual(Ticket.objects.get().flight, flight)
+
+        self.assertEqual(self.book(self.occurrence_id, seat=2).status_code, status.HTTP_201_CREATED)
+        self.assertEqual(Flight.objects.count(), 1)
+        self.assertEqual(self.book(self.occurrence_id, seat=2).status_code, status.HTTP_400_BAD_REQUEST)
+
+        flights = self.flights_on(self.monday)
+        self.assertEqual([(f["id"], f["tickets"]) for f in flights], [(flight.id, 2)])
+
+    def test_unscheduled_occurrence_cannot_be_booked(self):
+        tuesday = FlightSchedule.occurrence_id(self.schedule.id, self.monday + timedelta(days=1))
+        for flight in (tuesday, "s999-20300101", "s1-20301399"):
+            res = self.book(flight)
+            self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(Flight.objects.exists())
+
+    def test_rejected_order_leaves_no_flight(self):
+        res = self.book(self.occurrence_id, row=999)
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(Flight.objects.exists())
+
+    def test_occurrence_seats_cannot_be_held(self):
+        res = self.client.post(
+            HOLD_URL, {"tickets": [{"row": 1, "seat": 1, "flight": self.occurrence_id}]}, format="json"
+        )
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(Flight.objects.exists())
+
+        self.assertEqual(self.book(self.occurrence_id).status_code, status.HTTP_201_CREATED)
+        res = self.client.post(
+            HOLD_URL, {"tickets": [{"row": 1, "seat": 2, "flight": self.occurrence_id}]}, format="json"
+        )
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED, res.data)
+        self.assertEqual(res.data["tickets"][0]["flight"], Flight.objects.get().id)
+
+    def test_occurrence_clashing_with_flights_not_booked(self):
+        departure = self.schedule.departure_on(self.monday)
+        same_airplane = sample_flight(
+            airplane=self.airplane,
+            departure_time=departure + timedelta(hours=1),
+            arrival_time=departure + timedelta(hours=3),
+        )
+        res = self.book(self.occurrence_id)
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn(f"flight {same_airplane.id}", res.data["tickets"][0])
+
+        same_airplane.delete()
+        same_crew = sample_flight(
+            departure_time=departure - timedelta(hours=1),
+            arrival_time=departure + timedelta(hours=1),
+        )
+        same_crew.crews.add(self.crew)
+        res = self.book(self.occurrence_id)
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn(f"{self.crew.full_name} is already on flight {same_crew.id}", res.data["tickets"][0])
+        self.assertEqual(list(Flight.objects.all()), [same_crew])
+
+    def as_admin(self):
+        admin = get_user_model().objects.create_user(email="admin@test.com", password="testpass", is_staff=True)
+        self.client.force_authenticate(admin)
+
+    def flight_payload(self, airplane, crews, hours=1):
+        departure = self.schedule.departure_on(self.monday) + timedelta(hours=hours)
+        return {
+            "route": self.route.id,
+            "airplane": airplane.id,
+            "departure_time": departure.isoformat(),
+            "arrival_time": (departure + timedelta(hours=2)).isoformat(),
+            "crews": [crew.id for crew in crews],
+        }
+
+    def schedule_payload(self, airplane, crews, departure_time="09:30"):
+        return {
+            "route": self.route.id,
+            "airplane": airplane.id,
+            "crews": [crew.id for crew in crews],
+            "weekdays": "1",
+            "departure_time": departure_time,
+            "duration": "02:00:00",
+            "valid_from": self.monday.isoformat(),
+            "valid_until": (self.monday + timedelta(days=14)).isoformat(),
+        }
+
+    def test_flights_clashing_with_occurrences_rejected(self):
+        self.as_admin()
+        res = self.client.post(
+            FLIGHT_URL, self.flight_payload(self.airplane, [sample_crew("Other", "Pilot")]), format="json"
+        )
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn(f"already flies flight {self.occurrence_id}", res.data["airplane"][0])
+
+        res = self.client.post(FLIGHT_URL, self.flight_payload(sample_airplane(), [self.crew]), format="json")
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn(f"is already on flight {self.occurrence_id}", res.data["crews"][0])
+
+        res = self.client.post(FLIGHT_URL, self.flight_payload(self.airplane, [self.crew], hours=2), format="json")
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED, res.data)
+        self.assertFalse(Flight.objects.filter(schedule__isnull=False).exists())
+
+    def test_import_skips_rows_clashing_with_occurrences(self):
+        self.as_admin()
+        departure = self.schedule.departure_on(self.monday) + timedelta(hours=1)
+        body = "route,airplane,departure_time,arrival_time\n" + "".join(
+            f"{self.route.id},{self.airplane.id},{(departure + timedelta(hours=hours)).isoformat()},"
+            f"{(departure + timedelta(hours=hours + 1)).isoformat()}\n"
+            for hours in (0, 1)
+        )
+        res = self.client.post(IMPORT_URL, data=body, content_type="text/csv")
+        self.assertEqual((res.data["created"], res.data["invalid"]), (1, 1))
+        self.assertEqual(
+            res.data["errors"][0]["error"],
+            f"Airplane {self.airplane.id} already flies flight {self.occurrence_id} at that time",
+        )
+
+    def test_materialized_flight_does_not_clash_with_its_occurrence(self):
+        self.assertEqual(self.book(self.occurrence_id).status_code, status.HTTP_201_CREATED)
+        flight = Flight.objects.get()
+        self.as_admin()
+        res = self.client.patch(
+            FLIGHT_DETAIL_URL(flight.id),
+            {"arrival_time": (flight.arrival_time + timedelta(minutes=30)).isoformat()},
+            format="json",
+        )
+        self.assertEqual(res.status_code, status.HTTP_200_OK, res.data)
+
+        res = self.client.patch(SCHEDULE_DETAIL_URL(self.schedule.id), {"duration": "02:30:00"}, format="json")
+        self.assertEqual(res.status_code, status.HTTP_200_OK, res.data)
+
+    def test_schedules_clashing_with_flights_or_schedules_rejected(self):
+        self.as_admin()
+        other_airplane = sample_airplane()
+        flight = sample_flight(
+            airplane=other_airplane,
+            departure_time=self.schedule.departure_on(self.monday + timedelta(days=7)),
+            arrival_time=self.schedule.departure_on(self.monday + timedelta(days=7)) + timedelta(hours=2),
+        )
+        res = self.client.post(SCHEDULE_URL, self.schedule_payload(other_airplane, []), format="json")
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn(f"already flies flight {flight.id}", res.data["airplane"][0])
+
+        res = self.client.post(SCHEDULE_URL, self.schedule_payload(sample_airplane(), [self.crew]), format="json")
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn(f"is already on flight {self.occurrence_id}", res.data["crews"][0])
+
+        res = self.client.post(
+            SCHEDULE_URL, self.schedule_payload(sample_airplane(), [self.crew], "11:00"), format="json"
+        )
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED, res.data)
+        res = self.client.patch(
+            SCHEDULE_DETAIL_URL(res.data["id"]), {"departure_time": "07:30"}, format="json"
+        )
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("crews", res.data)
+
+    def test_invalid_schedule_rejected(self):
+        admin = get_user_model().objects.create_user(email="admin@test.com", password="testpass", is_staff=True)
+        self.client.force_authenticate(admin)
+        payload = {
+            "route": self.route.id,
+            "airplane": sample_airplane().id,
+            "crews": [],
+            "weekdays": "18",
+            "departure_time": "08:30",
+            "duration": "02:00:00",
+            "valid_from": self.monday.isoformat(),
+            "valid_until": self.monday.isoformat(),
+        }
+        self.assertEqual(self.client.post(SCHEDULE_URL, payload).status_code, status.HTTP_400_BAD_REQUEST)
+
+        payload["weekdays"] = "17"
+        self.assertEqual(self.client.post(SCHEDULE_URL, payload).status_code, status.HTTP_201_CREATED)
@@ -0,0 +1,180 @@
+import io
+import json
+import os
+import tempfile
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from airport.boards import get_board, DEPARTURES
+from airport.models import Flight
+from airport.tests.test_flight_api import sample_airport, sample_airplane, sample_route, sample_crew, sample_flight
+
+IMPORT_URL = reverse("airport:flight-import")
+FLIGHTS_EXPORT_URL = reverse("airport:export-flights")
+
+
+class ScheduleImportTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        self.client = APIClient()
+        self.admin = get_user_model().objects.create_user(
+            email="admin@test.com", password="adminpass", is_staff=True
+        )
+        self.client.force_authenticate(self.admin)
+
+        self.day = (timezone.now() + timedelta(days=1)).replace(hour=0, minute=0, second=0, microsecond=0)
+        self.route = sample_route(
+            source=sample_airport("Heathrow", "London"),
+            destination=sample_airport("Orly", "Paris"),
+        )
+        self.airplane = sample_airplane(name="Dreamliner")
+        self.pilot = sample_crew("Amelia", "Earhart")
+        self.copilot = sample_crew("Charles", "Lindbergh")
+
+    def time(self, hours):
+        return (self.day + timedelta(hours=hours)).isoformat()
+
+    def schedule_csv(self):
+        return (
+            "source,destination,airplane,departure_time,arrival_time,crews\n"
+            f"Heathrow,Orly,Dreamliner,{self.time(8)},{self.time(9)},Amelia Earhart;Charles Lindbergh\n"
+            f"Heathrow,Orly,{self.airplane.id},{self.time(12)},{self.time(13)},\n"
+        )
+
+    def post(self, body, content_type="text/csv"):
+        return self.client.post(IMPORT_URL, data=body, content_type=content_type)
+
+    def test_import_csv(self):
+        res = self.post(self.schedule_csv())
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data, {"rows": 2, "created": 2, "existing": 0, "invalid": 0, "errors": []})
+
+        first, second = Flight.objects.order_by("departure_time")
+        self.assertEqual((first.route, first.airplane), (self.route, self.airplane))
+        self.assertEqual(set(first.crews.all()), {self.pilot, self.copilot})
+        self.assertFalse(second.crews.exists())
+
+    def test_import_ndjson(self):
+        body = "\n".join(json.dumps(record) for record in [
+            {
+                "route": self.route.id,
+                "airplane": self.airplane.id,
+                "departure_time": self.time(8),
+                "arrival_time": self.time(9),
+                "crews": [self.pilot.id],
+            },
+            {"route": self.route.id, "airplane": "Dreamliner", "departure_time": self.time(10),
+             "arrival_time": self.time(11)},
+        ])
+        res = self.post(body, "application/x-ndjson")
+        self.assertEqual(res.data["created"], 2)
+        self.assertEqual(list(Flight.objects.first().crews.all()), [self.pilot])
+
+    def test_reimport_is_idempotent(self):
+        self.post(self.schedule_csv())
+        res = self.post(self.schedule_csv())
+        self.assertEqual(res.data["created"], 0)
+        self.assertEqual(res.data["existing"], 2)
+        self.assertEqual(Flight.objects.count(), 2)
+        self.assertEqual(Flight.crews.through.objects.count(), 2)
+
+    def test_duplicate_rows_in_one_file(self):
+        line = f"Heathrow,Orly,Dreamliner,{self.time(8)},{self.time(9)},\n"
+        res = self.post("source,destination,airplane,departure_time,arrival_time,crews\n" + line * 3)
+        self.assertEqual((res.data["created"], res.data["existing"]), (1, 2))
+
+    def test_invalid_rows_are_reported_and_skipped(self):
+        body = (
+            "source,destination,airplane,departure_time,arrival_time,crews\n"
+            f"Heathrow,Orly,Dreamliner,{self.time(8)},{self.time(9)},\n"
+            f"Heathrow,Gatwick,Dreamliner,{self.time(8)},{self.time(9)},\n"
+            f"Heathrow,Orly,Concorde,{self.time(8)},{self.time(9)},\n"
+            f"Heathrow,Orly,Dreamliner,{self.time(9)},{self.time(8)},\n"
+            f"Heathrow,Orly,Dreamliner,yesterday,{self.time(8)},\n"
+            f"Heathrow,Orly,Dreamliner,{self.time(10)},{self.time(11)},Nobody\n"
+        )
+        res = self.post(body)
+        self.assertEqual((res.data["created"], res.data["invalid"]), (1, 5))
+        self.assertEqual([error["line"] for error in res.data["errors"]], [3, 4, 5, 6, 7])
+        self.assertEqual(res.data["errors"][0]["error"], "Unknown route Heathrow -> Gatwick")
+
+    def test_malformed_records_are_line_errors(self):
+        body = "\n".join(json.dumps(record) for record in [
+            {"route": self.route.id, "airplane": self.airplane.id, "departure_time": self.time(8),
+             "arrival_time": self.time(9), "crews": 5},
+            {"route": self.route.id, "airplane": self.airplane.id, "departure_time": self.time(10),
+             "arrival_time": self.time(11), "crews": [{"id": self.pilot.id}]},
+            {"route": self.route.id, "airplane": self.airplane.id, "departure_time": self.time(12),
+             "arrival_time": self.time(13)},
+        ])
+        res = self.post(body, "application/x-ndjson")
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual((res.data["created"], res.data["invalid"]), (1, 2))
+        self.assertEqual(res.data["errors"][0], {"line": 1, "error": "crews must be a list"})
+
+    def test_undecodable_lines_are_line_errors(self):
+        body = (
+            "source,destination,airplane,departure_time,arrival_time,crews\n"
+            f"Heathrow,Orly,Dreamliner,{self.time(8)},{self.time(9)},Amelia Earhart\n"
+            f"Heathrow,Orly,Dreamliner,{self.time(10)},{self.time(11)},Am\xe9lia Earhart\n"
+        ).encode("utf-8").replace(b"\xc3\xa9", b"\xe9")
+        res = self.post(body)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual((res.data["created"], res.data["invalid"]), (1, 1))
+        self.assertEqual(res.data["errors"], [{"line": 3, "error": "Not valid UTF-8"}])
+
+        res = self.post(b'{"route": "\xff"}\n', "application/x-ndjson")
+        self.assertEqual(res.data["invalid"], 1)
+
+    def test_ambiguous_names_need_ids(self):
+        sample_airplane(name="Dreamliner")
+        res = self.post(self.schedule_csv())
+        self.assertEqual(res.data["created"], 1)
+        self.assertEqual(res.data["errors"][0]["error"], "airplane 'Dreamliner' is ambiguous, use its id")
+
+    def test_import_refreshes_cached_boards(self):
+        self.assertEqual(get_board(DEPARTURES, self.route.source_id, self.day.date()), [])
+        self.post(self.schedule_csv())
+        self.assertEqual(len(get_board(DEPARTURES, self.route.source_id, self.day.date())), 2)
+
+    def test_exported_flights_can_be_imported(self):
+        sample_flight(
+            route=self.route,
+            airplane=self.airplane,
+            departure_time=self.day,
+            arrival_time=self.day + timedelta(hours=1),
+        )
+        export = b"".join(self.client.get(FLIGHTS_EXPORT_URL, {"output": "csv"}).streaming_content)
+        res = self.post(export)
+        self.assertEqual((res.data["created"], res.data["existing"], res.data["invalid"]), (0, 1, 0))
+
+    def test_unsupported_content_type(self):
+        res = self.client.post(IMPORT_URL, {"route": self.route.id}, format="json")
+        self.assertEqual(res.status_code, status.HTTP_415_UNSUPPORTED_MEDIA_TYPE)
+
+    def test_admin_required(self):
+        user = get_user_model().objects.create_user(email="user@test.com", password="testpass")
+        self.client.force_authenticate(user)
+        res = self.post(self.schedule_csv())
+        self.assertEqual(res.status_code, status.HTTP_403_FORBIDDEN)
+        self.assertFalse(Flight.objects.exists())
+
+    def test_import_schedule_command(self):
+        with tempfile.NamedTemporaryFile("w", suffix=".csv", delete=False) as schedule:
+            schedule.write(self.schedule_csv())
+        self.addCleanup(os.remove, schedule.name)
+
+        out = io.StringIO()
+        call_command("import_schedule", schedule.name, "--chunk-size", "1", stdout=out)
+        self.assertEqual(Flight.objects.count(), 2)
+        self.assertIn("1 rows: 1 created", out.getvalue())
+        self.assertIn("Imported 2 flights from 2 rows", out.getvalue())
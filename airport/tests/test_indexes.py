@@ -0,0 +1,50 @@
+from datetime import date
+from unittest import skipUnless
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from airport.models import Airport, Airplane, Order
+from airport.views import FlightViewSet
+
+is_postgresql = connection.vendor == "postgresql"
+
+
+class IndexUsageTests(TestCase):
+    """EXPLAIN the filtered querysets and check the planner picks the dedicated indexes."""
+
+    def explain(self, queryset):
+        if is_postgresql:
+            # Tables are tiny in tests, so make sequential scans unattractive.
+            with connection.cursor() as cursor:
+                cursor.execute("SET LOCAL enable_seqscan = off")
+        return queryset.explain()
+
+    def test_flight_date_filter_uses_departure_index(self):
+        request = Request(APIRequestFactory().get("/", {"date": date(2025, 9, 24).isoformat()}))
+        queryset = FlightViewSet(action="list", request=request).get_queryset()
+
+        self.assertIn("airport_flight_departure_idx", self.explain(queryset))
+
+    def test_order_history_uses_user_created_index(self):
+        user = get_user_model().objects.create_user(email="user@test.com", password="testpass")
+        plan = self.explain(Order.objects.filter(user=user).order_by("-created_at"))
+        self.assertIn("airport_order_user_created_idx", plan)
+
+    @skipUnless(is_postgresql, "Trigram indexes exist on PostgreSQL only")
+    def test_icontains_uses_trigram_indexes(self):
+        self.assertIn(
+            "airport_airport_name_trgm",
+            self.explain(Airport.objects.filter(name__icontains="port")),
+        )
+        self.assertIn(
+            "airport_airport_city_trgm",
+            self.explain(Airport.objects.filter(closest_big_city__icontains="york")),
+        )
+        self.assertIn(
+            "airport_airplane_name_trgm",
+            self.explain(Airplane.objects.filter(name__icontains="bird")),
+        )
@@ -0,0 +1,155 @@
+from datetime import time, timedelta
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from airport.cache import get_versions
+from airport.holds import SeatHold
+from airport.itineraries import FlightGraph
+from airport.models import Flight, Route, Order, Ticket, FlightSchedule
+from airport.tests.test_flight_api import sample_airport, sample_airplane
+
+ITINERARY_URL = reverse("airport:itinerary-list")
+ORDER_URL = reverse("airport:order-list")
+
+
+class ItinerarySearchTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(email="user@test.com", password="testpass")
+        self.client.force_authenticate(self.user)
+
+        self.day = (timezone.now() + timedelta(days=1)).replace(hour=0, minute=0, second=0, microsecond=0)
+        self.airplane = sample_airplane(rows=1, seats_in_row=2)
+        self.kyiv = sample_airport("Boryspil", "Kyiv")
+        self.warsaw = sample_airport("Chopin", "Warsaw")
+        self.berlin = sample_airport("Tegel", "Berlin")
+        self.paris = sample_airport("Orly", "Paris")
+
+        self.kyiv_warsaw = self.flight(self.kyiv, self.warsaw, 10, 11)
+        self.warsaw_berlin = self.flight(self.warsaw, self.berlin, 12, 13)
+        self.tight_connection = self.flight(self.warsaw, self.berlin, 11, 11.5)
+        self.direct = self.flight(self.kyiv, self.berlin, 9, 14)
+
+    def flight(self, source, destination, departure_hour, arrival_hour):
+        route, _ = Route.objects.get_or_create(source=source, destination=destination, defaults={"distance": 1000})
+        return Flight.objects.create(
+            route=route,
+            airplane=self.airplane,
+            departure_time=self.day + timedelta(hours=departure_hour),
+            arrival_time=self.day + timedelta(hours=arrival_hour),
+        )
+
+    def search(self, **params):
+        params = {
+            "source": self.kyiv.id,
+            "destination": self.berlin.id,
+            "date": self.day.date().isoformat(),
+            **params,
+        }
+        res = self.client.get(ITINERARY_URL, params)
+        self.assertEqual(res.status_code, status.HTTP_200_OK, res.data)
+        return [[leg["flight"] for leg in itinerary["legs"]] for itinerary in res.data]
+
+    def test_itineraries_ordered_by_arrival(self):
+        self.assertEqual(
+            self.search(),
+            [[self.kyiv_warsaw.id, self.warsaw_berlin.id], [self.direct.id]],
+        )
+
+    def test_itinerary_details(self):
+        res = self.client.get(
+            ITINERARY_URL,
+            {"source": self.kyiv.id, "destination": self.berlin.id, "date": self.day.date().isoformat()},
+        )
+        itinerary = res.data[0]
+        self.assertEqual(itinerary["duration_minutes"], 180)
+        self.assertEqual(itinerary["legs"][0]["source"]["closest_big_city"], "Kyiv")
+        self.assertEqual(itinerary["legs"][1]["destination"]["name"], "Tegel")
+        self.assertEqual(itinerary["legs"][0]["tickets_available"], 2)
+
+    def test_limit_and_max_legs(self):
+        self.assertEqual(self.search(limit=1), [[self.kyiv_warsaw.id, self.warsaw_berlin.id]])
+        self.assertEqual(self.search(max_legs=1), [[self.direct.id]])
+
+    def test_full_flights_are_skipped(self):
+        order = Order.objects.create(user=self.user)
+        Ticket.objects.create(order=order, flight=self.direct, row=1, seat=1)
+        self.assertEqual(len(self.search(tickets=2)), 1)
+
+        Ticket.objects.create(order=order, flight=self.direct, row=1, seat=2)
+        self.assertEqual(self.search(), [[self.kyiv_warsaw.id, self.warsaw_berlin.id]])
+
+    def test_held_seats_are_not_available(self):
+        SeatHold.create(self.user, [(self.direct.id, 1, 1)])
+        self.assertEqual(self.search(tickets=2), [[self.kyiv_warsaw.id, self.warsaw_berlin.id]])
+
+        res = self.client.get(
+            ITINERARY_URL,
+            {"source": self.kyiv.id, "destination": self.berlin.id, "date": self.day.date().isoformat(), "max_legs": 1},
+        )
+        self.assertEqual(res.data[0]["legs"][0]["tickets_available"], 1)
+
+    def test_other_dates_are_not_returned(self):
+        self.assertEqual(self.search(date=(self.day + timedelta(days=1)).date().isoformat()), [])
+
+    def test_index_is_reused_until_the_schedule_changes(self):
+        self.search()
+        with mock.patch.object(FlightGraph, "build", wraps=FlightGraph.build) as build:
+            with self.assertNumQueries(0):
+                self.search()
+
+            flight_version = get_versions([Flight])
+            Ticket.objects.create(order=Order.objects.create(user=self.user), flight=self.direct, row=1, seat=1)
+            self.search()
+            self.assertEqual(build.call_count, 0)
+            # Bookings only change seat availability, not the timetable.
+            self.assertEqual(get_versions([Flight]), flight_version)
+
+            paris = self.flight(self.berlin, self.paris, 15, 16)
+            self.assertIn(
+                [self.kyiv_warsaw.id, self.warsaw_berlin.id, paris.id],
+                self.search(destination=self.paris.id),
+            )
+            self.assertEqual(build.call_count, 1)
+
+    def test_schedule_occurrences_are_legs_until_materialized(self):
+        schedule = FlightSchedule.objects.create(
+            route=Route.objects.get(source=self.warsaw, destination=self.berlin),
+            airplane=sample_airplane(name="Scheduled", rows=1, seats_in_row=3),
+            weekdays="1234567",
+            departure_time=time(12, 30),
+            duration=timedelta(hours=1),
+            valid_from=self.day.date(),
+            valid_until=self.day.date(),
+        )
+        occurrence = FlightSchedule.occurrence_id(schedule.id, self.day.date())
+        self.assertIn([self.kyiv_warsaw.id, occurrence], self.search(limit=3))
+
+        res = self.client.post(
+            ORDER_URL, {"tickets": [{"row": 1, "seat": 1, "flight": occurrence}]}, format="json"
+        )
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED, res.data)
+        flight = Flight.objects.get(schedule=schedule)
+        itineraries = self.search(limit=3)
+        self.assertIn([self.kyiv_warsaw.id, flight.id], itineraries)
+        self.assertNotIn([self.kyiv_warsaw.id, occurrence], itineraries)
+
+        res = self.client.get(
+            ITINERARY_URL,
+            {"source": self.warsaw.id, "destination": self.berlin.id, "date": self.day.date().isoformat(), "limit": 3},
+        )
+        legs = {itinerary["legs"][0]["flight"]: itinerary["legs"][0] for itinerary in res.data}
+        self.assertEqual(legs[flight.id]["tickets_available"], 2)
+
+    def test_same_airports_rejected(self):
+        res = self.client.get(ITINERARY_URL, {"source": self.kyiv.id, "destination": self.kyiv.id})
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
@@ -0,0 +1,279 @@
+import json
+import os
+import time
+from datetime import datetime, time as day_time, timedelta, timezone
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.test import TestCase, tag
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from airport.models import Airport, Route, AirplaneType, Airplane, Crew, Flight, Order, Ticket, FlightSchedule
+
+FIXTURE_PATH = settings.BASE_DIR / "airline_fixture.json"
+
+# Comma separated dataset sizes (number of flights), e.g. "100,10000,100000".
+BENCHMARK_SIZES = [
+    int(size) for size in os.environ.get("AIRPORT_BENCHMARK_SIZES", "20,100").split(",")
+]
+# Path of the JSON report; no report is written unless it is set.
+BENCHMARK_REPORT = os.environ.get("AIRPORT_BENCHMARK_REPORT")
+BATCH_SIZE = 5000
+# First departure of the seeded flights; upcoming, as itinerary search only sees those.
+START = datetime.combine(datetime.now(timezone.utc).date() + timedelta(days=1), day_time.min, timezone.utc)
+
+
+def load_fixture():
+    with open(FIXTURE_PATH) as fixture:
+        objects = json.load(fixture)
+
+    by_model = {}
+    for obj in objects:
+        by_model.setdefault(obj["model"], []).append(obj)
+    return by_model
+
+
+def seed_dataset(user, flights_count):
+    """Seed a catalog shaped like airline_fixture.json with ``flights_count`` flights."""
+    fixture = load_fixture()
+
+    airports = Airport.objects.bulk_create(
+        Airport(**obj["fields"]) for obj in fixture["airport.airport"]
+    )
+    airports = {obj["pk"]: airport for obj, airport in zip(fixture["airport.airport"], airports)}
+
+    routes = Route.objects.bulk_create(
+        Route(
+            source=airports[obj["fields"]["source"]],
+            destination=airports[obj["fields"]["destination"]],
+            distance=obj["fields"]["distance"],
+        )
+        for obj in fixture["airport.route"]
+    )
+    routes = {obj["pk"]: route for obj, route in zip(fixture["airport.route"], routes)}
+
+    airplane_types = AirplaneType.objects.bulk_create(
+        AirplaneType(**obj["fields"]) for obj in fixture["airport.airplanetype"]
+    )
+    airplane_types = {
+        obj["pk"]: airplane_type
+        for obj, airplane_type in zip(fixture["airport.airplanetype"], airplane_types)
+    }
+
+    airplanes = Airplane.objects.bulk_create(
+        Airplane(
+            name=obj["fields"]["name"],
+            rows=obj["fields"]["rows"],
+            seats_in_row=obj["fields"]["seats_in_row"],
+            airplane_type=airplane_types[obj["fields"]["airplane_type"]],
+        )
+        for obj in fixture["airport.airplane"]
+    )
+    airplanes = {obj["pk"]: airplane for obj, airplane in zip(fixture["airport.airplane"], airplanes)}
+
+    crews = Crew.objects.bulk_create(Crew(**obj["fields"]) for obj in fixture["airport.crew"])
+    crews = {obj["pk"]: crew for obj, crew in zip(fixture["airport.crew"], crews)}
+
+    shapes = fixture["airport.flight"]
+    flights = []
+    for index in range(flights_count):
+        fields = shapes[index % len(shapes)]["fields"]
+        departure = datetime.fromisoformat(fields["departure_time"])
+        duration = datetime.fromisoformat(fields["arrival_time"]) - departure
+        departure_time = START + timedelta(hours=index, minutes=departure.minute)
+        flights.append(Flight(
+            route=routes[fields["route"]],
+            airplane=airplanes[fields["airplane"]],
+            departure_time=departure_time,
+            arrival_time=departure_time + duration,
+        ))
+    flights = Flight.objects.bulk_create(flights, batch_size=BATCH_SIZE)
+
+    Flight.crews.through.objects.bulk_create(
+        (
+            Flight.crews.through(flight_id=flight.id, crew_id=crews[crew_pk].id)
+            for index, flight in enumerate(flights)
+            for crew_pk in shapes[index % len(shapes)]["fields"]["crews"]
+        ),
+        batch_size=BATCH_SIZE,
+    )
+
+    orders = Order.objects.bulk_create(
+        (Order(user=user) for _ in range(max(1, flights_count // 10))),
+        batch_size=BATCH_SIZE,
+    )
+    Ticket.objects.bulk_create(
+        (
+            Ticket(order=order, flight=flights[index % len(flights)], row=1, seat=seat)
+            for index, order in enumerate(orders)
+            for seat in (1, 2)
+        ),
+        batch_size=BATCH_SIZE,
+    )
+
+    # A daily schedule per flight shape, so ?date= lists and boards merge occurrences in.
+    schedules = FlightSchedule.objects.bulk_create(
+        FlightSchedule(
+            route=routes[shape["fields"]["route"]],
+            airplane=airplanes[shape["fields"]["airplane"]],
+            weekdays="1234567",
+            departure_time=day_time(23, index),
+            duration=timedelta(hours=2),
+            valid_from=START.date(),
+            valid_until=START.date() + timedelta(days=30),
+        )
+        for index, shape in enumerate(shapes)
+    )
+    FlightSchedule.crews.through.objects.bulk_create(
+        FlightSchedule.crews.through(flightschedule_id=schedule.id, crew_id=crews[crew_pk].id)
+        for schedule, shape in zip(schedules, shapes)
+        for crew_pk in shape["fields"]["crews"]
+    )
+    return flights
+
+
+@tag("benchmark")
+class QueryCountBenchmarkTests(TestCase):
+    """Record query count, wall time and response size per endpoint and dataset size.
+
+    Query counts must not depend on how many rows an endpoint returns; a
+    difference between dataset sizes or page sizes points at an N+1. Set
+    AIRPORT_BENCHMARK_REPORT to a path to get the measurements as JSON.
+    """
+
+    # Endpoints that are only open to admin users.
+    ADMIN_ENDPOINTS = {
+        "flight-schedules-list",
+        "exports-flights",
+        "exports-tickets",
+        "exports-orders",
+    }
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email="benchmark@test.com", password="benchpass"
+        )
+        self.client.force_authenticate(self.user)
+        self.admin_client = APIClient()
+        self.admin_client.force_authenticate(
+            get_user_model().objects.create_superuser(email="admin@test.com", password="adminpass")
+        )
+
+    def endpoints(self, flights):
+        flight = flights[0]
+        route = flight.route
+        airplane = flight.airplane
+        crew = flight.crews.first()
+        day = START.date().isoformat()
+        return {
+            "airports-list": ("get", reverse("airport:airport-list"), None),
+            "routes-list": ("get", reverse("airport:route-list"), None),
+            "routes-detail": ("get", reverse("airport:route-detail", args=[route.id]), None),
+            "airplanes-list": ("get", reverse("airport:airplane-list"), None),
+            "airplanes-detail": ("get", reverse("airport:airplane-detail", args=[airplane.id]), None),
+            "airplane-types-list": ("get", reverse("airport:airplanetype-list"), None),
+            "flights-list-page-1": ("get", reverse("airport:flight-list") + "?page_size=1", None),
+            "flights-list-page-50": ("get", reverse("airport:flight-list") + "?page_size=50", None),
+            "flights-detail": ("get", reverse("airport:flight-detail", args=[flight.id]), None),
+            "flights-seats": ("get", reverse("airport:flight-seats", args=[flight.id]), None),
+            "flights-list-date": ("get", reverse("airport:flight-list") + f"?date={day}&page_size=50", None),
+            "async-flights-list": ("get", reverse("airport:async-flight-list") + "?page_size=50", None),
+            "crews-list": ("get", reverse("airport:crew-list"), None),
+            "crews-roster": ("get", reverse("airport:crew-roster", args=[crew.id]) + f"?date_from={day}", None),
+            "flight-schedules-list": ("get", reverse("airport:flightschedule-list"), None),
+            "airports-departures": (
+                "get", reverse("airport:airport-departures", args=[route.source_id]) + f"?date={day}", None
+            ),
+            "airports-arrivals": (
+                "get", reverse("airport:airport-arrivals", args=[route.destination_id]) + f"?date={day}", None
+            ),
+            "itineraries-list": (
+                "get",
+                reverse("airport:itinerary-list")
+                + f"?source={route.source_id}&destination={route.destination_id}&date={day}",
+                None,
+            ),
+            "search-list": ("get", reverse("airport:search-list") + "?q=a", None),
+            "search-autocomplete": ("get", reverse("airport:search-autocomplete") + "?q=a", None),
+            "exports-flights": ("get", reverse("airport:export-flights"), None),
+            "exports-tickets": ("get", reverse("airport:export-tickets") + "?output=csv", None),
+            "exports-orders": ("get", reverse("airport:export-orders"), None),
+            "holds-create": (
+                "post",
+                reverse("airport:hold-list"),
+                {"tickets": [{"row": 2, "seat": 1, "flight": flight.id}, {"row": 2, "seat": 2, "flight": flight.id}]},
+            ),
+            "orders-create": (
+                "post",
+                reverse("airport:order-list"),
+                {"tickets": [{"row": 3, "seat": 1, "flight": flight.id}, {"row": 3, "seat": 2, "flight": flight.id}]},
+            ),
+            "orders-list": ("get", reverse("airport:order-list"), None),
+            "user-me": ("get", reverse("user:me"), None),
+            "user-register": (
+                "post",
+                reverse("user:register"),
+                {"email": "new@test.com", "password": "newpass123"},
+            ),
+            "user-token": (
+                "post",
+                reverse("user:token_obtain_pair"),
+                {"email": "benchmark@test.com", "password": "benchpass"},
+            ),
+        }
+
+    def measure(self, client, method, url, data):
+        # Throttling history lives in the cache and would turn runs into 429s.
+        cache.clear()
+        with CaptureQueriesContext(connection) as queries:
+            started = time.perf_counter()
+            response = getattr(client, method)(url, data, format="json")
+            # Exports stream their rows, so their queries run while reading the body.
+            content = b"".join(response.streaming_content) if response.streaming else response.content
+            elapsed = time.perf_counter() - started
+
+        self.assertLess(response.status_code, 300, f"{method.upper()} {url}")
+        return {
+            "status": response.status_code,
+            "queries": len(queries),
+            "time_ms": round(elapsed * 1000, 3),
+            "bytes": len(content),
+        }
+
+    def run_size(self, size):
+        results = {}
+        with transaction.atomic():
+            flights = seed_dataset(self.user, size)
+            for name, (method, url, data) in self.endpoints(flights).items():
+                client = self.admin_client if name in self.ADMIN_ENDPOINTS else self.client
+                results[name] = self.measure(client, method, url, data)
+            transaction.set_rollback(True)
+        return results
+
+    def test_query_counts_do_not_grow_with_data(self):
+        report = {str(size): self.run_size(size) for size in BENCHMARK_SIZES}
+
+        if BENCHMARK_REPORT:
+            with open(BENCHMARK_REPORT, "w") as report_file:
+                json.dump(report, report_file, indent=2)
+
+        for results in report.values():
+            self.assertEqual(
+                results["flights-list-page-1"]["queries"],
+                results["flights-list-page-50"]["queries"],
+                "Flight list query count grows with page size",
+            )
+
+        baseline = report[str(BENCHMARK_SIZES[0])]
+        for size, results in report.items():
+            for name, result in results.items():
+                self.assertEqual(
+                    result["queries"],
+                    baseline[name]["queries"],
+                    f"{name} query count grows with dataset size ({size} flights)",
+                )
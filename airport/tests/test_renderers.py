@@ -0,0 +1,102 @@
+import datetime
+import decimal
+import io
+import json
+import uuid
+from unittest import mock
+
+from django.test import TestCase
+from django.utils.translation import gettext_lazy
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+
+from airport import parsers, renderers
+from airport.parsers import FastJSONParser
+from airport.renderers import FastJSONRenderer
+from airport.serializers import FlightListSerializer
+from airport.tests.test_flight_api import sample_flight, sample_crew
+from airport.views import FlightViewSet
+
+PAYLOAD = {
+    "id": 1,
+    "naive": datetime.datetime(2025, 1, 2, 3, 4, 5, 678901),
+    "aware": datetime.datetime(2025, 1, 2, 3, 4, 5, tzinfo=datetime.timezone.utc),
+    "date": datetime.date(2025, 1, 2),
+    "time": datetime.time(3, 4, 5, 123456),
+    "duration": datetime.timedelta(hours=1, seconds=5),
+    "price": decimal.Decimal("12.50"),
+    "uuid": uuid.UUID("12345678-1234-5678-1234-567812345678"),
+    "lazy": gettext_lazy("Flight"),
+    "separators": "line\u2028paragraph\u2029",
+    "unicode": "Zürich – Київ",
+    "nested": [{"a": None, "b": True}, (1, 2.5)],
+    1: "int key",
+}
+
+
+class FastJSONRendererTests(TestCase):
+    def assertSameAsJSONRenderer(self, data, accepted_media_type=None, renderer_context=None):
+        self.assertEqual(
+            FastJSONRenderer().render(data, accepted_media_type, renderer_context),
+            JSONRenderer().render(data, accepted_media_type, renderer_context),
+        )
+
+    def test_same_output_as_json_renderer(self):
+        self.assertSameAsJSONRenderer(PAYLOAD)
+
+    def test_same_output_for_flight_list(self):
+        crew = sample_crew()
+        for _ in range(3):
+            sample_flight().crews.add(crew)
+        data = FlightListSerializer(FlightViewSet.queryset.all(), many=True).data
+        self.assertSameAsJSONRenderer(data)
+
+    def test_exponent_floats_differ_only_in_form(self):
+        data = {"big": 1e16, "small": 1e-7, "plain": 0.1}
+        fast = FastJSONRenderer().render(data)
+        self.assertEqual(fast, b'{"big":1e16,"small":1e-7,"plain":0.1}')
+        self.assertNotEqual(fast, JSONRenderer().render(data))
+        self.assertEqual(json.loads(fast), json.loads(JSONRenderer().render(data)))
+
+    def test_uses_orjson(self):
+        with mock.patch.object(JSONRenderer, "render") as render:
+            FastJSONRenderer().render(PAYLOAD)
+        render.assert_not_called()
+
+    def test_unsupported_values_fall_back(self):
+        self.assertSameAsJSONRenderer({"big": 2 ** 70})
+
+    def test_indent_falls_back(self):
+        self.assertSameAsJSONRenderer(PAYLOAD, "application/json; indent=4")
+        self.assertSameAsJSONRenderer(PAYLOAD, renderer_context={"indent": 2})
+
+    def test_none_renders_empty(self):
+        self.assertEqual(FastJSONRenderer().render(None), b"")
+
+    def test_without_orjson(self):
+        with mock.patch.object(renderers, "orjson", None):
+            self.assertSameAsJSONRenderer(PAYLOAD)
+
+
+class FastJSONParserTests(TestCase):
+    BODY = '{"tickets": [{"row": 1, "seat": 2, "flight": 3}], "note": "Zürich\\u2028"}'.encode()
+
+    def parse(self, parser, body, encoding="utf-8"):
+        return parser.parse(io.BytesIO(body), parser_context={"encoding": encoding})
+
+    def test_same_result_as_json_parser(self):
+        self.assertEqual(self.parse(FastJSONParser(), self.BODY), self.parse(JSONParser(), self.BODY))
+
+    def test_other_encoding(self):
+        body = self.BODY.decode().encode("utf-16")
+        self.assertEqual(self.parse(FastJSONParser(), body, "utf-16"), self.parse(JSONParser(), self.BODY))
+
+    def test_invalid_json(self):
+        for body in (b"{", b'{"value": NaN}', b"\xff"):
+            with self.assertRaises(ParseError):
+                self.parse(FastJSONParser(), body)
+
+    def test_without_orjson(self):
+        with mock.patch.object(parsers, "orjson", None):
+            self.assertEqual(self.parse(FastJSONParser(), self.BODY), self.parse(JSONParser(), self.BODY))
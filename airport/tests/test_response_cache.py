@@ -0,0 +1,133 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from airport.models import Airport, AirplaneType, Airplane, Route, Flight, Crew, Order, Ticket
+
+AIRPORT_URL = reverse("airport:airport-list")
+ROUTE_URL = reverse("airport:route-list")
+AIRPLANE_TYPE_URL = reverse("airport:airplanetype-list")
+FLIGHT_URL = reverse("airport:flight-list")
+
+
+class CatalogResponseCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(email="user@test.com", password="testpass")
+        self.client.force_authenticate(self.user)
+
+        self.kyiv = Airport.objects.create(name="Boryspil", closest_big_city="Kyiv")
+        self.berlin = Airport.objects.create(name="Tegel", closest_big_city="Berlin")
+
+    def test_repeated_list_is_served_from_cache(self):
+        first = self.client.get(AIRPORT_URL)
+        with self.assertNumQueries(0):
+            second = self.client.get(AIRPORT_URL)
+
+        self.assertEqual(second.status_code, status.HTTP_200_OK)
+        self.assertEqual(first.data, second.data)
+
+    def test_query_string_is_part_of_the_key(self):
+        self.client.get(AIRPORT_URL)
+        res = self.client.get(f"{AIRPORT_URL}?city=Berlin")
+        self.assertEqual([airport["name"] for airport in res.data], ["Tegel"])
+
+    def test_save_and_delete_invalidate_the_cache(self):
+        self.client.get(AIRPORT_URL)
+
+        Airport.objects.create(name="Heathrow", closest_big_city="London")
+        res = self.client.get(AIRPORT_URL)
+        self.assertEqual(len(res.data), 3)
+
+        self.berlin.delete()
+        res = self.client.get(AIRPORT_URL)
+        self.assertEqual(len(res.data), 2)
+
+    def test_routes_follow_airport_changes(self):
+        Route.objects.create(source=self.kyiv, destination=self.berlin, distance=1200)
+        res = self.client.get(ROUTE_URL)
+        self.assertEqual(res.data[0]["source"]["name"], "Boryspil")
+
+        self.kyiv.name = "Kyiv Boryspil"
+        self.kyiv.save()
+        res = self.client.get(ROUTE_URL)
+        self.assertEqual(res.data[0]["source"]["name"], "Kyiv Boryspil")
+
+    def test_create_through_api_invalidates_the_cache(self):
+        admin = get_user_model().objects.create_user(
+            email="admin@test.com", password="adminpass", is_staff=True
+        )
+        self.client.get(AIRPLANE_TYPE_URL)
+        AirplaneType.objects.create(name="Airbus A320")
+
+        self.client.force_authenticate(admin)
+        self.client.post(AIRPLANE_TYPE_URL, {"name": "Boeing 737"})
+        res = self.client.get(AIRPLANE_TYPE_URL)
+        self.assertEqual(len(res.data), 2)
+
+
+class ConditionalGetTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(email="user@test.com", password="testpass")
+        self.client.force_authenticate(self.user)
+
+        kyiv = Airport.objects.create(name="Boryspil", closest_big_city="Kyiv")
+        berlin = Airport.objects.create(name="Tegel", closest_big_city="Berlin")
+        airplane = Airplane.objects.create(
+            name="Boeing 737",
+            rows=20,
+            seats_in_row=6,
+            airplane_type=AirplaneType.objects.create(name="Boeing"),
+        )
+        self.flight = Flight.objects.create(
+            route=Route.objects.create(source=kyiv, destination=berlin, distance=1200),
+            airplane=airplane,
+            departure_time="2025-09-24T12:00:00Z",
+            arrival_time="2025-09-24T14:00:00Z",
+        )
+
+    def test_unchanged_flights_return_not_modified(self):
+        res = self.client.get(FLIGHT_URL)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertIn("Last-Modified", res)
+
+        with self.assertNumQueries(0):
+            res = self.client.get(FLIGHT_URL, HTTP_IF_NONE_MATCH=res["ETag"])
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(res.content, b"")
+
+    def test_booking_changes_flight_etag(self):
+        etag = self.client.get(FLIGHT_URL)["ETag"]
+
+        order = Order.objects.create(user=self.user)
+        Ticket.objects.create(order=order, flight=self.flight, row=1, seat=1)
+
+        res = self.client.get(FLIGHT_URL, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(res["ETag"], etag)
+        self.assertEqual(res.data["results"][0]["tickets"], 119)
+
+    def test_crew_assignment_changes_flight_etag(self):
+        url = reverse("airport:flight-detail", args=[self.flight.id])
+        etag = self.client.get(url)["ETag"]
+
+        self.flight.crews.add(Crew.objects.create(first_name="Alice", last_name="Smith"))
+        res = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(res.data["crews"]), 1)
+
+    def test_etag_depends_on_query_string(self):
+        etag = self.client.get(AIRPORT_URL)["ETag"]
+        res = self.client.get(f"{AIRPORT_URL}?city=Kyiv", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    def test_if_modified_since(self):
+        last_modified = self.client.get(AIRPORT_URL)["Last-Modified"]
+        res = self.client.get(AIRPORT_URL, HTTP_IF_MODIFIED_SINCE=last_modified)
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
@@ -0,0 +1,144 @@
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase, SimpleTestCase
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from airport.models import AirplaneType
+from airport.search import PrefixTrie, search_index
+from airport.tests.test_flight_api import sample_airport, sample_airplane
+
+SEARCH_URL = reverse("airport:search-list")
+AUTOCOMPLETE_URL = reverse("airport:search-autocomplete")
+
+
+def entry(kind, pk, name, detail=None):
+    return {"type": kind, "id": pk, "name": name, "detail": detail}
+
+
+class PrefixTrieTests(SimpleTestCase):
+    def setUp(self):
+        self.trie = PrefixTrie.build(
+            [
+                (entry("airport", 1, "Newark Liberty", "New York"), "Newark Liberty New York"),
+                (entry("airport", 2, "John F. Kennedy", "New York"), "John F. Kennedy New York"),
+                (entry("airport", 3, "Zürich", "Zürich"), "Zürich Zürich"),
+                (entry("airplane_type", 4, "Airbus A320"), "Airbus A320"),
+            ],
+            max_entries=3,
+        )
+
+    def ids(self, query, limit=10):
+        return [found["id"] for found in self.trie.search(query, limit)]
+
+    def test_prefixes_of_any_word(self):
+        self.assertEqual(self.ids("new"), [1, 2])
+        self.assertEqual(self.ids("kenn"), [2])
+        self.assertEqual(self.ids("a32"), [4])
+        self.assertEqual(self.ids("boston"), [])
+        self.assertEqual(self.ids("  !? "), [])
+
+    def test_every_word_must_match(self):
+        self.assertEqual(self.ids("new york john"), [2])
+        self.assertEqual(self.ids("york lib"), [1])
+        self.assertEqual(self.ids("new paris"), [])
+
+    def test_case_and_accents_ignored(self):
+        self.assertEqual(self.ids("ZUR"), [3])
+        self.assertEqual(self.ids("zür"), [3])
+
+    def test_name_matches_ranked_first(self):
+        results = self.trie.search("new")
+        self.assertEqual(results[0]["id"], 1)
+        self.assertGreater(results[0]["score"], results[1]["score"])
+        self.assertEqual(self.trie.search("zurich")[0]["score"], 1.0)
+        self.assertEqual(self.ids("new", limit=1), [1])
+
+    def test_nodes_keep_best_entries_only(self):
+        trie = PrefixTrie.build(
+            [(entry("airport", pk, "A" * pk), "A" * pk) for pk in range(1, 10)], max_entries=3
+        )
+        self.assertEqual([found["id"] for found in trie.search("a")], [1, 2, 3])
+
+    def test_words_beyond_full_nodes_are_found(self):
+        entries = [(entry("airport", pk, f"Airport {pk}", "Xcity"), f"Airport {pk} Xcity") for pk in range(80)]
+        entries += [(entry("airport", pk, f"Zed {pk}", "Elsewhere"), f"Zed {pk} Elsewhere") for pk in range(80, 160)]
+        entries.append((entry("airport", 160, "Intl Zed Airport", "Xcity"), "Intl Zed Airport Xcity"))
+        trie = PrefixTrie.build(entries)
+        self.assertEqual([found["id"] for found in trie.search("xcity zed")], [160])
+        self.assertEqual([found["id"] for found in trie.search("zed intl")], [160])
+        self.assertEqual([found["id"] for found in trie.search("xcity airport 7", limit=3)], [7, 70, 71])
+
+    def test_autocomplete_answers_from_memory(self):
+        trie = PrefixTrie.build(
+            [(entry("airport", pk, f"Airport {pk}", f"City {pk % 500}"), f"Airport {pk} City {pk % 500}")
+             for pk in range(20000)]
+        )
+        started = time.perf_counter()
+        for _ in range(100):
+            trie.search("city 42")
+        self.assertLess((time.perf_counter() - started) / 100, 0.001)
+
+
+class SearchApiTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(email="user@test.com", password="testpass")
+        self.client.force_authenticate(self.user)
+
+        self.heathrow = sample_airport("Heathrow", "London")
+        self.gatwick = sample_airport("Gatwick", "London")
+        self.airplane = sample_airplane(name="Spirit of London")
+
+    def search(self, url, q, **params):
+        res = self.client.get(url, {"q": q, **params})
+        self.assertEqual(res.status_code, status.HTTP_200_OK, res.data)
+        return [(found["type"], found["id"]) for found in res.data]
+
+    def test_autocomplete(self):
+        self.assertEqual(
+            self.search(AUTOCOMPLETE_URL, "lond"),
+            [("airplane", self.airplane.id), ("airport", self.gatwick.id), ("airport", self.heathrow.id)],
+        )
+        self.assertEqual(self.search(AUTOCOMPLETE_URL, "heath"), [("airport", self.heathrow.id)])
+        self.assertEqual(
+            self.search(AUTOCOMPLETE_URL, "boe"),
+            [("airplane_type", self.airplane.airplane_type_id), ("airplane", self.airplane.id)],
+        )
+        self.assertEqual(len(self.search(AUTOCOMPLETE_URL, "lond", limit=1)), 1)
+
+    def test_results_follow_changes(self):
+        self.assertEqual(self.search(AUTOCOMPLETE_URL, "stansted"), [])
+        stansted = sample_airport("Stansted", "London")
+        self.assertEqual(self.search(AUTOCOMPLETE_URL, "stansted"), [("airport", stansted.id)])
+
+        airplane_type = AirplaneType.objects.get(pk=self.airplane.airplane_type_id)
+        airplane_type.name = "Airbus A380"
+        airplane_type.save()
+        res = self.client.get(AUTOCOMPLETE_URL, {"q": "a380"})
+        self.assertIn(("airplane", self.airplane.id, "Airbus A380"),
+                      [(found["type"], found["id"], found["detail"]) for found in res.data])
+
+    def test_index_reused_until_changes(self):
+        search_index.search("heath")
+        with self.assertNumQueries(0):
+            search_index.search("gat")
+
+    def test_search(self):
+        results = self.search(SEARCH_URL, "heathrow")
+        self.assertEqual(results[0], ("airport", self.heathrow.id))
+        self.assertNotIn(("airport", self.gatwick.id), results)
+
+    def test_invalid_query(self):
+        self.assertEqual(self.client.get(SEARCH_URL).status_code, status.HTTP_400_BAD_REQUEST)
+        res = self.client.get(AUTOCOMPLETE_URL, {"q": "x", "limit": 0})
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_requires_authentication(self):
+        self.client.force_authenticate(None)
+        self.assertEqual(self.client.get(SEARCH_URL, {"q": "x"}).status_code, status.HTTP_401_UNAUTHORIZED)
@@ -0,0 +1,190 @@
+import time
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from airport.cache import get_versions
+from airport.holds import SeatHold, SeatsHeld, SEAT_HOLDS_VERSION
+from airport.models import Order, Ticket
+from airport.tests.test_flight_api import sample_flight, sample_airplane
+
+HOLD_URL = reverse("airport:hold-list")
+HOLD_DETAIL_URL = lambda token: reverse("airport:hold-detail", args=[token])
+CONFIRM_URL = lambda token: reverse("airport:hold-confirm", args=[token])
+ORDER_URL = reverse("airport:order-list")
+SEATS_URL = lambda pk: reverse("airport:flight-seats", args=[pk])
+FLIGHT_URL = reverse("airport:flight-list")
+ASYNC_FLIGHT_URL = reverse("airport:async-flight-list")
+
+
+class SeatHoldTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(email="user@test.com", password="testpass")
+        self.other_user = get_user_model().objects.create_user(email="other@test.com", password="testpass")
+        self.client.force_authenticate(self.user)
+        self.other_client = APIClient()
+        self.other_client.force_authenticate(self.other_user)
+
+        self.flight = sample_flight(airplane=sample_airplane(rows=2, seats_in_row=3))
+
+    def hold(self, client, *seats):
+        return client.post(
+            HOLD_URL,
+            {"tickets": [{"row": row, "seat": seat, "flight": self.flight.id} for row, seat in seats]},
+            format="json",
+        )
+
+    def test_hold_seats(self):
+        res = self.hold(self.client, (1, 1), (1, 2))
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(
+            res.data["tickets"],
+            [
+                {"row": 1, "seat": 1, "flight": self.flight.id},
+                {"row": 1, "seat": 2, "flight": self.flight.id},
+            ],
+        )
+        self.assertIn("expires_at", res.data)
+
+        res = self.client.get(HOLD_DETAIL_URL(res.data["id"]))
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    def test_held_seats_cannot_be_held_again(self):
+        self.hold(self.client, (1, 1))
+        res = self.hold(self.other_client, (1, 2), (1, 1))
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(res.data["tickets"], [f"Seat 1: 1 on flight {self.flight.id} is on hold"])
+
+        # The seats claimed before the conflict are given back.
+        self.assertEqual(self.hold(self.other_client, (1, 2)).status_code, status.HTTP_201_CREATED)
+
+    def test_sold_seats_cannot_be_held(self):
+        Ticket.objects.create(order=Order.objects.create(user=self.other_user), flight=self.flight, row=2, seat=3)
+        res = self.hold(self.client, (2, 3))
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_held_seats_cannot_be_ordered_by_others(self):
+        self.hold(self.client, (1, 1))
+        res = self.other_client.post(
+            ORDER_URL, {"tickets": [{"row": 1, "seat": 1, "flight": self.flight.id}]}, format="json"
+        )
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(Ticket.objects.exists())
+
+        res = self.client.post(
+            ORDER_URL, {"tickets": [{"row": 1, "seat": 1, "flight": self.flight.id}]}, format="json"
+        )
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+
+    def test_confirm_creates_order_and_releases_hold(self):
+        token = self.hold(self.client, (1, 1), (2, 2)).data["id"]
+        res = self.client.post(CONFIRM_URL(token))
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+
+        order = Order.objects.get(id=res.data["id"])
+        self.assertEqual(order.user, self.user)
+        self.assertEqual(
+            sorted(order.tickets.values_list("row", "seat")), [(1, 1), (2, 2)]
+        )
+        self.assertIsNone(SeatHold.get(token))
+        self.assertEqual(self.client.post(CONFIRM_URL(token)).status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_release(self):
+        token = self.hold(self.client, (1, 1)).data["id"]
+        res = self.client.delete(HOLD_DETAIL_URL(token))
+        self.assertEqual(res.status_code, status.HTTP_204_NO_CONTENT)
+        self.assertEqual(self.hold(self.other_client, (1, 1)).status_code, status.HTTP_201_CREATED)
+
+    def test_other_users_hold_is_hidden(self):
+        token = self.hold(self.client, (1, 1)).data["id"]
+        self.assertEqual(self.other_client.get(HOLD_DETAIL_URL(token)).status_code, status.HTTP_404_NOT_FOUND)
+        self.assertEqual(self.other_client.post(CONFIRM_URL(token)).status_code, status.HTTP_404_NOT_FOUND)
+        self.assertEqual(self.other_client.delete(HOLD_DETAIL_URL(token)).status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_seat_map_shows_held_seats(self):
+        Ticket.objects.create(order=Order.objects.create(user=self.other_user), flight=self.flight, row=1, seat=3)
+        self.hold(self.client, (1, 1), (2, 2))
+        res = self.client.get(SEATS_URL(self.flight.id))
+        self.assertEqual(res.data["seats"], ["201", "020"])
+        self.assertEqual(res.data["held"], 2)
+        self.assertEqual(res.data["available"], 3)
+
+    def test_flight_list_subtracts_held_seats(self):
+        def tickets(url=FLIGHT_URL, **headers):
+            res = self.client.get(url, **headers)
+            return res, res.data["results"][0]["tickets"] if res.status_code == status.HTTP_200_OK else None
+
+        res, available = tickets()
+        self.assertEqual(available, 6)
+        etag = res["ETag"]
+
+        token = self.hold(self.client, (1, 1), (2, 2)).data["id"]
+        res, available = tickets(HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(available, 4)
+        self.assertEqual(self.client.get(ASYNC_FLIGHT_URL).json()["results"][0]["tickets"], 4)
+
+        # The holder booking a held seat counts it once.
+        res = self.client.post(
+            ORDER_URL, {"tickets": [{"row": 1, "seat": 1, "flight": self.flight.id}]}, format="json"
+        )
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED, res.data)
+        self.assertEqual(tickets()[1], 4)
+
+        self.client.delete(HOLD_DETAIL_URL(token))
+        self.assertEqual(tickets()[1], 5)
+
+    def test_expired_hold_frees_seats(self):
+        with mock.patch("airport.holds.settings.SEAT_HOLD_TTL", 1):
+            token = self.hold(self.client, (1, 1)).data["id"]
+        versions = get_versions([SEAT_HOLDS_VERSION])
+        with mock.patch("django.core.cache.backends.locmem.time.time", return_value=10 ** 10):
+            self.assertIsNone(SeatHold.get(token))
+            self.assertEqual(SeatHold.holders([(self.flight.id, 1, 1)]), {})
+            # Flight list validators change when the last hold expires.
+            self.assertNotEqual(get_versions([SEAT_HOLDS_VERSION]), versions)
+
+    def test_earlier_hold_expiry_changes_version(self):
+        with mock.patch("airport.holds.settings.SEAT_HOLD_TTL", 1):
+            self.hold(self.client, (1, 1))
+        self.hold(self.other_client, (2, 2))
+        self.assertEqual(SeatHold.held_counts([self.flight.id]), {self.flight.id: 2})
+        versions = get_versions([SEAT_HOLDS_VERSION])
+
+        now = time.time()
+        with mock.patch("django.core.cache.backends.locmem.time.time", return_value=now + 10):
+            self.assertEqual(SeatHold.held_counts([self.flight.id]), {self.flight.id: 1})
+            expired_versions = get_versions([SEAT_HOLDS_VERSION])
+            self.assertNotEqual(expired_versions, versions)
+        with mock.patch("django.core.cache.backends.locmem.time.time", return_value=now + 20):
+            # Nothing expired since, so the version holds until the later hold expires.
+            self.assertEqual(get_versions([SEAT_HOLDS_VERSION]), expired_versions)
+        with mock.patch("django.core.cache.backends.locmem.time.time", return_value=now + 10 ** 4):
+            self.assertEqual(SeatHold.held_counts([self.flight.id]), {})
+            self.assertNotEqual(get_versions([SEAT_HOLDS_VERSION]), expired_versions)
+
+    def test_held_counts_read_one_key_per_flight(self):
+        self.hold(self.client, (1, 1), (2, 3))
+        other = sample_flight(airplane=sample_airplane(rows=50, seats_in_row=10))
+        with mock.patch("airport.holds.cache.get_many", wraps=cache.get_many) as get_many:
+            self.assertEqual(SeatHold.held_counts([self.flight.id, other.id]), {self.flight.id: 2})
+        (keys,), _ = get_many.call_args
+        self.assertEqual(len(keys), 2)
+
+        SeatHold.get(self.hold(self.other_client, (1, 2)).data["id"]).release()
+        self.assertEqual(SeatHold.held_counts([self.flight.id]), {self.flight.id: 2})
+
+    def test_create_releases_partial_claims(self):
+        SeatHold.create(self.other_user, [(self.flight.id, 1, 2)])
+        with self.assertRaises(SeatsHeld) as error:
+            SeatHold.create(self.user, [(self.flight.id, 1, 3), (self.flight.id, 1, 1), (self.flight.id, 1, 2)])
+        self.assertEqual(error.exception.seats, [(self.flight.id, 1, 2)])
+        self.assertEqual(SeatHold.holders([(self.flight.id, 1, 1), (self.flight.id, 1, 3)]), {})
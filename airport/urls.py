@@ -1,8 +1,11 @@
 from django.urls import path, include
 from rest_framework import routers
 
+from airport.async_views import AsyncFlightListView, AsyncFlightDetailView, AsyncAirportSearchView, \
+    AsyncRouteSearchView
 from airport.views import AirportViewSet, RouteViewSet, AirplaneViewSet, AirplaneTypeViewSet, FlightViewSet, \
-    OrderViewSet
+    OrderViewSet, ExportViewSet, SeatHoldViewSet, ItineraryViewSet, FlightScheduleViewSet, \
+    CrewViewSet, SearchViewSet
 
 app_name = 'airport'
 
@@ -11,10 +14,20 @@ router.register("airports", AirportViewSet)
 router.register("routes", RouteViewSet)
 router.register("airplanes", AirplaneViewSet)
 router.register("airplane-types", AirplaneTypeViewSet)
+router.register("crews", CrewViewSet)
 router.register("flights", FlightViewSet)
+router.register("flight-schedules", FlightScheduleViewSet)
 router.register("orders", OrderViewSet)
+router.register("holds", SeatHoldViewSet, basename="hold")
+router.register("itineraries", ItineraryViewSet, basename="itinerary")
+router.register("search", SearchViewSet, basename="search")
+router.register("exports", ExportViewSet, basename="export")
 
 
 urlpatterns = [
     path("", include(router.urls)),
+    path("async/flights/", AsyncFlightListView.as_view(), name="async-flight-list"),
+    path("async/flights/<int:pk>/", AsyncFlightDetailView.as_view(), name="async-flight-detail"),
+    path("async/airports/", AsyncAirportSearchView.as_view(), name="async-airport-list"),
+    path("async/routes/", AsyncRouteSearchView.as_view(), name="async-route-list"),
 ]
\ No newline at end of file
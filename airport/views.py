@@ -1,34 +1,62 @@
-from datetime import datetime
+from datetime import datetime, time, timedelta
 
-from django.db.models import F, Value, Count
+from django.conf import settings
+from django.core.paginator import InvalidPage
+from django.db import connection
+from django.db.models import F, Value, Prefetch, QuerySet
+from django.utils import timezone
 from django.db.models.functions import Concat
 from drf_spectacular.types import OpenApiTypes
 from drf_spectacular.utils import extend_schema, OpenApiParameter
-from rest_framework import viewsets, mixins, status
+from rest_framework import viewsets, mixins, status, serializers
 from rest_framework.decorators import action
-from rest_framework.pagination import PageNumberPagination
+from rest_framework.exceptions import NotFound, UnsupportedMediaType
+from rest_framework.pagination import PageNumberPagination, CursorPagination
 from rest_framework.permissions import IsAuthenticated, IsAdminUser
 from rest_framework.response import Response
 
-from airport.models import Airport, Route, Airplane, Flight, Order, AirplaneType
+from airport.boards import get_board, DEPARTURES, ARRIVALS
+from airport.cache import VersionedResponseMixin
+from airport.exports import streaming_export, OUTPUT_FORMATS, FLIGHT_COLUMNS, TICKET_COLUMNS, ORDER_COLUMNS, \
+    flight_rows, ticket_rows, order_rows
+from airport.holds import SeatHold, SEAT_HOLDS_VERSION
+from airport.imports import ScheduleImporter, IMPORT_FORMATS, RECORD_READERS, decode_lines
+from airport.intervals import crew_roster
+from airport.itineraries import itinerary_index
+from airport.models import Airport, Route, Airplane, Flight, Order, AirplaneType, Ticket, Crew, FlightSchedule, \
+    SEATS_SOLD_VERSION
 from airport.serializers import AirportSerializer, RouteSerializer, AirplaneSerializer, FlightSerializer, \
     OrderSerializer, AirplaneTypeSerializer, AirplaneListSerializer, FlightListSerializer, \
     RouteDetailSerializer, AirplaneDetailSerializer, FlightDetailSerializer, OrderListSerializer, RouteListSerializer, \
-    AirplaneImageSerializer
+    AirplaneImageSerializer, FlightSeatMapSerializer, FlightListValuesSerializer, SeatHoldSerializer, \
+    ItinerarySearchSerializer, FlightScheduleSerializer, CrewSerializer, SearchSerializer, \
+    ExportFilterSerializer, FlightFilterSerializer
+from airport.search import search_index, database_search
+from airport.seat_map import SeatMap
+
+
+BOARD_DATE_PARAMETER = OpenApiParameter(
+    name="date",
+    type=OpenApiTypes.DATE,
+    description="Day of the board (ex. ?date=2025-10-08), today by default",
+)
 
 
 class AirportViewSet(
+    VersionedResponseMixin,
     mixins.ListModelMixin,
     mixins.CreateModelMixin,
     viewsets.GenericViewSet,
 ):
     queryset = Airport.objects.all()
     serializer_class = AirportSerializer
+    version_models = (Airport,)
+    lookup_value_regex = r"\d+"
 
-    def get_queryset(self):
-        name = self.request.query_params.get("name")
-        city = self.request.query_params.get("city")
-        queryset = self.queryset
+    @staticmethod
+    def filter_airports(queryset, query_params):
+        name = query_params.get("name")
+        city = query_params.get("city")
 
         if name:
             queryset = queryset.filter(name__icontains=name)
@@ -38,6 +66,9 @@ class AirportViewSet(
 
         return queryset.distinct()
 
+    def get_queryset(self):
+        return self.filter_airports(self.queryset, self.request.query_params)
+
     @extend_schema(
         parameters=[
             OpenApiParameter(
@@ -53,11 +84,47 @@ class AirportViewSet(
         ]
     )
     def list(self, request, *args, **kwargs):
-        return super().list(request, *args, **kwargs)
+        return self.versioned_response(super().list, request, *args, **kwargs)
 
-class RouteViewSet(viewsets.ModelViewSet):
+    def board(self, kind):
+        date = self.request.query_params.get("date")
+        if date:
+            date = serializers.DateField().run_validation(date)
+        else:
+            date = timezone.localdate()
+        airport_id = int(self.kwargs["pk"])
+        board = get_board(kind, airport_id, date)
+        if board is None:
+            raise NotFound("No Airport matches the given query.")
+        return Response({
+            "airport": airport_id,
+            "date": date.isoformat(),
+            "flights": board,
+        })
+
+    @extend_schema(parameters=[BOARD_DATE_PARAMETER])
+    @action(detail=True, methods=["GET"])
+    def departures(self, request, pk=None):
+        """Flights leaving the airport on a day, served from the precomputed board.
+
+        Scheduled flights that are not booked yet are listed under their occurrence id.
+        """
+        return self.board(DEPARTURES)
+
+    @extend_schema(parameters=[BOARD_DATE_PARAMETER])
+    @action(detail=True, methods=["GET"])
+    def arrivals(self, request, pk=None):
+        """Flights landing at the airport on a day, served from the precomputed board.
+
+        Scheduled flights that are not booked yet are listed under their occurrence id.
+        """
+        return self.board(ARRIVALS)
+
+
+class RouteViewSet(VersionedResponseMixin, viewsets.ModelViewSet):
     queryset = Route.objects.all().select_related('source', 'destination')
     serializer_class = RouteSerializer
+    version_models = (Route, Airport)
 
     def get_serializer_class(self):
         if self.action == "list":
@@ -84,10 +151,17 @@ class RouteViewSet(viewsets.ModelViewSet):
             )
         return queryset.distinct()
 
+    def list(self, request, *args, **kwargs):
+        return self.versioned_response(super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.versioned_response(super().retrieve, request, *args, **kwargs)
 
-class AirplaneViewSet(viewsets.ModelViewSet):
+
+class AirplaneViewSet(VersionedResponseMixin, viewsets.ModelViewSet):
     queryset = Airplane.objects.all().select_related("airplane_type")
     serializer_class = AirplaneSerializer
+    version_models = (Airplane, AirplaneType)
 
     def get_serializer_class(self):
         if self.action == "list":
@@ -101,7 +175,7 @@ class AirplaneViewSet(viewsets.ModelViewSet):
     def get_queryset(self):
         name = self.request.query_params.get("name")
 
-        queryset = self.queryset
+        queryset = self.queryset.all()
 
         if name:
             queryset = queryset.filter(name__icontains=name)
@@ -131,23 +205,116 @@ class AirplaneViewSet(viewsets.ModelViewSet):
         ]
     )
     def list(self, request, *args, **kwargs):
-        return super().list(request, *args, **kwargs)
+        return self.versioned_response(super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.versioned_response(super().retrieve, request, *args, **kwargs)
 
 
 class AirplaneTypeViewSet(
+    VersionedResponseMixin,
     mixins.ListModelMixin,
     mixins.CreateModelMixin,
     viewsets.GenericViewSet,
 ):
     queryset = AirplaneType.objects.all()
     serializer_class = AirplaneTypeSerializer
+    version_models = (AirplaneType,)
+
+    def list(self, request, *args, **kwargs):
+        return self.versioned_response(super().list, request, *args, **kwargs)
+
+
+def day_filter(field, date):
+    """Filter kwargs matching ``field`` on ``date``, a date or a YYYY-MM-DD string.
+
+    A half-open range instead of ``field__date`` keeps an index on the field usable.
+    """
+    if isinstance(date, str):
+        date = datetime.strptime(date, '%Y-%m-%d').date()
+    return {
+        f"{field}__gte": day_start(date),
+        f"{field}__lt": day_start(date + timedelta(days=1)),
+    }
+
+
+def day_start(date):
+    return timezone.make_aware(datetime.combine(date, time.min))
+
 
 class FlightPagination(PageNumberPagination):
     page_size = 3
     page_size_query_param = 'page_size'
 
+    async def apaginate_queryset(self, queryset, request, view=None):
+        """``paginate_queryset`` with the count and page queries on the async ORM.
+
+        ``queryset`` may also be a list, such as a day of flights merged with
+        schedule occurrences.
+        """
+        self.request = request
+        paginator = self.django_paginator_class(queryset, self.get_page_size(request))
+        if isinstance(queryset, QuerySet):
+            # Paginator.count would otherwise run the count query synchronously.
+            paginator.count = await queryset.acount()
+        page_number = self.get_page_number(request, paginator)
+
+        try:
+            self.page = paginator.page(page_number)
+        except InvalidPage as exc:
+            msg = self.invalid_page_message.format(page_number=page_number, message=str(exc))
+            raise NotFound(msg)
+
+        if isinstance(self.page.object_list, QuerySet):
+            self.page.object_list = [row async for row in self.page.object_list.aiterator()]
+        return list(self.page)
+
+
+class FlightCursorPagination(CursorPagination):
+    ordering = ("departure_time", "id")
+    page_size = 3
+    page_size_query_param = "page_size"
+    max_page_size = settings.CURSOR_PAGINATION_MAX_PAGE_SIZE
+
+
+class OrderCursorPagination(CursorPagination):
+    ordering = ("-created_at", "id")
+    page_size = 10
+    page_size_query_param = "page_size"
+    max_page_size = settings.CURSOR_PAGINATION_MAX_PAGE_SIZE
+
+
+PAGINATION_PARAMETER = OpenApiParameter(
+    name="pagination",
+    type=OpenApiTypes.STR,
+    enum=["cursor"],
+    description="Use keyset (cursor) pagination instead of the default one",
+)
+
+
+class CursorPaginationMixin:
+    """Switches the list to ``cursor_pagination_class`` when ``?pagination=cursor`` is passed."""
 
-class FlightViewSet(viewsets.ModelViewSet):
+    cursor_pagination_class = None
+
+    def uses_cursor_pagination(self):
+        return (
+            self.cursor_pagination_class is not None
+            and self.request.query_params.get("pagination") == "cursor"
+        )
+
+    @property
+    def paginator(self):
+        if not hasattr(self, "_paginator") and self.uses_cursor_pagination():
+            self._paginator = self.cursor_pagination_class()
+        return super().paginator
+
+
+# Invalid rows listed in an import response; the counts cover all of them.
+MAX_IMPORT_ERRORS = 100
+
+
+class FlightViewSet(VersionedResponseMixin, CursorPaginationMixin, viewsets.ModelViewSet):
     queryset = (
         Flight.objects.all()
         .select_related('airplane', 'airplane__airplane_type', 'route', 'route__source', 'route__destination')
@@ -155,65 +322,273 @@ class FlightViewSet(viewsets.ModelViewSet):
         .annotate(
             tickets_available=(
                     F('airplane__rows') * F('airplane__seats_in_row')
-                    - Count("tickets")
+                    - F("seats_sold")
             ),
         )
         )
     pagination_class = FlightPagination
+    cursor_pagination_class = FlightCursorPagination
     serializer_class = FlightSerializer
+    version_models = (
+        Flight, FlightSchedule, Route, Airport, Airplane, AirplaneType, Crew, SEATS_SOLD_VERSION, SEAT_HOLDS_VERSION
+    )
+    # Flights change with every booking, so only conditional GETs are served.
+    cache_responses = False
+
+    def uses_cursor_pagination(self):
+        # A day of flights merged with schedule occurrences is a list, not a queryset.
+        return super().uses_cursor_pagination() and not self.request.query_params.get("date")
 
     def get_serializer_class(self):
         if self.action == "list":
             return FlightListSerializer
         if self.action == "retrieve":
             return FlightDetailSerializer
+        if self.action == "seats":
+            return FlightSeatMapSerializer
         return FlightSerializer
 
     @staticmethod
-    def _params_to_ints(queryset):
-        return [int(str_id) for str_id in queryset.split(',')]
+    def validate_filters(query_params):
+        """The ``date``, ``route`` and ``crews`` filters of ``query_params``, parsed."""
+        filters = FlightFilterSerializer(data=query_params)
+        filters.is_valid(raise_exception=True)
+        return filters.validated_data
+
+    @classmethod
+    def filter_flights(cls, queryset, filters):
+        """Filter flights by validated ``filters``, see ``validate_filters``."""
+        crews = filters.get('crews')
+        date = filters.get('date')
+        route = filters.get('route')
 
-    def get_queryset(self):
-        crews = self.request.query_params.get('crews')
-        date = self.request.query_params.get('date')
+        if date:
+            queryset = queryset.filter(**day_filter("departure_time", date))
 
-        queryset = self.queryset
+        if route:
+            queryset = queryset.filter(route_id=route)
 
-        if date:
-            date = datetime.strptime(date, '%Y-%m-%d').date()
-            queryset = queryset.filter(departure_time__date=date)
+        if crews:
+            queryset = queryset.filter(crews__id__in=crews)
+
+        return queryset.distinct()
+
+    @classmethod
+    def filter_schedules(cls, queryset, filters):
+        crews = filters.get('crews')
+        route = filters.get('route')
+
+        if route:
+            queryset = queryset.filter(route_id=route)
 
         if crews:
-            crews_ids = self._params_to_ints(crews)
-            queryset = queryset.filter(crews__id__in=crews_ids)
+            queryset = queryset.filter(crews__id__in=crews)
 
         return queryset.distinct()
 
+    def get_queryset(self):
+        if self.action == "seats":
+            return Flight.objects.select_related("airplane")
+
+        return self.filter_flights(self.queryset, self.validate_filters(self.request.query_params))
+
     @extend_schema(
         parameters=[
             OpenApiParameter(
                 name="date",
                 type=OpenApiTypes.STR,
-                description="Date of the departure flight",
+                description=(
+                    "Date of the departure flight. Scheduled flights that are not booked yet are "
+                    "listed too, with an occurrence id (ex. s12-20251008) that tickets can be booked on"
+                ),
+            ),
+            OpenApiParameter(
+                name="route",
+                type=OpenApiTypes.INT,
+                description="Route id of the flight",
             ),
             OpenApiParameter(
                 name="crews",
                 type={"type":"list", "items": {"type": "number"}},
                 description="List of departure flight crews id (ex. ?crews=1,2)",
-            )
+            ),
+            PAGINATION_PARAMETER,
         ]
     )
     def list(self, request, *args, **kwargs):
-        return super().list(request, *args, **kwargs)
+        return self.versioned_response(self.list_values, request, *args, **kwargs)
+
+    def list_values(self, request, *args, **kwargs):
+        """``list`` served through FlightListValuesSerializer instead of FlightListSerializer."""
+        queryset = FlightListValuesSerializer.project(self.filter_queryset(self.get_queryset()))
+        context = self.get_serializer_context()
+
+        filters = self.validate_filters(request.query_params)
+        if filters.get("date"):
+            queryset = self.with_schedule_occurrences(queryset, filters["date"], filters)
+
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            return self.get_paginated_response(FlightListValuesSerializer(page, context=context).data)
+        return Response(FlightListValuesSerializer(queryset, context=context).data)
+
+    @classmethod
+    def unmaterialized_schedules(cls, date, filters):
+        """The schedules flying on ``date`` with no Flight yet that day, as values rows."""
+        materialized = Flight.objects.filter(
+            schedule__isnull=False, **day_filter("departure_time", date)
+        ).values_list("schedule_id", flat=True)
+        return FlightListValuesSerializer.running_on(
+            cls.filter_schedules(FlightSchedule.objects.all(), filters),
+            date,
+            exclude=materialized,
+        )
+
+    @classmethod
+    def with_schedule_occurrences(cls, rows, date, filters, schedules=None):
+        """Merge the day's flight ``rows`` with the schedule occurrences that have no Flight yet.
+
+        ``schedules`` are the ``unmaterialized_schedules`` rows when fetched already.
+        """
+        if schedules is None:
+            schedules = cls.unmaterialized_schedules(date, filters)
+        occurrences = FlightListValuesSerializer.occurrences(schedules, date)
+        return sorted([*rows, *occurrences], key=lambda row: row["departure_time"])
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.versioned_response(super().retrieve, request, *args, **kwargs)
+
+    @action(detail=True, methods=["GET"])
+    def seats(self, request, pk=None):
+        flight = self.get_object()
+        serializer = self.get_serializer(SeatMap.for_flight(flight))
+        return Response(serializer.data, status=status.HTTP_200_OK)
+
+    @extend_schema(
+        request={content_type: OpenApiTypes.STR for content_type in IMPORT_FORMATS.values()},
+        description=(
+            "Bulk-import a schedule sent as the raw CSV or NDJSON body. "
+            "Flights with the same route, airplane and departure time are skipped."
+        ),
+    )
+    @action(
+        detail=False,
+        methods=["POST"],
+        permission_classes=[IsAdminUser],
+        url_path="import",
+        url_name="import",
+    )
+    def import_schedule(self, request):
+        media_type = (request.content_type or "").split(";")[0].strip()
+        schedule_format = {content_type: name for name, content_type in IMPORT_FORMATS.items()}.get(media_type)
+        if schedule_format is None:
+            raise UnsupportedMediaType(media_type)
+
+        # Read the body line by line instead of through request.data, so the
+        # schedule is never held in memory as a whole.
+        lines = decode_lines(iter(request.stream.readline, b"") if request.stream else ())
+        stats = ScheduleImporter(max_errors=MAX_IMPORT_ERRORS).run(
+            RECORD_READERS[schedule_format](lines)
+        )
+        return Response(stats.as_dict(), status=status.HTTP_200_OK)
+
+
+# Days a crew roster covers when no date_to is given.
+ROSTER_DAYS = 7
+
+
+class CrewViewSet(
+    VersionedResponseMixin,
+    mixins.ListModelMixin,
+    mixins.CreateModelMixin,
+    mixins.RetrieveModelMixin,
+    viewsets.GenericViewSet,
+):
+    queryset = Crew.objects.all()
+    serializer_class = CrewSerializer
+    version_models = (Crew,)
+
+    def list(self, request, *args, **kwargs):
+        return self.versioned_response(super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.versioned_response(super().retrieve, request, *args, **kwargs)
+
+    @extend_schema(
+        parameters=[
+            OpenApiParameter(
+                name="date_from",
+                type=OpenApiTypes.DATE,
+                description="First day of the roster, today by default",
+            ),
+            OpenApiParameter(
+                name="date_to",
+                type=OpenApiTypes.DATE,
+                description=f"Last day of the roster, {ROSTER_DAYS} days after date_from by default",
+            ),
+        ]
+    )
+    @action(detail=True, methods=["GET"])
+    def roster(self, request, pk=None):
+        """Flights of the crew member in a date range, from the crew interval index"""
+        crew = self.get_object()
+        date_field = serializers.DateField()
+        date_from = request.query_params.get("date_from")
+        date_from = date_field.run_validation(date_from) if date_from else timezone.localdate()
+        date_to = request.query_params.get("date_to")
+        date_to = date_field.run_validation(date_to) if date_to else date_from + timedelta(days=ROSTER_DAYS)
+        if date_to < date_from:
+            raise serializers.ValidationError({"date_to": "Must not be before date_from"})
+
+        index = crew_roster.get([crew.id])[crew.id]
+        datetime_field = serializers.DateTimeField()
+        return Response({
+            "crew": CrewSerializer(crew).data,
+            "flights": [
+                {
+                    "flight": flight_id,
+                    "departure_time": datetime_field.to_representation(departure_time),
+                    "arrival_time": datetime_field.to_representation(arrival_time),
+                    "source": source,
+                    "destination": destination,
+                }
+                for departure_time, arrival_time, flight_id, source, destination in index.overlapping(
+                    day_start(date_from), day_start(date_to + timedelta(days=1))
+                )
+            ],
+        })
+
+
+class FlightScheduleViewSet(VersionedResponseMixin, viewsets.ModelViewSet):
+    queryset = FlightSchedule.objects.all().prefetch_related("crews")
+    serializer_class = FlightScheduleSerializer
+    version_models = (FlightSchedule,)
+
+    def list(self, request, *args, **kwargs):
+        return self.versioned_response(super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.versioned_response(super().retrieve, request, *args, **kwargs)
+
 
 class OrderViewSet(
+    CursorPaginationMixin,
     viewsets.GenericViewSet,
     mixins.CreateModelMixin,
     mixins.ListModelMixin,
+    mixins.DestroyModelMixin,
 ):
-    queryset = Order.objects.all().select_related("tickets__flight__travel")
+    queryset = Order.objects.prefetch_related(
+        Prefetch(
+            "tickets",
+            queryset=Ticket.objects.select_related(
+                "flight__airplane", "flight__route__destination"
+            ).prefetch_related("flight__crews"),
+        )
+    )
     serializer_class = OrderSerializer
     permission_classes = [IsAuthenticated]
+    cursor_pagination_class = OrderCursorPagination
 
     def get_serializer_class(self):
         if self.action == "list":
@@ -221,8 +596,240 @@ class OrderViewSet(
         return OrderSerializer
 
     def get_queryset(self):
+        if self.action == "list":
+            return self.queryset.filter(user=self.request.user)
         return Order.objects.filter(user=self.request.user)
 
     def perform_create(self, serializer):
         serializer.save(user=self.request.user)
 
+    @extend_schema(parameters=[PAGINATION_PARAMETER])
+    def list(self, request, *args, **kwargs):
+        return super().list(request, *args, **kwargs)
+
+
+class SeatHoldViewSet(
+    viewsets.GenericViewSet,
+    mixins.CreateModelMixin,
+    mixins.RetrieveModelMixin,
+    mixins.DestroyModelMixin,
+):
+    """Short-lived seat holds that are confirmed into an order or expire."""
+
+    serializer_class = SeatHoldSerializer
+    permission_classes = [IsAuthenticated]
+    lookup_value_regex = "[A-Za-z0-9_-]+"
+
+    def get_object(self):
+        hold = SeatHold.get(self.kwargs["pk"])
+        if hold is None or hold.user_id != self.request.user.id:
+            raise NotFound("No seat hold matches the given query.")
+        return hold
+
+    def perform_destroy(self, instance):
+        instance.release()
+
+    @extend_schema(request=None, responses={201: OrderSerializer})
+    @action(detail=True, methods=["POST"])
+    def confirm(self, request, pk=None):
+        hold = self.get_object()
+        serializer = OrderSerializer(
+            data={"tickets": self.get_serializer(hold).data["tickets"]},
+            context=self.get_serializer_context(),
+        )
+        serializer.is_valid(raise_exception=True)
+        serializer.save(user=request.user)
+        hold.release()
+        return Response(serializer.data, status=status.HTTP_201_CREATED)
+
+
+class ItineraryViewSet(viewsets.ViewSet):
+    """Connections between two airports, searched in the per-process itinerary index."""
+
+    @staticmethod
+    def represent(itinerary, graph, available):
+        datetime_field = serializers.DateTimeField()
+        return {
+            "departure_time": datetime_field.to_representation(itinerary[0].departure_time),
+            "arrival_time": datetime_field.to_representation(itinerary[-1].arrival_time),
+            "duration_minutes": int(
+                (itinerary[-1].arrival_time - itinerary[0].departure_time).total_seconds() // 60
+            ),
+            "legs": [
+                {
+                    "flight": leg.flight_id,
+                    "source": graph.airports[leg.source_id],
+                    "destination": graph.airports[leg.destination_id],
+                    "departure_time": datetime_field.to_representation(leg.departure_time),
+                    "arrival_time": datetime_field.to_representation(leg.arrival_time),
+                    "tickets_available": available[leg.flight_id],
+                }
+                for leg in itinerary
+            ],
+        }
+
+    @extend_schema(parameters=[ItinerarySearchSerializer], responses={200: OpenApiTypes.OBJECT})
+    def list(self, request):
+        search = ItinerarySearchSerializer(data=request.query_params)
+        search.is_valid(raise_exception=True)
+        params = search.validated_data
+
+        if "date" in params:
+            departure_after = day_start(params["date"])
+        else:
+            departure_after = timezone.now()
+        departure_before = departure_after + timedelta(days=1)
+
+        graph, available = itinerary_index.get()
+        itineraries = graph.search(
+            params["source"],
+            params["destination"],
+            departure_after,
+            departure_before,
+            available,
+            tickets=params["tickets"],
+            limit=params["limit"],
+            max_legs=params["max_legs"],
+        )
+        itineraries, available = self.without_held_seats(itineraries, available, params["tickets"])
+        return Response([self.represent(itinerary, graph, available) for itinerary in itineraries])
+
+    @staticmethod
+    def without_held_seats(itineraries, available, tickets):
+        """Take the seats on hold off ``available`` for the legs of ``itineraries``.
+
+        The index only knows sold seats, so holds are counted for the legs found
+        and itineraries that no longer have ``tickets`` seats on a leg are dropped.
+        """
+        legs = {leg.flight_id: leg for itinerary in itineraries for leg in itinerary}
+        held = SeatHold.held_counts(legs)
+        if not held:
+            return itineraries, available
+
+        available = {flight_id: available[flight_id] - held[flight_id] for flight_id in legs}
+        return [
+            itinerary for itinerary in itineraries
+            if all(available[leg.flight_id] >= tickets for leg in itinerary)
+        ], available
+
+
+class SearchViewSet(viewsets.ViewSet):
+    """Airports, their cities, airplanes and airplane types matching ``?q=``, best first.
+
+    PostgreSQL ranks matches with trigram similarity and full-text rank, so
+    misspelled words are found too. Other databases, and the autocomplete
+    action, answer word prefixes from the per-process search index.
+    """
+
+    def get_params(self):
+        search = SearchSerializer(data=self.request.query_params)
+        search.is_valid(raise_exception=True)
+        return search.validated_data
+
+    @extend_schema(parameters=[SearchSerializer], responses={200: OpenApiTypes.OBJECT})
+    def list(self, request):
+        params = self.get_params()
+        if connection.vendor == "postgresql":
+            return Response(database_search(params["q"], params["limit"]))
+        return Response(search_index.search(params["q"], params["limit"]))
+
+    @extend_schema(parameters=[SearchSerializer], responses={200: OpenApiTypes.OBJECT})
+    @action(detail=False, methods=["GET"])
+    def autocomplete(self, request):
+        params = self.get_params()
+        return Response(search_index.search(params["q"], params["limit"]))
+
+
+OUTPUT_PARAMETER = OpenApiParameter(
+    name="output",
+    type=OpenApiTypes.STR,
+    enum=list(OUTPUT_FORMATS),
+    description="Export format, ndjson (default) or csv",
+)
+DATE_PARAMETER = OpenApiParameter(
+    name="date",
+    type=OpenApiTypes.STR,
+    description="Date of the departure flight (orders: date of creation)",
+)
+ROUTE_PARAMETER = OpenApiParameter(
+    name="route",
+    type=OpenApiTypes.INT,
+    description="Route id of the flight",
+)
+CREWS_PARAMETER = OpenApiParameter(
+    name="crews",
+    type={"type": "list", "items": {"type": "number"}},
+    description="List of flight crews id (ex. ?crews=1,2)",
+)
+
+
+class ExportViewSet(viewsets.ViewSet):
+    """Streams full flight, ticket and order tables for reconciliation."""
+
+    permission_classes = [IsAdminUser]
+
+    def get_output(self):
+        output = self.request.query_params.get("output", "ndjson")
+        if output not in OUTPUT_FORMATS:
+            raise serializers.ValidationError(
+                {"output": f"Expected one of: {', '.join(OUTPUT_FORMATS)}"}
+            )
+        return output
+
+    def get_filters(self):
+        filters = ExportFilterSerializer(data=self.request.query_params)
+        filters.is_valid(raise_exception=True)
+        return filters.validated_data
+
+    @extend_schema(
+        parameters=[OUTPUT_PARAMETER, DATE_PARAMETER, ROUTE_PARAMETER, CREWS_PARAMETER],
+        responses={200: OpenApiTypes.BINARY},
+    )
+    @action(detail=False, methods=["GET"])
+    def flights(self, request):
+        output = self.get_output()
+        queryset = FlightViewSet.filter_flights(Flight.objects.all(), self.get_filters())
+        return streaming_export(flight_rows(queryset), FLIGHT_COLUMNS, output, "flights")
+
+    @extend_schema(
+        parameters=[
+            OUTPUT_PARAMETER,
+            DATE_PARAMETER,
+            ROUTE_PARAMETER,
+            OpenApiParameter(
+                name="flight",
+                type=OpenApiTypes.INT,
+                description="Flight id of the tickets",
+            ),
+        ],
+        responses={200: OpenApiTypes.BINARY},
+    )
+    @action(detail=False, methods=["GET"])
+    def tickets(self, request):
+        output = self.get_output()
+        filters = self.get_filters()
+        date = filters.get("date")
+        route = filters.get("route")
+        flight = filters.get("flight")
+
+        queryset = Ticket.objects.all()
+        if date:
+            queryset = queryset.filter(**day_filter("flight__departure_time", date))
+        if route:
+            queryset = queryset.filter(flight__route_id=route)
+        if flight:
+            queryset = queryset.filter(flight_id=flight)
+
+        return streaming_export(ticket_rows(queryset), TICKET_COLUMNS, output, "tickets")
+
+    @extend_schema(parameters=[OUTPUT_PARAMETER, DATE_PARAMETER], responses={200: OpenApiTypes.BINARY})
+    @action(detail=False, methods=["GET"])
+    def orders(self, request):
+        output = self.get_output()
+        date = self.get_filters().get("date")
+
+        queryset = Order.objects.all()
+        if date:
+            queryset = queryset.filter(**day_filter("created_at", date))
+
+        return streaming_export(order_rows(queryset), ORDER_COLUMNS, output, "orders")
@@ -38,6 +38,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
     'rest_framework',
     'rest_framework.authtoken',
     "debug_toolbar",
@@ -94,9 +95,29 @@ DATABASES = {
         'HOST': os.environ["POSTGRES_HOST"],
 
         'PORT': os.environ["POSTGRES_PORT"],
+
+        'CONN_MAX_AGE': int(os.environ.get("CONN_MAX_AGE", 60)),
+
+        'CONN_HEALTH_CHECKS': True,
     }
 }
 
+# psycopg's connection pool replaces persistent connections when enabled;
+# Django refuses to combine the two.
+if os.environ.get("DB_POOL", "false").lower() in ("1", "true", "yes"):
+    DATABASES["default"]["CONN_MAX_AGE"] = 0
+    DATABASES["default"]["OPTIONS"] = {
+        "pool": {
+            "min_size": int(os.environ.get("DB_POOL_MIN_SIZE", 2)),
+            "max_size": int(os.environ.get("DB_POOL_MAX_SIZE", 10)),
+            "timeout": float(os.environ.get("DB_POOL_TIMEOUT", 10)),
+        }
+    }
+# Under ASGI the ORM runs in executor threads which would each keep a
+# persistent connection open, so connections are closed per request instead.
+elif os.environ.get("SERVER_INTERFACE", "wsgi") == "asgi":
+    DATABASES["default"]["CONN_MAX_AGE"] = 0
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -146,6 +167,37 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 INTERNAL_IPS = ['127.0.0.1']
 
+# Redis (or any Redis-compatible server) when REDIS_URL is set, process memory otherwise.
+if os.environ.get("REDIS_URL"):
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": os.environ["REDIS_URL"],
+        }
+    }
+else:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        }
+    }
+
+# Seconds a cached catalog response lives; changes invalidate it earlier.
+RESPONSE_CACHE_TIMEOUT = int(os.environ.get("RESPONSE_CACHE_TIMEOUT", 300))
+
+# Seconds a seat hold keeps its seats. Holds live in the cache, so workers
+# only see each other's holds when the cache is shared (REDIS_URL).
+SEAT_HOLD_TTL = int(os.environ.get("SEAT_HOLD_TTL", 300))
+
+# Seconds a departures/arrivals board stays cached; flight changes refresh it earlier.
+BOARD_CACHE_TIMEOUT = int(os.environ.get("BOARD_CACHE_TIMEOUT", 3600))
+
+# Connection rules of the itinerary search.
+ITINERARY_MIN_CONNECTION_MINUTES = int(os.environ.get("ITINERARY_MIN_CONNECTION_MINUTES", 45))
+ITINERARY_MAX_LAYOVER_HOURS = int(os.environ.get("ITINERARY_MAX_LAYOVER_HOURS", 24))
+# Days ahead for which schedule occurrences with no Flight yet are searched.
+ITINERARY_SCHEDULE_DAYS = int(os.environ.get("ITINERARY_SCHEDULE_DAYS", 60))
+
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
         "rest_framework_simplejwt.authentication.JWTAuthentication",
@@ -158,12 +210,25 @@ REST_FRAMEWORK = {
         'rest_framework.throttling.UserRateThrottle'
     ],
     'DEFAULT_THROTTLE_RATES': {
-        'anon': '5/min',
-        'user': '20/min'
+        'anon': os.environ.get("THROTTLE_ANON_RATE", '5/min'),
+        'user': os.environ.get("THROTTLE_USER_RATE", '20/min'),
     },
     "DEFAULT_SCHEMA_CLASS": "drf_spectacular.openapi.AutoSchema",
+    # orjson-backed drop-ins for DRF's JSON renderer and parser (see airport.renderers).
+    "DEFAULT_RENDERER_CLASSES": (
+        "airport.renderers.FastJSONRenderer",
+        "rest_framework.renderers.BrowsableAPIRenderer",
+    ),
+    "DEFAULT_PARSER_CLASSES": (
+        "airport.parsers.FastJSONParser",
+        "rest_framework.parsers.FormParser",
+        "rest_framework.parsers.MultiPartParser",
+    ),
 }
 
+# Upper bound for ?page_size= when a list is paginated with ?pagination=cursor
+CURSOR_PAGINATION_MAX_PAGE_SIZE = int(os.environ.get("CURSOR_PAGINATION_MAX_PAGE_SIZE", 100))
+
 SPECTACULAR_SETTINGS = {
     'TITLE': 'Airport API Service',
     'DESCRIPTION': 'Manage airports, flights, airplanes, routes, crews, and ticket orders via API.',
@@ -0,0 +1,26 @@
+"""
+Gunicorn configuration for serving airport_api_service.
+
+SERVER_INTERFACE=wsgi (default) runs airport_api_service.wsgi in sync
+workers, SERVER_INTERFACE=asgi runs airport_api_service.asgi in uvicorn
+workers. WEB_CONCURRENCY overrides the worker count.
+"""
+import multiprocessing
+import os
+
+bind = os.environ.get("GUNICORN_BIND", "0.0.0.0:8000")
+
+workers = int(os.environ.get("WEB_CONCURRENCY", multiprocessing.cpu_count() * 2 + 1))
+
+if os.environ.get("SERVER_INTERFACE", "wsgi") == "asgi":
+    wsgi_app = "airport_api_service.asgi:application"
+    worker_class = "uvicorn_worker.UvicornWorker"
+else:
+    wsgi_app = "airport_api_service.wsgi:application"
+    worker_class = "sync"
+
+timeout = int(os.environ.get("GUNICORN_TIMEOUT", 30))
+keepalive = 5
+max_requests = 1000
+max_requests_jitter = 100
+accesslog = "-"